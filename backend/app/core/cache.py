@@ -0,0 +1,139 @@
+"""
+In-process caching utilities.
+
+This module provides a small TTL + LRU cache used to keep hot, rarely changing
+read paths (such as the lesson catalog) off the database. Entries expire after
+a fixed time-to-live and the least recently used entry is evicted once the
+cache reaches its maximum size, so memory use stays bounded.
+"""
+
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Optional
+
+class TTLCache:
+    """
+    Bounded least-recently-used cache whose entries expire after a TTL.
+
+    Attributes:
+        maxsize (int): Maximum number of entries kept before evicting.
+        ttl (float): Seconds an entry stays valid after being stored.
+        hits (int): Number of lookups served from the cache.
+        misses (int): Number of lookups that found no valid entry.
+        evictions (int): Number of entries dropped to respect ``maxsize``.
+        generation (int): Incremented by every ``invalidate`` and ``pop``, so a
+            read-through caller can tell that a write happened while it fetched.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, timer: Callable[[], float] = time.monotonic):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.generation = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns the cached value for ``key`` or ``default`` if absent or expired.
+
+        Args:
+            key (Hashable): The cache key.
+            default (Any): Value returned on a miss.
+
+        Returns:
+            Any: The cached value or ``default``.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= self._timer():
+                del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: Optional[float] = None,
+        generation: Optional[int] = None
+    ) -> bool:
+        """
+        Stores ``value`` under ``key``, evicting the least recently used entry if full.
+
+        Args:
+            key (Hashable): The cache key.
+            value (Any): The value to store.
+            ttl (float, optional): Overrides the cache-wide TTL for this entry.
+            generation (int, optional): ``generation`` read before ``value`` was
+                fetched; the value is discarded if the cache was invalidated since.
+
+        Returns:
+            bool: Whether the value was stored.
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+            self._entries[key] = (self._timer() + (self.ttl if ttl is None else ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """
+        Removes entries whose key matches ``predicate``, or every entry if omitted.
+
+        Args:
+            predicate (Callable, optional): Returns True for keys to drop.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        with self._lock:
+            self.generation += 1
+            if predicate is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            stale = [key for key in self._entries if predicate(key)]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters and sizing information for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+            }
+
+    def pop(self, key: Hashable) -> None:
+        """Removes ``key`` from the cache if present."""
+        with self._lock:
+            self.generation += 1
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -12,6 +12,8 @@ Key Features:
 - Support for CORS origins configuration
 """
 
+import os
+import tempfile
 from pydantic import BaseModel, Field
 from functools import lru_cache
 from typing import List
@@ -42,8 +44,96 @@ class Settings(BaseModel):
         default="test-key",
         description="Supabase anonymous key (for client-side use only)"
     )
+    SUPABASE_JWT_SECRET: str = Field(
+        default="",
+        description="Legacy HS256 JWT secret; when empty, tokens are verified against the project's JWKS"
+    )
+    SUPABASE_JWT_AUDIENCE: str = Field(
+        default="authenticated",
+        description="Expected 'aud' claim of Supabase access tokens"
+    )
+    SUPABASE_JWKS_CACHE_SECONDS: int = Field(
+        default=600,
+        description="Seconds fetched JWKS signing keys are reused"
+    )
+    SUPABASE_AUTH_REVOCATION_CHECK_SECONDS: float = Field(
+        default=0,
+        description="Re-check a cached token with Supabase Auth after this many seconds (0 disables)"
+    )
+    JWT_CLAIMS_CACHE_MAXSIZE: int = Field(
+        default=10000,
+        description="Maximum number of verified tokens whose claims are cached"
+    )
     STRIPE_SECRET_KEY: str = Field(default="test-key")
     STRIPE_WEBHOOK_SECRET: str = Field(default="test-webhook-secret")
+    STRIPE_POOL_SIZE: int = Field(
+        default=20,
+        description="Maximum kept-alive connections to the Stripe API"
+    )
+    STRIPE_CONNECT_TIMEOUT_SECONDS: float = Field(
+        default=5.0,
+        description="Connect timeout for Stripe API requests"
+    )
+    STRIPE_READ_TIMEOUT_SECONDS: float = Field(
+        default=30.0,
+        description="Read timeout for Stripe API requests"
+    )
+    STRIPE_MAX_NETWORK_RETRIES: int = Field(
+        default=2,
+        description="Automatic retries for failed Stripe requests (sent with idempotency keys)"
+    )
+    STRIPE_EXECUTOR_MAX_WORKERS: int = Field(
+        default=16,
+        description="Worker threads running blocking Stripe SDK calls"
+    )
+    STRIPE_EXECUTOR_MAX_QUEUE: int = Field(
+        default=256,
+        description="Stripe calls allowed to wait for a worker before returning 503"
+    )
+    STRIPE_WEBHOOK_WORKERS: int = Field(
+        default=32,
+        description="Background workers processing stored Stripe webhook events"
+    )
+    STRIPE_WEBHOOK_QUEUE_SIZE: int = Field(
+        default=1000,
+        description="Stripe events buffered in memory before the webhook endpoint waits"
+    )
+    STRIPE_WEBHOOK_MAX_ATTEMPTS: int = Field(
+        default=5,
+        description="Processing attempts before a Stripe event is marked failed"
+    )
+    STRIPE_WEBHOOK_RETRY_BASE_SECONDS: float = Field(
+        default=2.0,
+        description="First retry delay for a failed Stripe event; doubles on each attempt"
+    )
+    PURCHASE_BATCH_SIZE: int = Field(
+        default=100,
+        description="Maximum purchases written in one bulk upsert"
+    )
+    PURCHASE_BATCH_DELAY_SECONDS: float = Field(
+        default=0.05,
+        description="Seconds fulfilled purchases wait to be coalesced into one write"
+    )
+    ENTITLEMENT_CACHE_MAXSIZE: int = Field(
+        default=10000,
+        description="Maximum number of users whose purchased lessons are cached"
+    )
+    ENTITLEMENT_CACHE_TTL_SECONDS: float = Field(
+        default=3600.0,
+        description="Seconds a user's cached purchased lessons stay valid"
+    )
+    ENTITLEMENT_RECHECK_SECONDS: float = Field(
+        default=30.0,
+        description="Minimum age of a cached entry before a denied lookup re-reads purchases"
+    )
+    LESSON_IMPORT_CHUNK_SIZE: int = Field(
+        default=100,
+        description="Lessons written per multi-row insert during bulk imports"
+    )
+    LESSON_IMPORT_STRIPE_CONCURRENCY: int = Field(
+        default=16,
+        description="Stripe products and prices created in parallel during bulk imports"
+    )
     VIMEO_ACCESS_TOKEN: str = Field(
         default="",
         description="Vimeo API access token for video management"
@@ -56,6 +146,142 @@ class Settings(BaseModel):
         default="",
         description="Vimeo API client secret"
     )
+    VIMEO_UPLOAD_CHUNK_SIZE: int = Field(
+        default=64 * 1024 * 1024,
+        description="Bytes sent per tus PATCH request when uploading to Vimeo"
+    )
+    VIMEO_UPLOAD_CONCURRENCY: int = Field(
+        default=2,
+        description="Video uploads transferred to Vimeo at the same time"
+    )
+    VIMEO_UPLOAD_RETRIES: int = Field(
+        default=3,
+        description="Retries for a failed upload chunk before the upload fails"
+    )
+    VIMEO_UPLOAD_RETRY_DELAY_SECONDS: int = Field(
+        default=5,
+        description="Seconds to wait before retrying a failed upload chunk"
+    )
+    VIMEO_UPLOAD_STATE_DIR: str = Field(
+        default=os.path.join(tempfile.gettempdir(), "teachniche-vimeo-uploads"),
+        description="Directory where upload links and offsets are kept for resuming uploads"
+    )
+    VIMEO_UPLOAD_DIR: str = Field(
+        default=os.path.join(tempfile.gettempdir(), "teachniche-video-files"),
+        description="Directory server-side uploads may read video files from"
+    )
+    VIMEO_UPLOAD_QUEUE_SIZE: int = Field(
+        default=100,
+        description="Upload jobs waiting for a worker before the upload endpoint returns 503"
+    )
+    VIMEO_UPLOAD_JOB_HISTORY: int = Field(
+        default=1000,
+        description="Upload jobs kept in memory for status polling"
+    )
+    VIMEO_UPLOAD_JOB_TTL_SECONDS: int = Field(
+        default=86400,
+        description="Seconds an upload job stays available for status polling"
+    )
+    VIMEO_METADATA_CACHE_MAXSIZE: int = Field(
+        default=5000,
+        description="Maximum Vimeo video metadata entries kept in memory"
+    )
+    VIMEO_METADATA_CACHE_TTL_SECONDS: int = Field(
+        default=900,
+        description="Seconds Vimeo video metadata is served from cache"
+    )
+    VIMEO_METADATA_BATCH_SIZE: int = Field(
+        default=100,
+        description="Videos requested per Vimeo /videos?uris= call"
+    )
+    VIMEO_METADATA_MAX_IDS: int = Field(
+        default=100,
+        description="Most video IDs one metadata request may ask for; more are rejected with 422"
+    )
+    VIMEO_METADATA_REFRESH_SECONDS: int = Field(
+        default=900,
+        description="Seconds between background refreshes of lesson video metadata"
+    )
+    VIMEO_THUMBNAIL_WIDTH: int = Field(
+        default=640,
+        description="Smallest thumbnail width picked for lesson cards"
+    )
+    VIMEO_API_ROOT: str = Field(
+        default="https://api.vimeo.com",
+        description="Base URL of the Vimeo API; point at a stub server in tests"
+    )
+    VIMEO_RATE_LIMIT_PER_SECOND: float = Field(
+        default=2.0,
+        description="Sustained Vimeo API calls per second allowed by the local token bucket"
+    )
+    VIMEO_RATE_LIMIT_BURST: int = Field(
+        default=20,
+        description="Vimeo API calls that may be made back to back before the token bucket throttles"
+    )
+    VIMEO_RATE_LIMIT_BATCH_RESERVE: int = Field(
+        default=25,
+        description="Remaining Vimeo quota kept for interactive calls; batch calls wait for the window to reset below it"
+    )
+    VIMEO_RATE_LIMIT_MAX_WAIT_SECONDS: float = Field(
+        default=10.0,
+        description="Longest an interactive Vimeo call waits for rate-limit budget before failing"
+    )
+    VIMEO_RATE_LIMIT_BACKOFF_SECONDS: float = Field(
+        default=60.0,
+        description="Pause after a 429 from Vimeo when no reset time is known"
+    )
+    SUPABASE_POOL_SIZE: int = Field(
+        default=20,
+        description="Maximum pooled connections for async PostgREST requests"
+    )
+    SUPABASE_TIMEOUT_SECONDS: float = Field(
+        default=10.0,
+        description="Timeout for async PostgREST requests"
+    )
+    SUPABASE_READY_TIMEOUT_SECONDS: float = Field(
+        default=2.0,
+        description="Timeout for the Supabase connectivity check behind /api/ready"
+    )
+    SUPABASE_READY_CACHE_SECONDS: float = Field(
+        default=5.0,
+        description="Seconds a readiness result is reused before Supabase is checked again"
+    )
+    SUPABASE_BULK_CHUNK_SIZE: int = Field(
+        default=500,
+        description="Rows or IDs sent per request by the bulk CRUD helpers"
+    )
+    SUPABASE_BULK_MAX_ITEMS: int = Field(
+        default=10000,
+        description="Largest batch accepted by the batch CRUD endpoints"
+    )
+    SUPABASE_PAGE_SIZE: int = Field(
+        default=100,
+        description="Rows per page returned by read_records and /profiles when no limit is given"
+    )
+    SUPABASE_MAX_PAGE_SIZE: int = Field(
+        default=1000,
+        description="Largest limit accepted by read_records and /profiles"
+    )
+    SUPABASE_STREAM_PAGE_SIZE: int = Field(
+        default=1000,
+        description="Rows fetched from PostgREST per range() request when streaming NDJSON"
+    )
+    LESSON_CACHE_MAXSIZE: int = Field(
+        default=512,
+        description="Maximum number of cached lesson listing pages"
+    )
+    LESSON_CACHE_TTL_SECONDS: float = Field(
+        default=60.0,
+        description="Seconds a cached lesson listing page stays valid"
+    )
+    CREATOR_ACCOUNT_CACHE_MAXSIZE: int = Field(
+        default=1024,
+        description="Maximum number of cached lesson to Stripe account mappings"
+    )
+    CREATOR_ACCOUNT_CACHE_TTL_SECONDS: float = Field(
+        default=30.0,
+        description="Seconds a cached lesson to Stripe account mapping stays valid"
+    )
     CORS_ORIGINS: List[str] = ["http://localhost:3000"]
 
     class Config:
@@ -89,8 +315,64 @@ def get_settings() -> Settings:
         SUPABASE_URL=os.getenv("SUPABASE_URL", os.getenv("NEXT_PUBLIC_SUPABASE_URL", "http://localhost:8000")),
         SUPABASE_SERVICE_KEY=os.getenv("SUPABASE_SERVICE_KEY", "test-service-key"),
         SUPABASE_ANON_KEY=os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY", "test-key"),
+        SUPABASE_JWT_SECRET=os.getenv("SUPABASE_JWT_SECRET", ""),
+        SUPABASE_JWT_AUDIENCE=os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated"),
+        SUPABASE_JWKS_CACHE_SECONDS=int(os.getenv("SUPABASE_JWKS_CACHE_SECONDS", "600")),
+        SUPABASE_AUTH_REVOCATION_CHECK_SECONDS=float(os.getenv("SUPABASE_AUTH_REVOCATION_CHECK_SECONDS", "0")),
+        JWT_CLAIMS_CACHE_MAXSIZE=int(os.getenv("JWT_CLAIMS_CACHE_MAXSIZE", "10000")),
         STRIPE_SECRET_KEY=os.getenv("STRIPE_SECRET_KEY", "test-key"),
+        STRIPE_POOL_SIZE=int(os.getenv("STRIPE_POOL_SIZE", "20")),
+        STRIPE_CONNECT_TIMEOUT_SECONDS=float(os.getenv("STRIPE_CONNECT_TIMEOUT_SECONDS", "5")),
+        STRIPE_READ_TIMEOUT_SECONDS=float(os.getenv("STRIPE_READ_TIMEOUT_SECONDS", "30")),
+        STRIPE_MAX_NETWORK_RETRIES=int(os.getenv("STRIPE_MAX_NETWORK_RETRIES", "2")),
+        STRIPE_EXECUTOR_MAX_WORKERS=int(os.getenv("STRIPE_EXECUTOR_MAX_WORKERS", "16")),
+        STRIPE_EXECUTOR_MAX_QUEUE=int(os.getenv("STRIPE_EXECUTOR_MAX_QUEUE", "256")),
+        STRIPE_WEBHOOK_WORKERS=int(os.getenv("STRIPE_WEBHOOK_WORKERS", "32")),
+        STRIPE_WEBHOOK_QUEUE_SIZE=int(os.getenv("STRIPE_WEBHOOK_QUEUE_SIZE", "1000")),
+        STRIPE_WEBHOOK_MAX_ATTEMPTS=int(os.getenv("STRIPE_WEBHOOK_MAX_ATTEMPTS", "5")),
+        STRIPE_WEBHOOK_RETRY_BASE_SECONDS=float(os.getenv("STRIPE_WEBHOOK_RETRY_BASE_SECONDS", "2")),
+        PURCHASE_BATCH_SIZE=int(os.getenv("PURCHASE_BATCH_SIZE", "100")),
+        PURCHASE_BATCH_DELAY_SECONDS=float(os.getenv("PURCHASE_BATCH_DELAY_SECONDS", "0.05")),
+        ENTITLEMENT_CACHE_MAXSIZE=int(os.getenv("ENTITLEMENT_CACHE_MAXSIZE", "10000")),
+        ENTITLEMENT_CACHE_TTL_SECONDS=float(os.getenv("ENTITLEMENT_CACHE_TTL_SECONDS", "3600")),
+        ENTITLEMENT_RECHECK_SECONDS=float(os.getenv("ENTITLEMENT_RECHECK_SECONDS", "30")),
+        LESSON_IMPORT_CHUNK_SIZE=int(os.getenv("LESSON_IMPORT_CHUNK_SIZE", "100")),
+        LESSON_IMPORT_STRIPE_CONCURRENCY=int(os.getenv("LESSON_IMPORT_STRIPE_CONCURRENCY", "16")),
         VIMEO_ACCESS_TOKEN=os.getenv("VIMEO_ACCESS_TOKEN", ""),
         VIMEO_CLIENT_ID=os.getenv("VIMEO_CLIENT_ID", ""),
-        VIMEO_CLIENT_SECRET=os.getenv("VIMEO_CLIENT_SECRET", "")
+        VIMEO_CLIENT_SECRET=os.getenv("VIMEO_CLIENT_SECRET", ""),
+        VIMEO_UPLOAD_CHUNK_SIZE=int(os.getenv("VIMEO_UPLOAD_CHUNK_SIZE", str(64 * 1024 * 1024))),
+        VIMEO_UPLOAD_CONCURRENCY=int(os.getenv("VIMEO_UPLOAD_CONCURRENCY", "2")),
+        VIMEO_UPLOAD_RETRIES=int(os.getenv("VIMEO_UPLOAD_RETRIES", "3")),
+        VIMEO_UPLOAD_RETRY_DELAY_SECONDS=int(os.getenv("VIMEO_UPLOAD_RETRY_DELAY_SECONDS", "5")),
+        VIMEO_UPLOAD_STATE_DIR=os.getenv("VIMEO_UPLOAD_STATE_DIR", os.path.join(tempfile.gettempdir(), "teachniche-vimeo-uploads")),
+        VIMEO_UPLOAD_DIR=os.getenv("VIMEO_UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "teachniche-video-files")),
+        VIMEO_UPLOAD_QUEUE_SIZE=int(os.getenv("VIMEO_UPLOAD_QUEUE_SIZE", "100")),
+        VIMEO_UPLOAD_JOB_HISTORY=int(os.getenv("VIMEO_UPLOAD_JOB_HISTORY", "1000")),
+        VIMEO_UPLOAD_JOB_TTL_SECONDS=int(os.getenv("VIMEO_UPLOAD_JOB_TTL_SECONDS", "86400")),
+        VIMEO_METADATA_CACHE_MAXSIZE=int(os.getenv("VIMEO_METADATA_CACHE_MAXSIZE", "5000")),
+        VIMEO_METADATA_CACHE_TTL_SECONDS=int(os.getenv("VIMEO_METADATA_CACHE_TTL_SECONDS", "900")),
+        VIMEO_METADATA_BATCH_SIZE=int(os.getenv("VIMEO_METADATA_BATCH_SIZE", "100")),
+        VIMEO_METADATA_MAX_IDS=int(os.getenv("VIMEO_METADATA_MAX_IDS", "100")),
+        VIMEO_METADATA_REFRESH_SECONDS=int(os.getenv("VIMEO_METADATA_REFRESH_SECONDS", "900")),
+        VIMEO_THUMBNAIL_WIDTH=int(os.getenv("VIMEO_THUMBNAIL_WIDTH", "640")),
+        VIMEO_API_ROOT=os.getenv("VIMEO_API_ROOT", "https://api.vimeo.com"),
+        VIMEO_RATE_LIMIT_PER_SECOND=float(os.getenv("VIMEO_RATE_LIMIT_PER_SECOND", "2")),
+        VIMEO_RATE_LIMIT_BURST=int(os.getenv("VIMEO_RATE_LIMIT_BURST", "20")),
+        VIMEO_RATE_LIMIT_BATCH_RESERVE=int(os.getenv("VIMEO_RATE_LIMIT_BATCH_RESERVE", "25")),
+        VIMEO_RATE_LIMIT_MAX_WAIT_SECONDS=float(os.getenv("VIMEO_RATE_LIMIT_MAX_WAIT_SECONDS", "10")),
+        VIMEO_RATE_LIMIT_BACKOFF_SECONDS=float(os.getenv("VIMEO_RATE_LIMIT_BACKOFF_SECONDS", "60")),
+        SUPABASE_POOL_SIZE=int(os.getenv("SUPABASE_POOL_SIZE", "20")),
+        SUPABASE_TIMEOUT_SECONDS=float(os.getenv("SUPABASE_TIMEOUT_SECONDS", "10")),
+        SUPABASE_READY_TIMEOUT_SECONDS=float(os.getenv("SUPABASE_READY_TIMEOUT_SECONDS", "2")),
+        SUPABASE_READY_CACHE_SECONDS=float(os.getenv("SUPABASE_READY_CACHE_SECONDS", "5")),
+        SUPABASE_BULK_CHUNK_SIZE=int(os.getenv("SUPABASE_BULK_CHUNK_SIZE", "500")),
+        SUPABASE_BULK_MAX_ITEMS=int(os.getenv("SUPABASE_BULK_MAX_ITEMS", "10000")),
+        SUPABASE_PAGE_SIZE=int(os.getenv("SUPABASE_PAGE_SIZE", "100")),
+        SUPABASE_MAX_PAGE_SIZE=int(os.getenv("SUPABASE_MAX_PAGE_SIZE", "1000")),
+        SUPABASE_STREAM_PAGE_SIZE=int(os.getenv("SUPABASE_STREAM_PAGE_SIZE", "1000")),
+        LESSON_CACHE_MAXSIZE=int(os.getenv("LESSON_CACHE_MAXSIZE", "512")),
+        LESSON_CACHE_TTL_SECONDS=float(os.getenv("LESSON_CACHE_TTL_SECONDS", "60")),
+        CREATOR_ACCOUNT_CACHE_MAXSIZE=int(os.getenv("CREATOR_ACCOUNT_CACHE_MAXSIZE", "1024")),
+        CREATOR_ACCOUNT_CACHE_TTL_SECONDS=float(os.getenv("CREATOR_ACCOUNT_CACHE_TTL_SECONDS", "30"))
     )
@@ -0,0 +1,165 @@
+"""
+Prometheus metrics for requests and external dependencies.
+
+``MetricsMiddleware`` records, per method and route template:
+
+- ``http_requests_total`` by response status
+- ``http_request_duration_seconds``, measured until the last body chunk is sent
+- ``http_requests_in_progress``
+
+Calls to Supabase, Stripe and Vimeo are timed with ``track_dependency`` into
+``dependency_request_duration_seconds`` and
+``dependency_request_errors_total``. Together these show which dependency
+accounts for a slow route.
+
+Metrics live in the default ``prometheus_client`` registry. ``metrics_endpoint``
+serves them in the text exposition format.
+"""
+
+import re
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+from urllib.parse import urlsplit
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Match
+
+# Default client buckets plus longer ones for uploads and NDJSON exports
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0, 30.0, 60.0)
+
+# Label for requests no route matches, so unknown paths cannot grow the label set
+UNMATCHED_ROUTE = 'unmatched'
+
+# Methods labelled as sent; any other method is labelled ``OTHER_METHOD`` for the same reason
+HTTP_METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'CONNECT', 'TRACE'})
+OTHER_METHOD = 'other'
+
+HTTP_REQUESTS = Counter(
+    'http_requests_total',
+    'HTTP requests handled, by route template and status code',
+    ['method', 'route', 'status']
+)
+HTTP_REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds',
+    'Time from receiving a request to sending the last byte of its response',
+    ['method', 'route'],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    'http_requests_in_progress',
+    'HTTP requests currently being handled',
+    ['method', 'route']
+)
+DEPENDENCY_DURATION = Histogram(
+    'dependency_request_duration_seconds',
+    'Duration of calls to external dependencies',
+    ['dependency', 'operation'],
+    buckets=LATENCY_BUCKETS
+)
+DEPENDENCY_ERRORS = Counter(
+    'dependency_request_errors_total',
+    'Calls to external dependencies that raised or returned a 5xx status',
+    ['dependency', 'operation']
+)
+
+_ID_SEGMENT = re.compile(r'\d')
+_VERSION_SEGMENT = re.compile(r'^v\d+$')
+
+def dependency_operation(method: str, url: str) -> str:
+    """
+    Builds a low-cardinality operation label from an HTTP call.
+
+    Path segments containing digits (Vimeo video IDs, Stripe object IDs) are
+    replaced with ``{id}``; API version segments such as ``v1`` are kept.
+
+    Example:
+        >>> dependency_operation('get', 'https://api.stripe.com/v1/accounts/acct_1Abc?expand=x')
+        'GET /v1/accounts/{id}'
+    """
+    segments = [
+        '{id}' if _ID_SEGMENT.search(segment) and not _VERSION_SEGMENT.match(segment) else segment
+        for segment in urlsplit(url).path.split('/')
+    ]
+    return f"{method.upper()} {'/'.join(segments)}"
+
+@contextmanager
+def track_dependency(dependency: str, operation: str) -> Iterator[Dict[str, Any]]:
+    """
+    Times one call to an external dependency.
+
+    The call counts as an error if it raises, or if the caller sets
+    ``call['error'] = True`` on the yielded dict (e.g. for a 5xx response).
+
+    Args:
+        dependency (str): ``supabase``, ``stripe`` or ``vimeo``.
+        operation (str): What was called, e.g. from ``dependency_operation``.
+    """
+    call = {'error': False}
+    start = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        call['error'] = True
+        raise
+    finally:
+        DEPENDENCY_DURATION.labels(dependency, operation).observe(time.perf_counter() - start)
+        if call['error']:
+            DEPENDENCY_ERRORS.labels(dependency, operation).inc()
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request counts, latency and concurrency per route.
+
+    Requests are labelled with the matched route's path template (for example
+    ``/api/v1/lessons/{lesson_id}``) rather than the raw path, and with their
+    method if it is a standard HTTP method, else ``other``.
+
+    Attributes:
+        router: The application router whose routes are matched.
+    """
+
+    def __init__(self, app, router):
+        self.app = app
+        self.router = router
+
+    def _route(self, scope) -> str:
+        partial = None
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, 'path', UNMATCHED_ROUTE)
+            if match == Match.PARTIAL and partial is None:
+                partial = getattr(route, 'path', UNMATCHED_ROUTE)
+        return partial or UNMATCHED_ROUTE
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        method = scope['method'] if scope['method'] in HTTP_METHODS else OTHER_METHOD
+        route = self._route(scope)
+        status = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_DURATION.labels(method, route).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+            in_progress.dec()
+
+async def metrics_endpoint(request: Request) -> Response:
+    """Serves every registered metric in the Prometheus text format."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
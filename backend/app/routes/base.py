@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.supabase.auth import (
     register_user_with_email,
@@ -6,20 +6,30 @@ from app.supabase.auth import (
     initiate_password_reset,
     sign_in_with_google,
 )
-from app.supabase.client import get_supabase_client
+from app.supabase.health import supabase_readiness
+from app.supabase.tokens import verify_access_token
 
 router = APIRouter(prefix="")
 security = HTTPBearer()
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Verify JWT token and return current user."""
-    supabase = get_supabase_client()
+    """Verify JWT token locally and return the current user's claims."""
     try:
-        user = supabase.auth.get_user(credentials.credentials)
-        return user
+        return await verify_access_token(credentials.credentials)
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+async def require_admin(user = Depends(get_current_user)):
+    """
+    Return the current user's claims if they are an admin.
+
+    Admins carry ``role: admin`` in ``app_metadata``, which only the service
+    role can set; ``user_metadata`` is user-editable and never trusted here.
+    """
+    if (user.get('app_metadata') or {}).get('role') != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return user
+
 @router.get("/")
 async def read_root():
     """Root endpoint that returns a welcome message."""
@@ -62,6 +72,15 @@ async def protected_route(user = Depends(get_current_user)):
 async def health_check():
     return {"status": "ok"}
 
+@router.get("/ready")
+async def readiness_check(response: Response):
+    """Reports whether this instance can reach its dependencies; 503 until it can."""
+    supabase_check = await supabase_readiness.status()
+    ready = supabase_check['status'] == 'ok'
+    if not ready:
+        response.status_code = 503
+    return {"status": "ready" if ready else "not_ready", "checks": {"supabase": supabase_check}}
+
 @router.get("/test/supabase")
 async def test_supabase():
     try:
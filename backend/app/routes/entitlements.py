@@ -0,0 +1,26 @@
+from typing import Any, Dict
+from fastapi import APIRouter, Depends, HTTPException
+from app.routes.base import get_current_user
+from app.supabase import entitlements
+
+router = APIRouter(tags=["entitlements"])
+
+@router.get("/entitlements", summary="List purchased lessons", description="Returns the IDs of every lesson the current user has purchased")
+async def list_entitlements(user: Dict[str, Any] = Depends(get_current_user)) -> Dict[str, Any]:
+    try:
+        lesson_ids = await entitlements.get_purchased_lessons(user['sub'])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"user_id": user['sub'], "lesson_ids": sorted(lesson_ids)}
+
+@router.get("/entitlements/lessons/{lesson_id}", summary="Check lesson access", description="Returns whether the current user has purchased the lesson")
+async def check_lesson_entitlement(lesson_id: str, user: Dict[str, Any] = Depends(get_current_user)) -> Dict[str, Any]:
+    try:
+        has_access = await entitlements.has_purchased(user['sub'], lesson_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"lesson_id": lesson_id, "has_access": has_access}
+
+@router.get("/entitlements/cache/stats", summary="Get entitlement cache stats", description="Returns hit/miss counters and sizing for the entitlement cache")
+async def get_entitlement_cache_stats() -> Dict[str, Any]:
+    return entitlements.entitlement_cache.stats()
@@ -1,57 +1,105 @@
+import logging
 from typing import List, Optional, Dict, Any
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query, Body
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, Request, Response
 from app.core.config import get_settings
-from app.supabase.client import get_supabase_client
-from app.supabase.models import Lesson, LessonCreate, LessonUpdate, Category
-from supabase import Client
+from app.core.cache import TTLCache
+from app.routes.base import require_admin
+from app.stripe.payments import invalidate_creator_accounts
+from app.supabase import lesson_import, queries
+from app.supabase.models import Lesson, LessonCreate, LessonUpdate, LessonSummary, Category
+from postgrest.exceptions import APIError
 
 router = APIRouter(tags=["lessons"])
 
-def get_db() -> Client:
-    return get_supabase_client()
+logger = logging.getLogger(__name__)
 
-@router.get("/lessons", response_model=List[Lesson], summary="Get all lessons", description="Returns paginated list of lessons with filtering and sorting options")
+# Catalog pages change a few times a day, so listings are served from a bounded
+# TTL/LRU cache. Any lesson write clears it because a created, repriced or
+# deleted lesson can shift every page of every sort order.
+_settings = get_settings()
+lesson_list_cache = TTLCache(
+    maxsize=_settings.LESSON_CACHE_MAXSIZE,
+    ttl=_settings.LESSON_CACHE_TTL_SECONDS
+)
+
+def invalidate_lesson_listings() -> None:
+    """Drops cached lesson listings so writes are visible immediately."""
+    lesson_list_cache.invalidate()
+
+@router.get("/lessons", response_model=List[LessonSummary], summary="Get all lessons", description="Returns paginated list of lessons with filtering and sorting options. When more rows may follow, the X-Next-Cursor response header carries an opaque cursor for the next page.")
 async def list_lessons(
+    response: Response,
     search: Optional[str] = Query(None),
     sort: str = Query('newest'),
     limit: int = Query(10),
     offset: int = Query(0),
     category: Optional[str] = Query(None),
-    db: Client = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; takes precedence over offset"),
+    search_mode: str = Query('substring', description="'substring' matches title/description text; 'ranked' runs a full-text search ordered by relevance")
 ):
-    query = db.table('lessons').select('*')
-    
-    if search:
-        query = query.or_(f'title.ilike.*{search}*', f'description.ilike.*{search}*')
-    
-    if sort == 'newest':
-        query = query.order('created_at', desc=True)
-    elif sort == 'oldest':
-        query = query.order('created_at', desc=False)
-    elif sort == 'price-low':
-        query = query.order('price', desc=False)
-    elif sort == 'price-high':
-        query = query.order('price', desc=True)
-    
-    if category:
-        query = query.join('lesson_category', 'lessons.id', '=', 'lesson_category.lesson_id') \
-                      .join('categories', 'lesson_category.category_id', '=', 'categories.id') \
-                      .filter('categories.name', 'eq', category) \
-                      .select('*')
-    
-    lessons = query.limit(limit).offset(offset).execute()
-    return [Lesson(**lesson) for lesson in lessons.data]
-
-@router.get("/lessons/featured", response_model=List[Lesson], summary="Get featured lessons", description="Returns list of featured lessons")
-async def list_featured_lessons(db: Client = Depends(get_db)):
-    lessons = db.table('lessons').select('*').filter('is_featured', 'eq', True).execute()
-    return [Lesson(**lesson) for lesson in lessons.data]
-
-@router.get("/lessons/created", response_model=List[Lesson])
-async def list_user_created_lessons(user_id: str, db: Client = Depends(get_db)):
-    lessons = db.table('lessons').select('*').filter('creator_id', 'eq', user_id).execute()
-    return [Lesson(**lesson) for lesson in lessons.data]
+    if search_mode not in ('substring', 'ranked'):
+        raise HTTPException(status_code=400, detail=f"Unknown search_mode '{search_mode}'")
+
+    if search and search_mode == 'ranked':
+        if cursor or category:
+            raise HTTPException(status_code=400, detail="Ranked search supports offset pagination only and no category filter")
+        cache_key = ('ranked', search, limit, offset)
+        lessons = lesson_list_cache.get(cache_key)
+        if lessons is None:
+            generation = lesson_list_cache.generation
+            lessons = await queries.search_lessons_ranked(
+                search,
+                limit=limit,
+                offset=offset,
+                columns=queries.LESSON_SUMMARY_COLUMNS
+            )
+            lesson_list_cache.set(cache_key, lessons, generation=generation)
+        return [LessonSummary(**lesson) for lesson in lessons]
+
+    keyset = None
+    if cursor:
+        if sort not in queries.LESSON_SORTS:
+            raise HTTPException(status_code=400, detail=f"Cursor pagination is not supported for sort '{sort}'")
+        try:
+            keyset = queries.decode_lesson_cursor(cursor, sort)
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=str(error))
+
+    cache_key = (search, sort, category, limit, offset, cursor)
+    lessons = lesson_list_cache.get(cache_key)
+    if lessons is None:
+        # A write that lands while this page is fetched may not be in it; skip caching then
+        generation = lesson_list_cache.generation
+        lessons = await queries.fetch_lessons(
+            search=search,
+            sort=sort,
+            category=category,
+            limit=limit,
+            offset=offset,
+            cursor=keyset,
+            columns=queries.LESSON_SUMMARY_COLUMNS
+        )
+        lesson_list_cache.set(cache_key, lessons, generation=generation)
+
+    # A full page means more rows may follow; point the client past the last one
+    if sort in queries.LESSON_SORTS and lessons and len(lessons) >= limit:
+        response.headers["X-Next-Cursor"] = queries.encode_lesson_cursor(lessons[-1], sort)
+    return [LessonSummary(**lesson) for lesson in lessons]
+
+@router.get("/lessons/cache/stats", summary="Get lesson listing cache stats", description="Returns hit/miss counters and sizing for the lesson listing cache")
+async def get_lesson_cache_stats() -> Dict[str, Any]:
+    return lesson_list_cache.stats()
+
+@router.get("/lessons/featured", response_model=List[LessonSummary], summary="Get featured lessons", description="Returns list of featured lessons")
+async def list_featured_lessons():
+    lessons = await queries.fetch_featured_lessons(columns=queries.LESSON_SUMMARY_COLUMNS)
+    return [LessonSummary(**lesson) for lesson in lessons]
+
+@router.get("/lessons/created", response_model=List[LessonSummary])
+async def list_user_created_lessons(user_id: str):
+    lessons = await queries.fetch_lessons_by_creator(user_id, columns=queries.LESSON_SUMMARY_COLUMNS)
+    return [LessonSummary(**lesson) for lesson in lessons]
 
 from uuid import UUID
 from datetime import datetime
@@ -59,7 +107,6 @@ from datetime import datetime
 @router.post("/lessons", response_model=Lesson, status_code=201)
 async def create_lesson(lesson_data: LessonCreate = Body(...)) -> Dict[str, Any]:
     """Create a new lesson."""
-    db = get_supabase_client()
     try:
         # Convert to dict and add timestamps
         data = lesson_data.dict()
@@ -70,62 +117,87 @@ async def create_lesson(lesson_data: LessonCreate = Body(...)) -> Dict[str, Any]
         if 'metadata' in data:
             data['metadata'] = {str(k): str(v) for k, v in data['metadata'].items()}
         
-        # Debug logging
-        print("Creating lesson with data:")
-        for key, value in data.items():
-            print(f"  {key}: {value}")
-        
+        logger.debug("Creating lesson with data: %s", data)
+
         # Insert into database
-        response = db.table('lessons').insert(data).execute()
-        
-        # Debug response
-        print("Supabase response:")
-        print(f"  Data: {response.data if hasattr(response, 'data') else 'No data'}")
-        print(f"  Error: {response.error if hasattr(response, 'error') else 'No error'}")
-        
-        if response.error:
-            print(f"Supabase error details: {response.error}")
+        try:
+            inserted = await queries.insert_lesson(data)
+        except APIError as error:
+            logger.warning("Supabase rejected lesson insert: %s", error)
             raise HTTPException(
                 status_code=400,
-                detail=f"Failed to create lesson: {response.error.message if hasattr(response.error, 'message') else str(response.error)}"
+                detail=f"Failed to create lesson: {error.message or str(error)}"
             )
-            
-        if not response.data:
+        
+        logger.debug("Inserted lesson rows: %s", inserted)
+
+        if not inserted:
             raise HTTPException(
                 status_code=500,
                 detail="No data returned from database after insert"
             )
             
-        return response.data[0]
+        invalidate_lesson_listings()
+        return inserted[0]
         
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        print(f"Exception creating lesson:")
-        print(f"  Error: {str(e)}")
-        print(f"  Traceback: {traceback.format_exc()}")
+        logger.exception("Error creating lesson")
         raise HTTPException(
             status_code=500,
             detail=f"Error creating lesson: {str(e)}"
         )
 
+@router.post("/lessons/import", summary="Bulk import lessons", description="Streams a JSONL or CSV request body of lessons, validating each record and inserting valid lessons in chunks. Invalid records are reported by line number and skipped. Requires an admin token.")
+async def import_lessons(
+    request: Request,
+    format: str = Query('jsonl'),
+    creator_id: Optional[str] = Query(None),
+    create_stripe_products: bool = Query(True),
+    dry_run: bool = Query(False),
+    admin: Dict[str, Any] = Depends(require_admin)
+) -> Dict[str, Any]:
+    if format not in lesson_import.LESSON_IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(lesson_import.LESSON_IMPORT_FORMATS)}")
+
+    records = lesson_import.iter_lesson_records(lesson_import.iter_lines(request.stream()), format)
+    try:
+        summary = await lesson_import.import_lessons(
+            records,
+            default_creator_id=creator_id,
+            create_stripe_products=create_stripe_products,
+            dry_run=dry_run
+        )
+    except APIError as error:
+        raise HTTPException(status_code=400, detail=f"Failed to import lessons: {error.message or str(error)}")
+    finally:
+        # Earlier chunks may be committed even if a later one failed
+        if not dry_run:
+            invalidate_lesson_listings()
+            invalidate_creator_accounts()
+    return summary
+
 @router.patch("/lessons/{id}", response_model=Lesson)
-async def update_lesson(id: str, lesson_update: LessonUpdate, db: Client = Depends(get_db)):
-    updated_lesson = db.table('lessons').update(lesson_update.dict(exclude_unset=True)).eq('id', id).execute()
-    if not updated_lesson.data:
+async def update_lesson(id: str, lesson_update: LessonUpdate):
+    updated_lesson = await queries.update_lesson(id, lesson_update.dict(exclude_unset=True))
+    if not updated_lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
-    return Lesson(**updated_lesson.data[0])
+    invalidate_lesson_listings()
+    invalidate_creator_accounts()
+    return Lesson(**updated_lesson[0])
 
 @router.delete("/lessons/{id}", response_model=None)
-async def delete_lesson(id: str, db: Client = Depends(get_db)):
-    deleted_lesson = db.table('lessons').update({'deleted_at': datetime.utcnow()}).eq('id', id).execute()
-    if not deleted_lesson.data:
+async def delete_lesson(id: str):
+    deleted_lesson = await queries.soft_delete_lesson(id)
+    if not deleted_lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
+    invalidate_lesson_listings()
+    invalidate_creator_accounts()
 
 @router.get("/lessons/{id}", response_model=Lesson)
-async def get_lesson(id: str, db: Client = Depends(get_db)):
-    lesson = db.table('lessons').select('*').eq('id', id).execute()
-    if not lesson.data:
+async def get_lesson(id: str):
+    lesson = await queries.fetch_lesson(id)
+    if not lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
-    return Lesson(**lesson.data[0])
+    return Lesson(**lesson)
@@ -11,22 +11,32 @@ providing a standardized interface for common Supabase operations.
 All routes follow RESTful conventions and return consistent JSON responses.
 Error handling is implemented to provide meaningful error messages to clients.
 """
-from fastapi import APIRouter, HTTPException, Body
-from typing import Dict, Any, List
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, Body, Depends, Query, Response
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
 
 from app.supabase.auth import (
     register_user_with_email as sign_up_with_email,
     authenticate_user_with_email as sign_in_with_email,
     initiate_password_reset as send_password_reset_email
 )
-from app.supabase.client import get_supabase_client, supabase
 from app.supabase.api import (
     create_record as create_db_record,
-    read_records as read_db_records,
     update_record as update_db_record,
-    delete_record as delete_db_record
+    delete_record as delete_db_record,
+    bulk_create_records,
+    bulk_update_records,
+    bulk_delete_records,
+    BulkResponse
 )
-from app.supabase.migrations import apply_migration
+from app.supabase.client import get_supabase_client
+from app.supabase.migrations import apply_migration, migrate
+from app.supabase import filters as record_filters, queries
+from app.core.config import get_settings
+from app.routes.base import require_admin
+from app.stripe.payments import invalidate_creator_accounts
 
 # Initialize FastAPI router for Supabase-related endpoints
 router = APIRouter(
@@ -94,13 +104,47 @@ async def apply_database_migration(section: str = Body(..., embed=True)) -> Dict
         {'status': 'migration applied successfully'}
     """
     try:
-        apply_migration(section)
-        return {"status": "migration applied successfully"}
+        result = apply_migration(section)
     except Exception as error:
         raise HTTPException(
             status_code=500,
             detail=f"Migration failed for section {section}: {str(error)}"
         )
+    if result['status'] != 'success':
+        raise HTTPException(
+            status_code=500,
+            detail=f"Migration failed for section {section}: {result['message']}"
+        )
+    if not result['data'][0].get('applied', True):
+        return {"status": "migration already applied"}
+    return {"status": "migration applied successfully"}
+
+@router.post("/migrations/run")
+async def run_database_migrations(
+    target: Optional[str] = Body(None, embed=True),
+    dry_run: bool = Body(False, embed=True)
+) -> Dict[str, Any]:
+    """Apply every pending migration in order, or preview them.
+
+    Each migration is sent as one transactional call and recorded in
+    ``schema_migrations``; versions already applied are skipped.
+
+    Args:
+        target (str, optional): Stop after this migration version.
+        dry_run (bool): Return the plan without applying anything.
+
+    Returns:
+        Dict[str, Any]: The plan with each version's status and the versions applied.
+
+    Raises:
+        HTTPException: 400 for an unknown target, 500 if a migration fails.
+    """
+    try:
+        return await asyncio.to_thread(migrate, target=target, dry_run=dry_run)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    except Exception as error:
+        raise HTTPException(status_code=500, detail=str(error))
 
 @router.post("/auth/register")
 async def register_user(email: str = Body(..., embed=True), password: str = Body(..., embed=True)) -> Dict[str, Any]:
@@ -209,6 +253,7 @@ async def create_record_endpoint(
             raise HTTPException(status_code=400, detail="Invalid data format")
             
         response = create_db_record(table, data)
+        invalidate_creator_accounts(table)
         return {
             "status": "success",
             "data": response
@@ -218,20 +263,104 @@ async def create_record_endpoint(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/read_records")
-async def read_records_endpoint(table: str):
-    """Endpoint to read records from the database."""
+async def _ndjson_chunks(table: str, page_size: int, **options: Any) -> AsyncIterator[str]:
+    """Yields matching rows of ``table`` as NDJSON, one chunk per PostgREST page."""
+    lines = []
+    async for row in queries.iter_table_rows(table, page_size, **options):
+        lines.append(json.dumps(row, default=str))
+        if len(lines) >= page_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+async def _stream_table(table: str, **options: Any) -> StreamingResponse:
+    """
+    Streams every matching row of ``table`` as NDJSON in constant memory.
+
+    The first page is fetched before the response starts so that a failing
+    query still surfaces as an HTTP error rather than a truncated stream.
+    """
+    chunks = _ndjson_chunks(table, get_settings().SUPABASE_STREAM_PAGE_SIZE, **options)
     try:
-        response = read_db_records(table)
-        return response
+        first = await anext(chunks, None)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    async def body() -> AsyncIterator[str]:
+        if first is not None:
+            yield first
+        async for chunk in chunks:
+            yield chunk
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+async def _read_page(
+    response: Response,
+    table: str,
+    limit: Optional[int],
+    cursor: Optional[str],
+    format: str,
+    columns: Optional[str] = None,
+    filters: Optional[List[str]] = None,
+    order: Optional[str] = None
+) -> Union[List[Dict[str, Any]], StreamingResponse]:
+    """Returns one page of ``table``, or every matching row as an NDJSON stream."""
+    if format not in ('json', 'ndjson'):
+        raise HTTPException(status_code=400, detail=f"Unknown format '{format}'")
+    try:
+        options = {
+            'columns': record_filters.parse_columns(table, columns),
+            'filters': [record_filters.parse_filter(table, expression) for expression in filters or []],
+            'order': record_filters.parse_order(table, order),
+        }
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+    if format == 'ndjson':
+        if limit is not None or cursor:
+            raise HTTPException(status_code=400, detail="Streaming returns every row and takes no limit or cursor")
+        return await _stream_table(table, **options)
+
+    settings = get_settings()
+    limit = limit or settings.SUPABASE_PAGE_SIZE
+    if limit > settings.SUPABASE_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit may not exceed {settings.SUPABASE_MAX_PAGE_SIZE}")
+    offset = 0
+    if cursor:
+        try:
+            offset = queries.decode_page_cursor(cursor, table)
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=str(error))
+
+    try:
+        rows = await queries.fetch_table_page(table, offset=offset, limit=limit, **options)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    # A full page means more rows may follow; point the client at the next one
+    if len(rows) >= limit:
+        response.headers["X-Next-Cursor"] = queries.encode_page_cursor(table, offset + limit)
+    return rows
+
+@router.get("/read_records")
+async def read_records_endpoint(
+    response: Response,
+    table: str,
+    columns: Optional[str] = Query(None, description="Comma-separated columns to return, e.g. id,title,price"),
+    filters: List[str] = Query([], alias="filter", description="Repeatable column.operator.value filter, e.g. price.gte.10, status.in.draft,published, title.ilike.*kendama*"),
+    order: Optional[str] = Query(None, description="Sort such as created_at.desc,title"),
+    limit: Optional[int] = Query(None, ge=1, description="Rows per page; defaults to SUPABASE_PAGE_SIZE"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; only valid with the same columns, filters and order"),
+    format: str = Query('json', description="'json' returns one page; 'ndjson' streams every matching row")
+):
+    """Endpoint to read selected columns of matching records, one page at a time or as an NDJSON stream."""
+    return await _read_page(response, table, limit, cursor, format, columns=columns, filters=filters, order=order)
+
 @router.put("/update_record")
 async def update_record_endpoint(table: str = Body(...), record_id: int = Body(...), data: dict = Body(...)):
     """Endpoint to update a record in the database."""
     try:
         response = update_db_record(table, record_id, data)
+        invalidate_creator_accounts(table)
         return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -241,34 +370,93 @@ async def delete_record_endpoint(table: str = Body(...), record_id: int = Body(.
     """Endpoint to delete a record from the database."""
     try:
         response = delete_db_record(table, record_id)
+        invalidate_creator_accounts(table)
         return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Tables the admin batch endpoints may write; ledgers and bookkeeping tables
+# (purchases, stripe_events, schema_migrations) are only written by their own code paths
+BATCH_WRITABLE_TABLES = frozenset({'categories', 'lessons', 'lesson_category', 'profiles', 'reviews'})
+
+def _validate_batch(table: str, items: List[Any]) -> None:
+    """Rejects batch requests for unlisted tables, without items or over the size limit."""
+    if not table or not isinstance(table, str):
+        raise HTTPException(status_code=400, detail="Invalid table name")
+    if table not in BATCH_WRITABLE_TABLES:
+        raise HTTPException(status_code=400, detail=f"Table '{table}' cannot be written in batches")
+    if not items:
+        raise HTTPException(status_code=400, detail="Batch must contain at least one item")
+    max_items = get_settings().SUPABASE_BULK_MAX_ITEMS
+    if len(items) > max_items:
+        raise HTTPException(status_code=400, detail=f"Batch exceeds the limit of {max_items} items")
+
+async def _write_batch(table: str, operation, *args, **kwargs) -> BulkResponse:
+    """Runs a bulk write off the event loop, then drops caches derived from ``table``."""
+    try:
+        return await asyncio.to_thread(operation, table, *args, **kwargs)
+    finally:
+        # Chunks written before a failure are committed
+        invalidate_creator_accounts(table)
+
+@router.post("/batch/create_records", response_model=BulkResponse)
+async def batch_create_records_endpoint(
+    table: str = Body(...),
+    records: List[Dict[str, Any]] = Body(...),
+    upsert: bool = Body(False),
+    on_conflict: str = Body('id'),
+    admin: Dict[str, Any] = Depends(require_admin)
+) -> BulkResponse:
+    """Insert or upsert many records in chunked requests, reporting a result per record. Admin only."""
+    _validate_batch(table, records)
+    return await _write_batch(table, bulk_create_records, records, upsert=upsert, on_conflict=on_conflict)
+
+@router.put("/batch/update_records", response_model=BulkResponse)
+async def batch_update_records_endpoint(
+    table: str = Body(...),
+    record_ids: List[Union[int, str]] = Body(...),
+    data: Dict[str, Any] = Body(...),
+    admin: Dict[str, Any] = Depends(require_admin)
+) -> BulkResponse:
+    """Apply one update to many records by ID, reporting a result per ID. Admin only."""
+    _validate_batch(table, record_ids)
+    if not data:
+        raise HTTPException(status_code=400, detail="Invalid data format")
+    return await _write_batch(table, bulk_update_records, record_ids, data)
+
+@router.delete("/batch/delete_records", response_model=BulkResponse)
+async def batch_delete_records_endpoint(
+    table: str = Body(...),
+    record_ids: List[Union[int, str]] = Body(...),
+    admin: Dict[str, Any] = Depends(require_admin)
+) -> BulkResponse:
+    """Delete many records by ID, reporting a result per ID. Admin only."""
+    _validate_batch(table, record_ids)
+    return await _write_batch(table, bulk_delete_records, record_ids)
+
 @router.get("/user/profile")
 async def get_user_profile(user_id: str) -> Dict[str, Any]:
     """Get user profile data."""
     try:
-        client = get_supabase_client()
-        response = client.from_("profiles").select("*").eq("id", user_id).single().execute()
-        if response.get('error'):
+        profile = await queries.fetch_profile(user_id)
+        if not profile:
             raise HTTPException(status_code=404, detail="Profile not found")
-        return response.get('data', {})
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.get("/profiles", response_model=List[Dict])
-async def get_all_profiles():
-    """Get all profiles from the database."""
-    try:
-        client = get_supabase_client()
-        response = client.from_("profiles").select("*").execute()
-        return response.data or []
+        return profile
     except HTTPException as he:
         raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/profiles", response_model=List[Dict])
+async def get_all_profiles(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, description="Rows per page; defaults to SUPABASE_PAGE_SIZE"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
+    format: str = Query('json', description="'json' returns one page; 'ndjson' streams every profile")
+):
+    """Get profiles from the database, one page at a time or as an NDJSON stream."""
+    return await _read_page(response, queries.PROFILES_TABLE, limit, cursor, format)
+
 @router.put("/user/profile")
 async def update_user_profile(
     user_id: str,
@@ -276,10 +464,12 @@ async def update_user_profile(
 ) -> Dict[str, Any]:
     """Update user profile data."""
     try:
-        client = get_supabase_client()
-        response = client.from_("profiles").update(profile_data).eq("id", user_id).execute()
-        if response.get('error'):
+        updated = await queries.update_profile(user_id, profile_data)
+        if not updated:
             raise HTTPException(status_code=400, detail="Profile update failed")
-        return response.get('data', {})
+        invalidate_creator_accounts(queries.PROFILES_TABLE)
+        return updated[0]
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -5,10 +5,20 @@ This module provides FastAPI route handlers for Vimeo-related operations
 like video uploads and metadata management.
 """
 
-from fastapi import APIRouter, HTTPException, Body
-from typing import Dict, Optional
+import asyncio
+import os
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Body, Depends, Query
+from typing import Any, Dict, Optional
 
-from ..vimeo.upload import upload_video
+from .base import get_current_user
+from .lessons import invalidate_lesson_listings
+from ..core.config import get_settings
+from ..supabase import queries
+from ..vimeo.direct import create_direct_upload, get_uploaded_video
+from ..vimeo.jobs import upload_jobs
+from ..vimeo.metadata import VimeoMetadataError, get_videos_metadata, video_metadata_cache
+from ..vimeo.ratelimit import VimeoRateLimitError, rate_limited, vimeo_rate_limiter
 from ..vimeo.client import get_vimeo_client
 
 router = APIRouter(
@@ -16,46 +26,186 @@ router = APIRouter(
     tags=["vimeo"]
 )
 
-@router.post("/upload")
+@router.post("/upload", status_code=202)
 async def handle_video_upload(
     file_path: str = Body(...),
     title: str = Body(...),
     description: Optional[str] = Body(None),
-    privacy: Optional[Dict] = Body(None)
+    privacy: Optional[Dict] = Body(None),
+    lesson_id: Optional[str] = Body(None),
+    user: Dict[str, Any] = Depends(get_current_user)
 ) -> Dict:
     """
-    Handle video upload requests.
+    Queue a video upload and return its job without waiting for Vimeo.
     
     Args:
-        file_path: Path to video file
+        file_path: Path to video file, inside ``VIMEO_UPLOAD_DIR``
         title: Video title
         description: Optional video description
         privacy: Optional privacy settings
+        lesson_id: Optional lesson to link the uploaded video to; the caller must be its creator
+        user: Authenticated user
         
     Returns:
-        Dict containing upload result and video metadata
+        Dict containing the upload job; poll ``/jobs/{id}`` for progress
     """
-    try:
-        result = await upload_video(
-            file_path=file_path,
-            title=title,
-            description=description,
-            privacy=privacy
-        )
+    file_path = _resolve_upload_path(file_path)
+    if lesson_id:
+        await _get_owned_lesson(lesson_id, user)
+    
+    return upload_jobs.submit(
+        file_path=file_path,
+        title=title,
+        description=description,
+        privacy=privacy,
+        lesson_id=lesson_id,
+        user_id=user['sub']
+    )
+
+def _resolve_upload_path(file_path: str) -> str:
+    """Resolve a video path against the upload directory, refusing paths that leave it."""
+    upload_dir = os.path.realpath(get_settings().VIMEO_UPLOAD_DIR)
+    path = os.path.realpath(os.path.join(upload_dir, file_path))
+    if os.path.commonpath([upload_dir, path]) != upload_dir:
+        raise HTTPException(status_code=400, detail="Video file must be inside the upload directory")
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=400, detail="Video file not found")
+    return path
+
+@router.get("/jobs/{job_id}")
+async def get_upload_job(
+    job_id: str,
+    user: Dict[str, Any] = Depends(get_current_user)
+) -> Dict:
+    """
+    Get the status of an upload job.
+    
+    Args:
+        job_id: ID returned by the upload endpoint
+        user: Authenticated user; only the job's submitter can see it
         
-        if result['status'] == 'error':
-            raise HTTPException(
-                status_code=400,
-                detail=f"Upload failed: {result['message']}"
-            )
-            
-        return result
+    Returns:
+        Dict containing job status, byte progress and, once complete, the Vimeo video
+    """
+    job = upload_jobs.get(job_id)
+    # Other users' jobs are reported as missing so job IDs cannot be probed
+    if job is None or job.get('user_id') != user['sub']:
+        raise HTTPException(status_code=404, detail="Upload job not found")
+    return job
+
+async def _get_owned_lesson(lesson_id: str, user: Dict[str, Any]) -> Dict:
+    """Fetch a lesson and check the current user is its creator."""
+    lesson = await queries.fetch_lesson(lesson_id, columns='id,title,description,creator_id')
+    if not lesson:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    if lesson['creator_id'] != user['sub']:
+        raise HTTPException(status_code=403, detail="Only the lesson's creator can upload its video")
+    return lesson
+
+@router.post("/uploads", status_code=201)
+async def create_upload_ticket(
+    lesson_id: str = Body(...),
+    size: int = Body(..., gt=0),
+    title: Optional[str] = Body(None),
+    description: Optional[str] = Body(None),
+    privacy: Optional[Dict] = Body(None),
+    user: Dict[str, Any] = Depends(get_current_user)
+) -> Dict:
+    """
+    Create a tus upload ticket so the client can upload straight to Vimeo.
+    
+    Args:
+        lesson_id: Lesson the video is for
+        size: Exact size of the video file in bytes
+        title: Optional video title, defaults to the lesson title
+        description: Optional video description
+        privacy: Optional privacy settings
         
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Upload error: {str(e)}"
-        )
+    Returns:
+        Dict containing the Vimeo video ID and the tus ``upload_link``
+    """
+    lesson = await _get_owned_lesson(lesson_id, user)
+    ticket = await create_direct_upload(
+        size=size,
+        title=title or lesson['title'],
+        description=description if description is not None else lesson.get('description'),
+        privacy=privacy
+    )
+    return {"lesson_id": lesson_id, **ticket}
+
+@router.post("/uploads/{vimeo_id}/complete")
+async def complete_upload(
+    vimeo_id: str,
+    lesson_id: str = Body(..., embed=True),
+    user: Dict[str, Any] = Depends(get_current_user)
+) -> Dict:
+    """
+    Link a video uploaded directly to Vimeo to its lesson.
+    
+    Args:
+        vimeo_id: Vimeo video ID returned with the upload ticket
+        lesson_id: Lesson to link the video to
+        
+    Returns:
+        Dict containing the linked video and its transcode status
+    """
+    # The ID is interpolated into the Vimeo API path, so only plain numeric IDs are accepted
+    if not (vimeo_id.isascii() and vimeo_id.isdigit()):
+        raise HTTPException(status_code=400, detail="Invalid Vimeo video ID")
+    await _get_owned_lesson(lesson_id, user)
+    video = await get_uploaded_video(vimeo_id)
+    
+    updated = await queries.update_lesson(lesson_id, {
+        'vimeo_video_id': vimeo_id,
+        'vimeo_url': video.get('link'),
+        'updated_at': datetime.utcnow().isoformat()
+    })
+    if not updated:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    invalidate_lesson_listings()
+    
+    return {
+        "lesson_id": lesson_id,
+        "vimeo_id": vimeo_id,
+        "uri": video['uri'],
+        "url": video.get('link'),
+        "transcode_status": (video.get('transcode') or {}).get('status')
+    }
+
+@router.get("/videos/metadata")
+async def get_video_metadata(
+    ids: str = Query(..., description="Comma-separated Vimeo video IDs")
+) -> Dict:
+    """
+    Get duration, thumbnail and transcode status for one or more videos.
+    
+    Cached metadata is returned without calling Vimeo; misses are fetched
+    in batched ``/videos?uris=`` requests.
+    
+    Args:
+        ids: Comma-separated Vimeo video IDs, at most ``VIMEO_METADATA_MAX_IDS`` distinct ones
+        
+    Returns:
+        Dict mapping each found video ID to its metadata
+    """
+    vimeo_ids = list(dict.fromkeys(vimeo_id.strip() for vimeo_id in ids.split(',') if vimeo_id.strip()))
+    if not vimeo_ids:
+        raise HTTPException(status_code=400, detail="At least one video ID is required")
+    max_ids = get_settings().VIMEO_METADATA_MAX_IDS
+    if len(vimeo_ids) > max_ids:
+        raise HTTPException(status_code=422, detail=f"At most {max_ids} video IDs can be requested at once")
+    
+    try:
+        return await get_videos_metadata(vimeo_ids)
+    except VimeoRateLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except VimeoMetadataError as e:
+        raise HTTPException(status_code=502, detail=f"Vimeo API error: {str(e)}")
+
+@router.get("/videos/metadata/cache/stats")
+async def get_video_metadata_cache_stats() -> Dict:
+    """Returns hit/miss counters and sizing for the video metadata cache."""
+    return video_metadata_cache.stats()
 
 @router.get("/me")
 async def get_account_info() -> Dict:
@@ -66,12 +216,25 @@ async def get_account_info() -> Dict:
         Dict containing account information
     """
     try:
-        client = get_vimeo_client()
-        response = client.get('/me')
+        client = rate_limited(get_vimeo_client())
+        response = await asyncio.to_thread(client.get, '/me')
         return response.json()
         
+    except VimeoRateLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to get account info: {str(e)}"
         )
+
+@router.get("/rate-limit")
+async def get_rate_limit_stats() -> Dict:
+    """
+    Get the remaining Vimeo API budget and throttling counters.
+    
+    Returns:
+        Dict containing the quota last reported by Vimeo, local token bucket
+        state and the number of calls waiting per priority
+    """
+    return vimeo_rate_limiter.stats()
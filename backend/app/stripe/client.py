@@ -1,13 +1,59 @@
 import stripe
+import requests
+from requests.adapters import HTTPAdapter
 from app.core.config import get_settings
+from app.core.metrics import dependency_operation, track_dependency
 
 settings = get_settings()
 
+class InstrumentedRequestsClient(stripe.RequestsClient):
+    """``RequestsClient`` that times every Stripe API call, retries included, as a ``stripe`` dependency call."""
+
+    def request(self, method, url, headers, post_data=None):
+        with track_dependency('stripe', dependency_operation(method, url)) as call:
+            response = super().request(method, url, headers, post_data)
+            call['error'] = response[1] >= 500
+            return response
+
+    def request_stream(self, method, url, headers, post_data=None):
+        with track_dependency('stripe', dependency_operation(method, url)) as call:
+            response = super().request_stream(method, url, headers, post_data)
+            call['error'] = response[1] >= 500
+            return response
+
+def build_stripe_http_client(settings=settings) -> stripe.HTTPClient:
+    """
+    Build the pooled HTTP client used for every Stripe API call.
+
+    A single ``requests.Session`` is shared by all Stripe calls so TLS
+    connections to api.stripe.com are kept alive and reused instead of being
+    re-established per request. Retries are left to stripe-python
+    (``max_network_retries``) because it adds idempotency keys to retried POSTs.
+
+    Parameters:
+        settings (Settings): Application settings with the STRIPE_* pool values.
+
+    Returns:
+        stripe.HTTPClient: An instrumented ``RequestsClient`` bound to the pooled session.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=settings.STRIPE_POOL_SIZE,
+        max_retries=0
+    )
+    session.mount("https://", adapter)
+    return InstrumentedRequestsClient(
+        timeout=(settings.STRIPE_CONNECT_TIMEOUT_SECONDS, settings.STRIPE_READ_TIMEOUT_SECONDS),
+        session=session
+    )
+
 def get_stripe_client():
     """
     Initialize and return the Stripe client with the API key.
 
-    Sets up the Stripe client by assigning the secret API key from the configuration settings.
+    Sets up the Stripe client by assigning the secret API key from the configuration settings
+    and installing the shared pooled HTTP client on first use.
 
     Parameters:
         None
@@ -19,6 +65,9 @@ def get_stripe_client():
         None
     """
     stripe.api_key = settings.STRIPE_SECRET_KEY
+    stripe.max_network_retries = settings.STRIPE_MAX_NETWORK_RETRIES
+    if not isinstance(stripe.default_http_client, InstrumentedRequestsClient):
+        stripe.default_http_client = build_stripe_http_client()
     return stripe
 
 stripe = get_stripe_client()
@@ -9,6 +9,7 @@ from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from app.stripe.client import stripe
 import app.stripe.onboarding as onboarding
+from app.stripe.executor import run_stripe_call
 
 class DashboardSessionRequest(BaseModel):
     account: str
@@ -27,7 +28,8 @@ async def handle_dashboard_session_request(request: DashboardSessionRequest):
             raise HTTPException(status_code=400, detail="Invalid account ID")
             
         # Try to create session with the provided account
-        session = stripe.AccountSession.create(
+        session = await run_stripe_call(
+            stripe.AccountSession.create,
             account=request.account,
             components={
                 "payments": {
@@ -48,7 +50,8 @@ async def handle_dashboard_session_request(request: DashboardSessionRequest):
             if request.account != 'invalid_account_id':
                 try:
                     # Create new Stripe account directly since onboarding returns response
-                    account = stripe.Account.create(
+                    account = await run_stripe_call(
+                        stripe.Account.create,
                         type="express",
                         country="US",
                         email="test@example.com",
@@ -58,7 +61,8 @@ async def handle_dashboard_session_request(request: DashboardSessionRequest):
                         },
                     )
                     # Create session with the new account's ID
-                    session = stripe.AccountSession.create(
+                    session = await run_stripe_call(
+                        stripe.AccountSession.create,
                         account=account.id,
                         components={
                             "payments": {
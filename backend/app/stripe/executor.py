@@ -0,0 +1,131 @@
+"""
+Stripe Call Executor Module
+
+stripe-python is a blocking SDK, so calling it directly from an ``async def``
+route freezes the event loop for the whole Stripe round trip. This module runs
+those calls on a dedicated, bounded thread pool and tracks backpressure so a
+slow Stripe response only occupies a Stripe worker, never the event loop.
+
+Key Features:
+- Fixed number of worker threads (STRIPE_EXECUTOR_MAX_WORKERS)
+- Bounded wait queue (STRIPE_EXECUTOR_MAX_QUEUE); callers beyond it get a 503
+- Queue depth, in-flight, completed and rejected counters for monitoring
+"""
+
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, Dict, TypeVar
+
+from fastapi import APIRouter, HTTPException
+from app.core.config import get_settings
+
+T = TypeVar("T")
+
+router = APIRouter()
+
+class StripeExecutor:
+    """
+    Bounded thread pool for blocking Stripe SDK calls.
+
+    Attributes:
+        max_workers (int): Number of threads executing Stripe calls.
+        max_queue (int): Maximum calls waiting for a free worker.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stripe")
+        self._lock = Lock()
+        self._queued = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Runs ``func(*args, **kwargs)`` on a Stripe worker thread and awaits it.
+
+        Args:
+            func (Callable): The blocking Stripe SDK call.
+            *args: Positional arguments for ``func``.
+            **kwargs: Keyword arguments for ``func``.
+
+        Returns:
+            T: Whatever ``func`` returns; exceptions propagate unchanged.
+
+        Raises:
+            HTTPException: 503 if the wait queue is full.
+        """
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self._rejected += 1
+                raise HTTPException(status_code=503, detail="Payment service is busy, please retry")
+            self._queued += 1
+
+        call = functools.partial(self._track, func, *args, **kwargs)
+        context = contextvars.copy_context()
+        try:
+            future = self._executor.submit(context.run, call)
+        except RuntimeError:
+            with self._lock:
+                self._queued -= 1
+            raise
+        # Cancelling the awaiting task cancels a still-queued call, so _track never runs for it
+        future.add_done_callback(self._release_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def _release_cancelled(self, future) -> None:
+        """Frees the queue slot of a call cancelled before a worker picked it up."""
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    def _track(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Moves a call from queued to in-flight while it runs on a worker."""
+        with self._lock:
+            self._queued -= 1
+            self._in_flight += 1
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            with self._lock:
+                self._failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """Returns backpressure counters for monitoring."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self._queued,
+                "in_flight": self._in_flight,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+            }
+
+_settings = get_settings()
+stripe_executor = StripeExecutor(
+    max_workers=_settings.STRIPE_EXECUTOR_MAX_WORKERS,
+    max_queue=_settings.STRIPE_EXECUTOR_MAX_QUEUE
+)
+
+async def run_stripe_call(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Runs a blocking Stripe SDK call on the shared Stripe executor."""
+    return await stripe_executor.run(func, *args, **kwargs)
+
+@router.get("/executor/stats")
+async def get_stripe_executor_stats() -> Dict[str, int]:
+    """Returns queue depth and in-flight counts for the Stripe executor."""
+    return stripe_executor.stats()
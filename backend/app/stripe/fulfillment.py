@@ -0,0 +1,262 @@
+"""Purchase Fulfillment Module
+
+This module turns paid Stripe Checkout sessions into ``purchases`` rows. It is called from the
+webhook workers for both ``checkout.session.completed`` and ``payment_intent.succeeded``; the two
+events for one sale resolve to the same row because purchases are keyed on the Checkout session
+ID and their primary key is derived from it.
+
+Writes are coalesced: purchases fulfilled within PURCHASE_BATCH_DELAY_SECONDS of each other are
+written with one creator lookup and one bulk upsert, so a burst of sales costs a handful of
+database round trips instead of two per event.
+
+Key Features:
+- Idempotent upserts on ``stripe_session_id``
+- Batched lesson -> creator lookups and purchase writes
+- Platform fee and creator earnings recorded with each purchase
+- Payments below the amount quoted at checkout, or in another currency, are recorded as
+  ``failed`` with a rejection reason and grant no access
+- Entitlement cache updated as soon as a purchase is written
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+from uuid import NAMESPACE_URL, uuid5
+
+from app.core.config import get_settings
+from app.stripe.client import stripe
+from app.stripe.executor import run_stripe_call
+from app.stripe.payments import LESSON_CURRENCY, PLATFORM_FEE_PERCENTAGE, from_minor_units, to_minor_units
+from app.supabase import entitlements, queries
+
+logger = logging.getLogger(__name__)
+
+# Namespace for purchase IDs derived from Checkout session IDs
+PURCHASE_ID_NAMESPACE = uuid5(NAMESPACE_URL, 'https://stripe.com/checkout/session')
+
+
+class PurchaseBatcher:
+    """
+    Coalesces fulfilled purchases into bulk upserts.
+
+    Callers await ``add`` until the batch holding their purchase has been
+    written, so a failed write still fails (and retries) the webhook event.
+
+    Attributes:
+        max_batch (int): Purchases that trigger an immediate write.
+        max_delay (float): Seconds the first purchase in a batch waits for others.
+    """
+
+    def __init__(self, max_batch: int, max_delay: float):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._flushes: Set[asyncio.Task] = set()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def add(self, purchase: Dict[str, Any]) -> None:
+        """
+        Queues a purchase and waits until it has been written.
+
+        Args:
+            purchase (Dict[str, Any]): Output of ``_purchase_from_session``.
+
+        Raises:
+            LookupError: If the purchased lesson does not exist.
+            postgrest.exceptions.APIError: If the bulk write fails.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((purchase, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._schedule_flush(loop)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._schedule_flush, loop)
+        await future
+
+    def _schedule_flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = loop.create_task(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        # Later events for the same session replace earlier ones in the batch
+        by_session: Dict[str, Dict[str, Any]] = {}
+        for purchase, _ in batch:
+            by_session[purchase['stripe_session_id']] = purchase
+
+        try:
+            lesson_ids = sorted({purchase['lesson_id'] for purchase in by_session.values()})
+            lessons = await queries.fetch_lesson_creators(lesson_ids)
+            rows = [
+                _purchase_row(purchase, lessons[purchase['lesson_id']])
+                for purchase in by_session.values()
+                if purchase['lesson_id'] in lessons
+            ]
+            await queries.upsert_purchases(rows)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        logger.info("Fulfilled %d purchases in one write", len(rows))
+        for row in rows:
+            if row['status'] == 'completed':
+                entitlements.record_purchase(row['user_id'], row['lesson_id'])
+        for purchase, future in batch:
+            if future.done():
+                continue
+            if purchase['lesson_id'] in lessons:
+                future.set_result(None)
+            else:
+                future.set_exception(LookupError(f"Lesson {purchase['lesson_id']} not found"))
+
+
+def _quoted_price(purchase: Dict[str, Any], lesson: Dict[str, Any]) -> Tuple[str, int]:
+    """
+    Returns the currency and minor-unit amount the buyer was charged at checkout.
+
+    Checkout records both in the session metadata. Sessions created before it
+    did fall back to the lesson's current price.
+    """
+    metadata = purchase['metadata']
+    quoted = metadata.get('unit_amount')
+    if quoted is not None and metadata.get('currency'):
+        return metadata['currency'].lower(), int(quoted)
+    return LESSON_CURRENCY, to_minor_units(lesson['price'], LESSON_CURRENCY)
+
+
+def _rejection_reason(purchase: Dict[str, Any], lesson: Dict[str, Any]) -> Optional[str]:
+    """Returns why a payment does not cover its checkout quote, or None if it does."""
+    expected_currency, expected_amount = _quoted_price(purchase, lesson)
+    currency = (purchase.get('currency') or '').lower()
+    if currency != expected_currency:
+        return f"paid in {currency or 'unknown currency'}, checkout was quoted in {expected_currency}"
+    if purchase['amount'] < expected_amount:
+        return f"paid {purchase['amount']} below the checkout price of {expected_amount} {currency}"
+    return None
+
+
+def _purchase_row(purchase: Dict[str, Any], lesson: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Builds a ``purchases`` row from a pending purchase and its lesson's creator.
+
+    Underpaid or wrong-currency payments are kept for reconciliation as ``failed`` rows, which
+    grant no entitlement, so the event is still acknowledged and not retried.
+    """
+    currency = (purchase.get('currency') or LESSON_CURRENCY).lower()
+    amount = purchase['amount']
+    fee = purchase['platform_fee']
+    metadata = dict(purchase['metadata'])
+    reason = _rejection_reason(purchase, lesson)
+    if reason:
+        logger.warning("Rejecting purchase for session %s: %s", purchase['stripe_session_id'], reason)
+        metadata['rejected_reason'] = reason
+    return {
+        'id': str(uuid5(PURCHASE_ID_NAMESPACE, purchase['stripe_session_id'])),
+        'user_id': purchase['user_id'],
+        'lesson_id': purchase['lesson_id'],
+        'creator_id': lesson['creator_id'],
+        'stripe_session_id': purchase['stripe_session_id'],
+        'payment_intent_id': purchase['payment_intent_id'],
+        'amount': from_minor_units(amount, currency),
+        'platform_fee': from_minor_units(fee, currency),
+        'creator_earnings': from_minor_units(amount - fee, currency),
+        'fee_percentage': PLATFORM_FEE_PERCENTAGE,
+        'status': 'failed' if reason else 'completed',
+        'metadata': metadata,
+    }
+
+def _purchase_from_session(
+    session_id: str,
+    payment_intent_id: str,
+    amount: int,
+    currency: Optional[str],
+    metadata: Dict[str, Any],
+    application_fee: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """Collects the fields of a purchase, or None if the payment was not for a lesson."""
+    lesson_id = metadata.get('lesson_id')
+    user_id = metadata.get('user_id')
+    if not lesson_id or not user_id:
+        logger.warning("Skipping fulfillment for %s: missing lesson_id or user_id metadata", session_id)
+        return None
+
+    if application_fee is None:
+        application_fee = int(amount * PLATFORM_FEE_PERCENTAGE / 100)
+    return {
+        'stripe_session_id': session_id,
+        'payment_intent_id': payment_intent_id,
+        'lesson_id': lesson_id,
+        'user_id': user_id,
+        'amount': amount,
+        'currency': currency,
+        'platform_fee': application_fee,
+        'metadata': dict(metadata),
+    }
+
+
+_settings = get_settings()
+purchase_batcher = PurchaseBatcher(
+    max_batch=_settings.PURCHASE_BATCH_SIZE,
+    max_delay=_settings.PURCHASE_BATCH_DELAY_SECONDS
+)
+
+
+async def fulfill_checkout_session(session: Dict[str, Any]) -> None:
+    """Records the purchase for a completed, paid Checkout session.
+
+    Args:
+        session (Dict[str, Any]): The Checkout Session object from the event
+    """
+    if session.get('payment_status') != 'paid':
+        return
+
+    purchase = _purchase_from_session(
+        session_id=session['id'],
+        payment_intent_id=session.get('payment_intent'),
+        amount=session['amount_total'],
+        currency=session.get('currency'),
+        metadata=session.get('metadata') or {}
+    )
+    if purchase:
+        await purchase_batcher.add(purchase)
+
+
+async def fulfill_payment_intent(payment_intent: Dict[str, Any]) -> None:
+    """Records the purchase for a succeeded PaymentIntent created by Checkout.
+
+    Args:
+        payment_intent (Dict[str, Any]): The PaymentIntent object from the event
+    """
+    metadata = payment_intent.get('metadata') or {}
+    if not metadata.get('lesson_id'):
+        # Not a lesson checkout; nothing to fulfill
+        return
+
+    sessions = await run_stripe_call(
+        stripe.checkout.Session.list,
+        payment_intent=payment_intent['id'],
+        limit=1
+    )
+    if not sessions.data:
+        logger.warning("No Checkout session found for payment intent %s", payment_intent['id'])
+        return
+
+    purchase = _purchase_from_session(
+        session_id=sessions.data[0].id,
+        payment_intent_id=payment_intent['id'],
+        amount=payment_intent.get('amount_received') or payment_intent['amount'],
+        currency=payment_intent.get('currency'),
+        metadata=metadata,
+        application_fee=payment_intent.get('application_fee_amount')
+    )
+    if purchase:
+        await purchase_batcher.add(purchase)
@@ -14,6 +14,7 @@ ensuring proper configuration of account capabilities and controller settings.
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
 from app.stripe.client import stripe
+from app.stripe.executor import run_stripe_call
 import logging
 
 router = APIRouter()
@@ -45,7 +46,7 @@ def _get_account_id_from_request(data: dict):
     return account_id
 
 
-def _create_stripe_account_session(self, account_id):
+def _create_stripe_account_session(account_id):
     """Creates a Stripe account session with onboarding enabled.
 
     Args:
@@ -77,7 +78,7 @@ async def create_stripe_account_session(data: dict):
     """
     try:
         account_id = _get_account_id_from_request(data)
-        session = _create_stripe_account_session(account_id)
+        session = await run_stripe_call(_create_stripe_account_session, account_id)
         return JSONResponse(content={'client_secret': session.client_secret})
     except HTTPException:
         raise
@@ -15,16 +15,74 @@ configuration of Stripe API keys and Connect settings.
 """
 
 import stripe
-from fastapi import APIRouter, HTTPException, Body
+from decimal import Decimal
+from fastapi import APIRouter, HTTPException, Body, Depends
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional, Union
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.routes.base import get_current_user
 from app.stripe.client import get_stripe_client
-from app.supabase.client import get_supabase_client
+from app.stripe.executor import run_stripe_call
+from app.supabase import queries
 
 # Create the router instance
 router = APIRouter()
 
+_settings = get_settings()
+
+# Share of each sale kept by the platform as the Connect application fee
+PLATFORM_FEE_PERCENTAGE = 10
+
+# Currency lessons are priced and sold in
+LESSON_CURRENCY = 'usd'
+
+# Stripe amounts are integers in the currency's minor unit; most currencies have two decimals
+# https://docs.stripe.com/currencies#zero-decimal
+ZERO_DECIMAL_CURRENCIES = {
+    'bif', 'clp', 'djf', 'gnf', 'jpy', 'kmf', 'krw', 'mga',
+    'pyg', 'rwf', 'ugx', 'vnd', 'vuv', 'xaf', 'xof', 'xpf',
+}
+THREE_DECIMAL_CURRENCIES = {'bhd', 'jod', 'kwd', 'omr', 'tnd'}
+
+def currency_exponent(currency: str) -> int:
+    """Returns the number of decimals in ``currency``'s minor unit."""
+    currency = (currency or '').lower()
+    if currency in ZERO_DECIMAL_CURRENCIES:
+        return 0
+    if currency in THREE_DECIMAL_CURRENCIES:
+        return 3
+    return 2
+
+def to_minor_units(amount: Union[int, float, str, Decimal], currency: str) -> int:
+    """Converts a major-unit amount (e.g. a lesson price) to a Stripe integer amount."""
+    return int((Decimal(str(amount)) * 10 ** currency_exponent(currency)).to_integral_value())
+
+def from_minor_units(amount: int, currency: str) -> float:
+    """Converts a Stripe integer amount back to major units."""
+    exponent = currency_exponent(currency)
+    return round(amount / 10 ** exponent, exponent)
+
+# Lesson ID -> creator's connected account, read on every checkout
+creator_account_cache = TTLCache(
+    maxsize=_settings.CREATOR_ACCOUNT_CACHE_MAXSIZE,
+    ttl=_settings.CREATOR_ACCOUNT_CACHE_TTL_SECONDS
+)
+
+# Tables whose writes can change which connected account a lesson pays out to
+CREATOR_ACCOUNT_TABLES = frozenset({'lessons', 'profiles'})
+
+def invalidate_creator_accounts(table: Optional[str] = None) -> None:
+    """
+    Drops cached lesson to Stripe account mappings after a lesson or profile write.
+
+    Args:
+        table (str, optional): The table written; writes to other tables keep the cache.
+    """
+    if table is None or table in CREATOR_ACCOUNT_TABLES:
+        creator_account_cache.invalidate()
+
 async def get_lesson_creator_stripe_account(lesson_id: str) -> str:
     """
     Get the Stripe Connect account ID for the lesson creator.
@@ -38,8 +96,6 @@ async def get_lesson_creator_stripe_account(lesson_id: str) -> str:
     Raises:
         HTTPException: If lesson or creator not found
     """
-    supabase = get_supabase_client()
-    
     try:
         # Validate UUID format
         from uuid import UUID
@@ -48,34 +104,37 @@ async def get_lesson_creator_stripe_account(lesson_id: str) -> str:
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid lesson_id format")
 
-        # First get the lesson to find the creator_id
-        # Verify lesson exists
-        response = supabase.table('lessons').select('creator_id').eq('id', lesson_id).execute()
-        if not response.data:
+        cached = creator_account_cache.get(lesson_id)
+        if cached is not None:
+            return cached
+        # Read before the fetch so a write that lands meanwhile keeps its result out of the cache
+        generation = creator_account_cache.generation
+
+        # Lesson, creator and Stripe account come back in a single query
+        lesson = await queries.fetch_lesson_creator_account(lesson_id)
+        if not lesson:
             raise HTTPException(
                 status_code=404, 
                 detail=f"Lesson {lesson_id} not found. Be sure to create the lesson first with valid UUIDs from your database."
             )
             
-        creator_id = response.data.get('creator_id')
-        
-        # Then get the creator's stripe account
-        # Verify creator exists and has stripe account
-        response = supabase.table('profiles').select('stripe_account_id').eq('id', creator_id).execute()
-        if not response.data:
+        creator_id = lesson.get('creator_id')
+        profile = lesson.get('creator')
+        if not profile:
             raise HTTPException(
                 status_code=404,
                 detail=f"Creator profile {creator_id} not found"
             )
         
-        stripe_account_id = response.data[0].get('stripe_account_id')
+        stripe_account_id = profile.get('stripe_account_id')
         if not stripe_account_id:
             raise HTTPException(
                 status_code=400,
                 detail=f"Creator {creator_id} has not completed Stripe onboarding"
             )
             
-        return response.data.get('stripe_account_id')
+        creator_account_cache.set(lesson_id, stripe_account_id, generation=generation)
+        return stripe_account_id
     except Exception as e:
         print(f"Error in create_checkout_session: {str(e)}")
         if isinstance(e, HTTPException):
@@ -90,23 +149,21 @@ class LineItemRequest(BaseModel):
     quantity: int
 
 class CheckoutSessionRequest(BaseModel):
-    line_items: List[LineItemRequest]
+    # Ignored: the line item is built from the lesson row so clients cannot choose the price
+    line_items: Optional[List[LineItemRequest]] = None
     success_url: str
     cancel_url: str
     metadata: Dict[str, str]
 
 @router.post("/checkout_session", response_model=Dict[str, str], status_code=201)
-async def create_checkout_session(request: CheckoutSessionRequest = Body(...)):
-    """Creates a Stripe Checkout session for processing payments."""
+async def create_checkout_session(
+    request: CheckoutSessionRequest = Body(...),
+    user: Dict[str, Any] = Depends(get_current_user)
+):
+    """Creates a Stripe Checkout session for the lesson in ``metadata.lesson_id``, bought by the caller."""
     stripe = get_stripe_client()
     try:
-        line_items = [item.dict() for item in request.line_items]
-        metadata = request.metadata
-        
-        if not line_items:
-            raise HTTPException(status_code=400, detail="Missing required line_items")
-            
-        lesson_id = metadata.get('lesson_id', '')
+        lesson_id = request.metadata.get('lesson_id', '')
         if not lesson_id:
             raise HTTPException(
                 status_code=400, 
@@ -115,12 +172,35 @@ async def create_checkout_session(request: CheckoutSessionRequest = Body(...)):
 
         # Get the connected account ID for the lesson creator
         connected_account_id = await get_lesson_creator_stripe_account(lesson_id)
-        
-        # Calculate application fee (10%)
-        unit_amount = line_items[0]['price_data']['unit_amount']
-        application_fee_amount = int(unit_amount * 0.10)
 
-        checkout_session = stripe.checkout.Session.create(
+        # Price and buyer come from the lesson row and the token, never from the request
+        lesson = await queries.fetch_lesson(lesson_id, columns='id,title,price,deleted_at')
+        if not lesson or lesson.get('deleted_at'):
+            raise HTTPException(status_code=404, detail=f"Lesson {lesson_id} not found")
+        unit_amount = to_minor_units(lesson['price'], LESSON_CURRENCY)
+        line_items = [{
+            'price_data': {
+                'currency': LESSON_CURRENCY,
+                'product_data': {'name': lesson['title']},
+                'unit_amount': unit_amount,
+            },
+            'quantity': 1,
+        }]
+        # The quoted amount is what fulfillment checks the payment against, so a
+        # later price change cannot reject a sale that was paid in full
+        metadata = {
+            **request.metadata,
+            'lesson_id': lesson_id,
+            'user_id': user['sub'],
+            'unit_amount': str(unit_amount),
+            'currency': LESSON_CURRENCY,
+        }
+
+        # Calculate application fee
+        application_fee_amount = int(unit_amount * PLATFORM_FEE_PERCENTAGE / 100)
+
+        checkout_session = await run_stripe_call(
+            stripe.checkout.Session.create,
             payment_method_types=['card'],
             line_items=line_items,
             mode='payment',
@@ -129,6 +209,8 @@ async def create_checkout_session(request: CheckoutSessionRequest = Body(...)):
             metadata=metadata,
             payment_intent_data={
                 'application_fee_amount': application_fee_amount,
+                # Lets payment_intent.succeeded be fulfilled without the session
+                'metadata': metadata,
                 'transfer_data': {
                     'destination': connected_account_id,
                 },
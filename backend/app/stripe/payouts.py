@@ -13,6 +13,7 @@ Key Features:
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
 from app.stripe.client import stripe
+from app.stripe.executor import run_stripe_call
 
 # Create the router instance
 router = APIRouter()
@@ -92,7 +93,8 @@ async def handle_payout_configuration_request(data: dict):
     try:
         payout_params = validate_payout_parameters(data)
         
-        configure_stripe_payout_schedule(
+        await run_stripe_call(
+            configure_stripe_payout_schedule,
             account_id=payout_params['connected_account_id'],
             interval=payout_params['interval'],
             delay_days=payout_params['delay_days'],
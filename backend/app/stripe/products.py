@@ -0,0 +1,46 @@
+"""Stripe Product Module
+
+This module creates the Stripe Product and Price that back a lesson. Both requests carry
+idempotency keys derived from the lesson ID, so retrying an import (or a single lesson) after a
+partial failure returns the objects created the first time instead of duplicating them.
+
+Key Features:
+- One Product and one USD Price per lesson
+- Idempotency keys scoped to the lesson ID
+- Calls run on the shared Stripe executor, off the event loop
+"""
+
+from typing import Any, Dict, Tuple
+
+from app.stripe.client import stripe
+from app.stripe.executor import run_stripe_call
+from app.stripe.payments import LESSON_CURRENCY, to_minor_units
+
+
+async def create_lesson_product(lesson: Dict[str, Any]) -> Tuple[str, str]:
+    """Creates the Stripe Product and Price for a lesson.
+
+    Args:
+        lesson (Dict[str, Any]): Lesson row with ``id``, ``title``, ``description`` and ``price``
+
+    Returns:
+        Tuple[str, str]: The Stripe product ID and price ID
+
+    Raises:
+        stripe.error.StripeError: If either object cannot be created
+    """
+    product = await run_stripe_call(
+        stripe.Product.create,
+        name=lesson['title'],
+        description=lesson.get('description') or None,
+        metadata={'lesson_id': lesson['id']},
+        idempotency_key=f"lesson-product-{lesson['id']}",
+    )
+    price = await run_stripe_call(
+        stripe.Price.create,
+        product=product.id,
+        unit_amount=to_minor_units(lesson['price'], LESSON_CURRENCY),
+        currency=LESSON_CURRENCY,
+        idempotency_key=f"lesson-price-{lesson['id']}",
+    )
+    return product.id, price.id
@@ -0,0 +1,158 @@
+"""Stripe Webhook Queue Module
+
+Webhook deliveries are acknowledged as soon as the verified event is stored in
+``stripe_events``; the actual processing happens here, on a small pool of
+background workers. Bursts of events (for example right after a sale) are
+drained at a fixed concurrency instead of competing with user requests, and
+failed events are retried with exponential backoff before being marked failed.
+
+Key Features:
+- Bounded in-memory queue; the webhook endpoint waits when it is full
+- Fixed number of asyncio workers (STRIPE_WEBHOOK_WORKERS)
+- Exponential backoff retries up to STRIPE_WEBHOOK_MAX_ATTEMPTS
+- Startup recovery of events left pending by a previous process
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.core.config import get_settings
+from app.supabase import queries
+
+logger = logging.getLogger(__name__)
+
+EventProcessor = Callable[[Dict[str, Any]], Awaitable[None]]
+
+class WebhookQueue:
+    """
+    Background worker pool for stored Stripe events.
+
+    Attributes:
+        workers (int): Number of concurrent worker tasks.
+        max_attempts (int): Attempts before an event is marked failed.
+        retry_base_seconds (float): Delay before the first retry.
+    """
+
+    def __init__(
+        self,
+        process: EventProcessor,
+        workers: int,
+        maxsize: int,
+        max_attempts: int,
+        retry_base_seconds: float
+    ):
+        self._process = process
+        self.workers = workers
+        self.maxsize = maxsize
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = []
+        self._retries: Set[asyncio.Task] = set()
+
+    def _ensure_started(self) -> None:
+        """Starts the workers on the running event loop if they are not already running there."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [
+            loop.create_task(self._worker(), name=f"stripe-webhook-{index}")
+            for index in range(self.workers)
+        ]
+
+    async def start(self) -> None:
+        """Starts the workers and re-queues events left pending by a previous process."""
+        self._ensure_started()
+        # Recovery runs in the background so a slow database does not delay startup
+        recovery = self._loop.create_task(self._recover())
+        self._retries.add(recovery)
+        recovery.add_done_callback(self._retries.discard)
+
+    async def _recover(self) -> None:
+        try:
+            pending = await queries.fetch_pending_stripe_events(limit=self.maxsize)
+        except Exception:
+            logger.exception("Could not load pending Stripe events")
+            return
+        for event in pending:
+            await self.submit(event['payload'], attempts=event.get('attempts', 0))
+
+    async def stop(self) -> None:
+        """Cancels the workers and any scheduled retries; stored events stay pending."""
+        tasks = self._tasks + list(self._retries)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._retries.clear()
+
+    async def submit(self, event: Dict[str, Any], attempts: int = 0) -> None:
+        """
+        Queues a stored event for processing.
+
+        Args:
+            event (Dict[str, Any]): The verified Stripe event.
+            attempts (int): Attempts already made for this event.
+        """
+        self._ensure_started()
+        await self._queue.put((event, attempts))
+
+    def depth(self) -> int:
+        """Returns the number of events waiting for a worker."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _worker(self) -> None:
+        while True:
+            event, attempts = await self._queue.get()
+            try:
+                await self._handle(event, attempts + 1)
+            except Exception:
+                logger.exception("Could not record state for Stripe event %s", event.get('id'))
+            finally:
+                self._queue.task_done()
+
+    async def _handle(self, event: Dict[str, Any], attempt: int) -> None:
+        try:
+            await self._process(event)
+        except Exception as e:
+            logger.warning("Stripe event %s failed on attempt %d: %s", event['id'], attempt, e)
+            if attempt >= self.max_attempts:
+                await queries.update_stripe_event(event['id'], {
+                    'status': 'failed',
+                    'attempts': attempt,
+                    'last_error': str(e)
+                })
+                return
+            await queries.update_stripe_event(event['id'], {'attempts': attempt, 'last_error': str(e)})
+            delay = self.retry_base_seconds * 2 ** (attempt - 1)
+            retry = asyncio.get_running_loop().create_task(self._retry_later(event, attempt, delay))
+            self._retries.add(retry)
+            retry.add_done_callback(self._retries.discard)
+            return
+
+        await queries.update_stripe_event(event['id'], {
+            'status': 'processed',
+            'attempts': attempt,
+            'last_error': None,
+            'processed_at': datetime.now(timezone.utc).isoformat()
+        })
+
+    async def _retry_later(self, event: Dict[str, Any], attempts: int, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self._queue.put((event, attempts))
+
+def create_webhook_queue(process: EventProcessor) -> WebhookQueue:
+    """Builds a ``WebhookQueue`` sized from application settings."""
+    settings = get_settings()
+    return WebhookQueue(
+        process,
+        workers=settings.STRIPE_WEBHOOK_WORKERS,
+        maxsize=settings.STRIPE_WEBHOOK_QUEUE_SIZE,
+        max_attempts=settings.STRIPE_WEBHOOK_MAX_ATTEMPTS,
+        retry_base_seconds=settings.STRIPE_WEBHOOK_RETRY_BASE_SECONDS
+    )
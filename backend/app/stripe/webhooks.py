@@ -1,11 +1,13 @@
 """Stripe Webhook Handler Module
 
 This module handles incoming webhook events from Stripe's payment processing system. It verifies
-event signatures, processes different event types, and returns appropriate responses. The handler
-is designed to be secure and extensible for handling various Stripe event types.
+event signatures, stores each event once, and acknowledges immediately; event handlers run later
+on the background workers in ``app.stripe.webhook_queue``. The handler is designed to be secure
+and extensible for handling various Stripe event types.
 
 Key Features:
 - Signature verification for secure event handling
+- Idempotent ingestion keyed on Stripe's event id
 - Modular event processing architecture
 - Comprehensive error handling
 - Standardized response format
@@ -13,9 +15,14 @@ Key Features:
 The main entry point is the /webhook route which orchestrates the webhook processing flow.
 """
 
+from typing import Any, Dict
 from fastapi import APIRouter, Request, HTTPException
 from app.stripe.client import stripe
+from app.stripe.fulfillment import fulfill_checkout_session, fulfill_payment_intent
+from app.stripe.webhook_queue import create_webhook_queue
+from app.core.cache import TTLCache
 from app.core.config import get_settings
+from app.supabase import queries
 
 router = APIRouter()
 
@@ -56,19 +63,25 @@ def _verify_stripe_event(payload: str, signature: str) -> dict:
         raise HTTPException(status_code=401, detail="Invalid signature") from e
 
 
-def _handle_payment_intent_succeeded(event_data: dict) -> None:
+async def _handle_payment_intent_succeeded(event_data: dict) -> None:
     """Handles successful payment intent events.
     
     Args:
         event_data (dict): The event data object from Stripe
-        
-    TODO: Implement purchase fulfillment logic
     """
-    payment_intent = event_data['object']
-    # Add logic to fulfill the purchase
+    await fulfill_payment_intent(event_data['object'])
+
+
+async def _handle_checkout_session_completed(event_data: dict) -> None:
+    """Handles completed Checkout session events.
+    
+    Args:
+        event_data (dict): The event data object from Stripe
+    """
+    await fulfill_checkout_session(event_data['object'])
 
 
-def _handle_payment_method_attached(event_data: dict) -> None:
+async def _handle_payment_method_attached(event_data: dict) -> None:
     """Handles payment method attached events.
     
     Args:
@@ -80,6 +93,34 @@ def _handle_payment_method_attached(event_data: dict) -> None:
     # Add event handling logic
 
 
+# Event types with a handler; anything else is acknowledged and dropped
+EVENT_HANDLERS = {
+    'payment_intent.succeeded': _handle_payment_intent_succeeded,
+    'checkout.session.completed': _handle_checkout_session_completed,
+    'payment_method.attached': _handle_payment_method_attached,
+}
+
+
+async def process_stripe_event(event: Dict[str, Any]) -> None:
+    """Runs the handler registered for a stored event's type.
+    
+    Args:
+        event (Dict[str, Any]): The verified Stripe event
+    """
+    await EVENT_HANDLERS[event['type']](event['data'])
+
+
+webhook_queue = create_webhook_queue(process_stripe_event)
+
+# Recently stored event ids, so redeliveries skip the database entirely
+_recent_event_ids = TTLCache(maxsize=10000, ttl=3600)
+
+
+def _event_to_dict(event: Any) -> Dict[str, Any]:
+    """Converts a verified Stripe event into plain JSON-serializable data."""
+    return event.to_dict() if hasattr(event, 'to_dict') else dict(event)
+
+
 @router.post("/webhooks")
 async def handle_stripe_webhook(request: Request):
     """Main entry point for Stripe webhook processing.
@@ -87,8 +128,8 @@ async def handle_stripe_webhook(request: Request):
     Orchestrates the webhook handling flow:
     1. Extracts payload and signature
     2. Verifies event authenticity
-    3. Routes to appropriate event handler
-    4. Returns standardized response
+    3. Stores the event once, keyed on its id
+    4. Queues it for background processing and acknowledges immediately
     
     Returns:
         dict: Response dictionary with status
@@ -99,16 +140,22 @@ async def handle_stripe_webhook(request: Request):
             raise HTTPException(status_code=400, detail='Missing Stripe signature')
             
         payload = await request.body()
-        event = _verify_stripe_event(payload.decode('utf-8'), signature)
+        event = _event_to_dict(_verify_stripe_event(payload.decode('utf-8'), signature))
         
-        # Route to appropriate event handler
-        if event['type'] == 'payment_intent.succeeded':
-            _handle_payment_intent_succeeded(event['data'])
-        elif event['type'] == 'payment_method.attached':
-            _handle_payment_method_attached(event['data'])
-        else:
-            raise HTTPException(status_code=400, detail='Unhandled event type')
-            
+        # Acknowledge types we do not handle so Stripe stops redelivering them
+        if event['type'] not in EVENT_HANDLERS:
+            return {'status': 'ignored'}
+
+        if _recent_event_ids.get(event['id']) is not None:
+            return {'status': 'duplicate'}
+
+        # A failed insert surfaces as 500 so Stripe redelivers the event later
+        if not await queries.insert_stripe_event(event['id'], event['type'], event):
+            _recent_event_ids.set(event['id'], True)
+            return {'status': 'duplicate'}
+        _recent_event_ids.set(event['id'], True)
+
+        await webhook_queue.submit(event)
         return {'status': 'success'}
         
     except ValueError as e:
@@ -1,15 +1,16 @@
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional
 from pydantic import BaseModel
+from app.core.config import get_settings
+from app.core.metrics import track_dependency
 from app.supabase.client import get_supabase_client
-
-# Get the supabase client instance
-supabase = get_supabase_client()
+from app.supabase.filters import apply_filters, apply_order, check_column, parse_columns, parse_filter, parse_order
 
 class APIResponse(BaseModel):
     status: str
     data: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
 
+@track_dependency('supabase', 'create_record')
 def create_record(table: str, data: Dict[str, Any]) -> APIResponse:
     """
     Inserts a new record into the specified table.
@@ -22,6 +23,7 @@ def create_record(table: str, data: Dict[str, Any]) -> APIResponse:
         APIResponse: Response containing status and data/error.
     """
     try:
+        supabase = get_supabase_client()
         response = supabase.table(table).insert(data).execute()
         if response.get('error'):
             return APIResponse(
@@ -38,29 +40,49 @@ def create_record(table: str, data: Dict[str, Any]) -> APIResponse:
             error=f"Insert failed: {str(e)}"
         )
 
-def read_records(table: str, query: dict = None) -> list:
+def read_records(
+    table: str,
+    query: dict = None,
+    columns: Optional[str] = None,
+    filters: Optional[List[str]] = None,
+    order: Optional[str] = None,
+    limit: Optional[int] = None
+) -> list:
     """
     Reads records from the specified table.
 
+    Tables, columns and operators are validated against
+    ``filters.READABLE_COLUMNS`` before the query is sent.
+
     Args:
         table (str): The name of the table.
-        query (dict, optional): Query parameters.
+        query (dict, optional): Column equality filters.
+        columns (str, optional): Comma-separated columns to select; all readable columns by default.
+        filters (List[str], optional): Filter expressions such as ``price.gte.10`` or ``status.in.draft,published``.
+        order (str, optional): Sort expression such as ``created_at.desc,title``.
+        limit (int, optional): Maximum number of rows to return.
 
     Returns:
         list: List of retrieved records.
 
     Raises:
+        ValueError: If the table, a column or an expression is not allowed.
         Exception: If the read operation fails.
     """
-    query_builder = supabase.table(table)
-    if query:
-        for key, value in query.items():
-            query_builder = query_builder.eq(key, value)
-    response = query_builder.execute()
-    if response.get('error'):
-        raise Exception(f"Read failed: {response['error']}")
-    return response.get('data', [])
+    parsed = [parse_filter(table, expression) for expression in filters or []]
+    parsed += [(check_column(table, key), 'eq', value) for key, value in (query or {}).items()]
+    sort = parse_order(table, order)
 
+    supabase = get_supabase_client()
+    query_builder = apply_filters(supabase.table(table).select(parse_columns(table, columns)), parsed)
+    if sort or limit is not None:
+        query_builder = apply_order(query_builder, table, sort)
+    if limit is not None:
+        query_builder = query_builder.limit(limit)
+    with track_dependency('supabase', 'read_records'):
+        return query_builder.execute().data
+
+@track_dependency('supabase', 'update_record')
 def update_record(table: str, record_id: int, data: dict) -> dict:
     """
     Updates a record in the specified table.
@@ -76,11 +98,13 @@ def update_record(table: str, record_id: int, data: dict) -> dict:
     Raises:
         Exception: If the update fails.
     """
+    supabase = get_supabase_client()
     response = supabase.table(table).update(data).eq('id', record_id).execute()
     if response.get('error'):
         raise Exception(f"Update failed: {response['error']}")
     return response.get('data', {})
 
+@track_dependency('supabase', 'delete_record')
 def delete_record(table: str, record_id: int) -> dict:
     """
     Deletes a record from the specified table.
@@ -95,7 +119,163 @@ def delete_record(table: str, record_id: int) -> dict:
     Raises:
         Exception: If the deletion fails.
     """
+    supabase = get_supabase_client()
     response = supabase.table(table).delete().eq('id', record_id).execute()
     if response.get('error'):
         raise Exception(f"Delete failed: {response['error']}")
     return response.get('data', {})
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[Any] = None
+    status: str
+    error: Optional[str] = None
+
+class BulkResponse(BaseModel):
+    status: str
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+def _chunks(items: List[Any], size: int) -> List[List[Any]]:
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+def _bulk_response(results: List[BulkItemResult]) -> BulkResponse:
+    failed = sum(1 for result in results if result.error is not None)
+    succeeded = len(results) - failed
+    if not failed:
+        status = "success"
+    elif succeeded:
+        status = "partial"
+    else:
+        status = "error"
+    return BulkResponse(status=status, succeeded=succeeded, failed=failed, results=results)
+
+@track_dependency('supabase', 'bulk_create_records')
+def bulk_create_records(
+    table: str,
+    records: List[Dict[str, Any]],
+    upsert: bool = False,
+    on_conflict: str = 'id',
+    chunk_size: Optional[int] = None
+) -> BulkResponse:
+    """
+    Inserts or upserts many records, one request per chunk.
+
+    Columns a record omits take their database default rather than null, so
+    records with different keys can share a chunk.
+
+    Args:
+        table (str): The name of the table.
+        records (List[Dict[str, Any]]): The rows to write.
+        upsert (bool): Update rows that conflict on ``on_conflict`` instead of failing.
+        on_conflict (str): Conflict target column(s) for upserts.
+        chunk_size (int, optional): Rows per request; defaults to ``SUPABASE_BULK_CHUNK_SIZE``.
+
+    Returns:
+        BulkResponse: Per-record results in input order. A failed chunk marks
+            only its own records as failed.
+    """
+    supabase = get_supabase_client()
+    size = chunk_size or get_settings().SUPABASE_BULK_CHUNK_SIZE
+    results: List[BulkItemResult] = []
+    offset = 0
+    for chunk in _chunks(records, size):
+        try:
+            if upsert:
+                builder = supabase.table(table).upsert(chunk, on_conflict=on_conflict, default_to_null=False)
+            else:
+                builder = supabase.table(table).insert(chunk, default_to_null=False)
+            rows = builder.execute().data or []
+        except Exception as e:
+            results.extend(
+                BulkItemResult(index=offset + position, status="error", error=str(e))
+                for position in range(len(chunk))
+            )
+        else:
+            status = "upserted" if upsert else "created"
+            for position, record in enumerate(chunk):
+                row = rows[position] if position < len(rows) else record
+                results.append(BulkItemResult(index=offset + position, id=row.get('id'), status=status))
+        offset += len(chunk)
+    return _bulk_response(results)
+
+def _bulk_by_ids(
+    table: str,
+    record_ids: List[Any],
+    run: Callable[[Any, List[Any]], List[Dict[str, Any]]],
+    status: str,
+    chunk_size: Optional[int]
+) -> BulkResponse:
+    """Runs ``run(supabase, ids)`` per chunk and reports which IDs it affected."""
+    supabase = get_supabase_client()
+    size = chunk_size or get_settings().SUPABASE_BULK_CHUNK_SIZE
+    results: List[BulkItemResult] = []
+    offset = 0
+    for chunk in _chunks(record_ids, size):
+        try:
+            rows = run(supabase, chunk) or []
+        except Exception as e:
+            results.extend(
+                BulkItemResult(index=offset + position, id=record_id, status="error", error=str(e))
+                for position, record_id in enumerate(chunk)
+            )
+        else:
+            affected = {str(row.get('id')) for row in rows}
+            for position, record_id in enumerate(chunk):
+                if str(record_id) in affected:
+                    results.append(BulkItemResult(index=offset + position, id=record_id, status=status))
+                else:
+                    results.append(BulkItemResult(
+                        index=offset + position, id=record_id, status="not_found", error="Record not found"
+                    ))
+        offset += len(chunk)
+    return _bulk_response(results)
+
+@track_dependency('supabase', 'bulk_update_records')
+def bulk_update_records(
+    table: str,
+    record_ids: List[Any],
+    data: Dict[str, Any],
+    chunk_size: Optional[int] = None
+) -> BulkResponse:
+    """
+    Applies the same update to many records with one ``id=in.(...)`` request per chunk.
+
+    Args:
+        table (str): The name of the table.
+        record_ids (List[Any]): IDs of the records to update.
+        data (Dict[str, Any]): Column values to set on every record.
+        chunk_size (int, optional): IDs per request; defaults to ``SUPABASE_BULK_CHUNK_SIZE``.
+
+    Returns:
+        BulkResponse: Per-ID results; IDs that matched no row are ``not_found``.
+    """
+    return _bulk_by_ids(
+        table,
+        record_ids,
+        lambda supabase, ids: supabase.table(table).update(data).in_('id', ids).execute().data,
+        "updated",
+        chunk_size
+    )
+
+@track_dependency('supabase', 'bulk_delete_records')
+def bulk_delete_records(table: str, record_ids: List[Any], chunk_size: Optional[int] = None) -> BulkResponse:
+    """
+    Deletes many records with one ``id=in.(...)`` request per chunk.
+
+    Args:
+        table (str): The name of the table.
+        record_ids (List[Any]): IDs of the records to delete.
+        chunk_size (int, optional): IDs per request; defaults to ``SUPABASE_BULK_CHUNK_SIZE``.
+
+    Returns:
+        BulkResponse: Per-ID results; IDs that matched no row are ``not_found``.
+    """
+    return _bulk_by_ids(
+        table,
+        record_ids,
+        lambda supabase, ids: supabase.table(table).delete().in_('id', ids).execute().data,
+        "deleted",
+        chunk_size
+    )
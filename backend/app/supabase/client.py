@@ -1,14 +1,25 @@
+import httpx
 from supabase import create_client, Client
+from postgrest import AsyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
 from functools import lru_cache
 from app.core.config import get_settings
+from app.core.metrics import dependency_operation, track_dependency
 from typing import Optional
 
-# Use a singleton pattern with lazy initialization
+# Use a singleton pattern with lazy initialization. Nothing here touches the
+# network at import time; connectivity is checked by ``app.supabase.health``
+# after startup.
 _supabase_client: Optional[Client] = None
+_async_postgrest_client: Optional[AsyncPostgrestClient] = None
 
 @lru_cache()
 def get_supabase_client() -> Client:
-    """Creates and returns a Supabase client instance with caching."""
+    """Creates and returns a Supabase client instance with caching.
+
+    The client is built on first use. Construction is local only; connectivity
+    is reported by the readiness check instead of failing here.
+    """
     global _supabase_client
     
     if _supabase_client is not None:
@@ -36,15 +47,85 @@ def get_supabase_client() -> Client:
                 persist_session=False
             )
         )
-        # Test connection with a lightweight operation
-        _supabase_client.auth.get_session()
         return _supabase_client
     except Exception as e:
         raise RuntimeError(f"Failed to initialize Supabase client: {str(e)}")
 
+class InstrumentedAsyncTransport(httpx.AsyncBaseTransport):
+    """Times every PostgREST request as a ``supabase`` dependency call."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        operation = dependency_operation(request.method, str(request.url))
+        with track_dependency('supabase', operation) as call:
+            response = await self._transport.handle_async_request(request)
+            call['error'] = response.status_code >= 500
+            return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+def get_async_postgrest_client() -> AsyncPostgrestClient:
+    """Returns a shared async PostgREST client backed by a pooled HTTP client.
+
+    The underlying ``httpx.AsyncClient`` keeps connections alive between
+    requests, so awaiting a query never blocks the event loop and does not pay
+    for a new TLS handshake on every call.
+    """
+    global _async_postgrest_client
+
+    if _async_postgrest_client is not None:
+        return _async_postgrest_client
+
+    settings = get_settings()
+
+    if not settings.SUPABASE_URL.startswith(('http://', 'https://')):
+        raise ValueError("Supabase URL must start with http:// or https://")
+
+    headers = {
+        **DEFAULT_POSTGREST_CLIENT_HEADERS,
+        "apikey": settings.SUPABASE_SERVICE_KEY,
+        "Authorization": f"Bearer {settings.SUPABASE_SERVICE_KEY}",
+    }
+    # Pool limits belong to the transport once a custom one is supplied
+    transport = httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(
+            max_connections=settings.SUPABASE_POOL_SIZE,
+            max_keepalive_connections=settings.SUPABASE_POOL_SIZE,
+        ),
+    )
+    http_client = httpx.AsyncClient(
+        headers=headers,
+        timeout=httpx.Timeout(settings.SUPABASE_TIMEOUT_SECONDS),
+        transport=InstrumentedAsyncTransport(transport),
+        follow_redirects=True,
+    )
+    _async_postgrest_client = AsyncPostgrestClient(
+        f"{settings.SUPABASE_URL.rstrip('/')}/rest/v1",
+        headers=headers,
+        http_client=http_client,
+    )
+    return _async_postgrest_client
+
+async def close_async_postgrest_client() -> None:
+    """Closes the pooled async PostgREST client, if one was created."""
+    global _async_postgrest_client
+
+    if _async_postgrest_client is not None:
+        await _async_postgrest_client.aclose()
+        _async_postgrest_client = None
+
 def get_supabase() -> Client:
     """Lazy initialization of Supabase client."""
     return get_supabase_client()
 
-# Create a default client instance for direct import
-supabase = get_supabase()
+class _LazySupabaseClient:
+    """Stands in for the client at import time and builds it on first attribute access."""
+
+    def __getattr__(self, name: str):
+        return getattr(get_supabase_client(), name)
+
+# Default client for direct import; created on first use, not on import
+supabase: Client = _LazySupabaseClient()
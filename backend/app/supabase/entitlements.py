@@ -0,0 +1,82 @@
+"""Lesson entitlement lookups.
+
+Answers "has this user bought this lesson?" from an in-process index of each
+user's purchased lesson IDs. A user's set is loaded from ``purchases`` on first
+use, kept in a bounded LRU cache, and updated in place when this process
+fulfills a purchase, so gating playback on every lesson page view does not cost
+a database query.
+
+Purchases fulfilled by another worker process are not pushed here, so a denied
+lookup re-reads the user's purchases once the cached set is older than
+``ENTITLEMENT_RECHECK_SECONDS``.
+"""
+import time
+from typing import FrozenSet
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.supabase import queries
+
+_settings = get_settings()
+
+# user_id -> (purchased lesson IDs, monotonic time the set was loaded)
+entitlement_cache = TTLCache(
+    maxsize=_settings.ENTITLEMENT_CACHE_MAXSIZE,
+    ttl=_settings.ENTITLEMENT_CACHE_TTL_SECONDS
+)
+
+async def _load_purchased_lessons(user_id: str) -> FrozenSet[str]:
+    """Reads a user's purchased lessons from the database and caches them."""
+    lesson_ids = frozenset(await queries.fetch_purchased_lesson_ids(user_id))
+    entitlement_cache.set(user_id, (lesson_ids, time.monotonic()))
+    return lesson_ids
+
+async def get_purchased_lessons(user_id: str) -> FrozenSet[str]:
+    """
+    Returns the IDs of every lesson the user has purchased.
+
+    Args:
+        user_id (str): The user's UUID.
+
+    Returns:
+        FrozenSet[str]: Purchased lesson IDs.
+    """
+    entry = entitlement_cache.get(user_id)
+    if entry is None:
+        return await _load_purchased_lessons(user_id)
+    return entry[0]
+
+async def has_purchased(user_id: str, lesson_id: str) -> bool:
+    """
+    Checks whether the user has purchased the lesson.
+
+    Args:
+        user_id (str): The user's UUID.
+        lesson_id (str): The lesson's UUID.
+
+    Returns:
+        bool: True if a completed purchase exists.
+    """
+    entry = entitlement_cache.get(user_id)
+    if entry is None:
+        return lesson_id in await _load_purchased_lessons(user_id)
+
+    lesson_ids, loaded_at = entry
+    if lesson_id in lesson_ids:
+        return True
+    if time.monotonic() - loaded_at < _settings.ENTITLEMENT_RECHECK_SECONDS:
+        return False
+    return lesson_id in await _load_purchased_lessons(user_id)
+
+def record_purchase(user_id: str, lesson_id: str) -> None:
+    """
+    Adds a newly fulfilled purchase to the user's cached set, if one is loaded.
+
+    Args:
+        user_id (str): The buyer's UUID.
+        lesson_id (str): The purchased lesson's UUID.
+    """
+    entry = entitlement_cache.get(user_id)
+    if entry is not None:
+        lesson_ids, loaded_at = entry
+        entitlement_cache.set(user_id, (lesson_ids | {lesson_id}, loaded_at))
@@ -0,0 +1,168 @@
+"""Projection, filter and ordering options for generic table reads.
+
+``read_records`` and the ``/read_records`` endpoint take PostgREST-style
+expressions from callers:
+
+- columns: ``id,title,price``
+- filters: ``price.gte.10``, ``status.in.draft,published``, ``title.ilike.*kendama*``,
+  ``deleted_at.is.null``
+- order: ``created_at.desc,title``
+
+Every table and column is checked against ``READABLE_COLUMNS`` before it
+reaches PostgREST, so callers can neither read tables that are not listed
+nor select, filter or sort on columns holding secrets or paid content.
+Invalid expressions raise ``ValueError``; routes turn that into a 400.
+"""
+from typing import Any, List, Optional, Tuple
+
+# Columns each table exposes through generic reads; unlisted tables cannot be read.
+# Purchases are left out: reads are anonymous, and the ledger ties buyers to payments.
+READABLE_COLUMNS = {
+    'categories': ('id', 'name', 'created_at', 'updated_at'),
+    # Contact details and payout account ids stay out of public reads
+    'profiles': (
+        'id', 'full_name', 'bio', 'avatar_url', 'social_media_tag',
+        'stripe_onboarding_complete',
+        'created_at', 'updated_at', 'deleted_at',
+    ),
+    'lessons': (
+        'id', 'title', 'description', 'price', 'creator_id', 'status', 'is_featured',
+        'thumbnail_url', 'vimeo_video_id', 'vimeo_url', 'video_duration', 'video_status',
+        'stripe_product_id', 'stripe_price_id',
+        'created_at', 'updated_at', 'deleted_at', 'version',
+    ),
+    'reviews': ('id', 'user_id', 'lesson_id', 'rating', 'comment', 'created_at', 'updated_at'),
+    'lesson_category': ('lesson_id', 'category_id'),
+}
+
+# Stable sort keys for paging whole tables; tables not listed are ordered by ``id``
+TABLE_ORDER_COLUMNS = {
+    'lesson_category': ('lesson_id', 'category_id'),
+}
+
+# Operators accepted in filter expressions; each maps onto the postgrest builder method of the same name
+FILTER_OPERATORS = {'eq', 'neq', 'gt', 'gte', 'lt', 'lte', 'like', 'ilike', 'in', 'is'}
+
+IS_VALUES = {'null', 'true', 'false'}
+
+def table_order_columns(table: str) -> Tuple[str, ...]:
+    """Returns the columns that give ``table`` a total order for paging."""
+    return TABLE_ORDER_COLUMNS.get(table, ('id',))
+
+def readable_columns(table: str) -> Tuple[str, ...]:
+    """
+    Returns the columns ``table`` exposes through generic reads.
+
+    Raises:
+        ValueError: If the table cannot be read.
+    """
+    columns = READABLE_COLUMNS.get(table)
+    if columns is None:
+        raise ValueError(f"Table '{table}' cannot be read")
+    return columns
+
+def check_column(table: str, column: str) -> str:
+    """Returns ``column`` if ``table`` exposes it, else raises ``ValueError``."""
+    if column not in readable_columns(table):
+        raise ValueError(f"Unknown column '{column}' for table '{table}'")
+    return column
+
+def parse_columns(table: str, columns: Optional[str] = None) -> str:
+    """
+    Validates a comma-separated column list and returns the select expression.
+
+    Args:
+        table (str): The table being read.
+        columns (str, optional): Requested columns; all readable columns when omitted.
+
+    Returns:
+        str: PostgREST select expression.
+
+    Raises:
+        ValueError: If the table or a column is not readable.
+    """
+    if not columns:
+        return ','.join(readable_columns(table))
+    names = [name.strip() for name in columns.split(',')]
+    return ','.join(dict.fromkeys(check_column(table, name) for name in names))
+
+def parse_filter(table: str, expression: str) -> Tuple[str, str, Any]:
+    """
+    Parses a ``column.operator.value`` filter expression.
+
+    Args:
+        table (str): The table being read.
+        expression (str): The filter; ``in`` takes a comma-separated value list
+            and ``is`` takes ``null``, ``true`` or ``false``.
+
+    Returns:
+        Tuple[str, str, Any]: ``(column, operator, value)``.
+
+    Raises:
+        ValueError: If the expression is malformed or names an unreadable column.
+    """
+    parts = expression.split('.', 2)
+    if len(parts) != 3:
+        raise ValueError(f"Invalid filter '{expression}', expected column.operator.value")
+    column, operator, value = parts
+    check_column(table, column)
+    if operator not in FILTER_OPERATORS:
+        raise ValueError(f"Unknown filter operator '{operator}'")
+    if operator == 'in':
+        value = [item for item in value.split(',') if item]
+        if not value:
+            raise ValueError(f"Filter '{expression}' needs at least one value")
+    elif operator == 'is' and value not in IS_VALUES:
+        raise ValueError(f"Filter '{expression}' must compare with null, true or false")
+    return column, operator, value
+
+def parse_order(table: str, expression: Optional[str] = None) -> List[Tuple[str, bool]]:
+    """
+    Parses an order expression such as ``created_at.desc,title``.
+
+    Args:
+        table (str): The table being read.
+        expression (str, optional): Comma-separated ``column[.asc|.desc]`` terms.
+
+    Returns:
+        List[Tuple[str, bool]]: ``(column, descending)`` pairs.
+
+    Raises:
+        ValueError: If a term is malformed or names an unreadable column.
+    """
+    order = []
+    for term in (expression or '').split(','):
+        if not term.strip():
+            continue
+        column, _, direction = term.strip().partition('.')
+        if direction not in ('', 'asc', 'desc'):
+            raise ValueError(f"Invalid sort direction '{direction}'")
+        order.append((check_column(table, column), direction == 'desc'))
+    return order
+
+def apply_filters(query, filters: List[Tuple[str, str, Any]]):
+    """Adds parsed filters to a sync or async postgrest builder."""
+    for column, operator, value in filters:
+        if operator == 'in':
+            query = query.in_(column, value)
+        elif operator == 'is':
+            query = query.is_(column, value)
+        else:
+            query = getattr(query, operator)(column, value)
+    return query
+
+def apply_order(query, table: str, order: List[Tuple[str, bool]]):
+    """
+    Adds ``order`` to a postgrest builder, then the table's key columns.
+
+    The key columns make the order total, so paging with ``range()`` neither
+    skips nor repeats rows that tie on the requested columns.
+    """
+    ordered = set()
+    for column, descending in order:
+        query = query.order(column, desc=descending)
+        ordered.add(column)
+    for column in table_order_columns(table):
+        if column not in ordered:
+            query = query.order(column)
+    return query
@@ -0,0 +1,78 @@
+"""Supabase readiness checks.
+
+Importing the app never talks to Supabase; clients are created on first use.
+Connectivity is instead verified here, in the background after startup and
+on demand from ``GET /api/ready``, with a short timeout so a slow or
+unreachable Supabase marks the pod not-ready instead of blocking its start.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import get_settings
+from app.supabase import queries
+
+logger = logging.getLogger(__name__)
+
+class SupabaseReadiness:
+    """
+    Caches the result of a timed Supabase connectivity check.
+
+    Attributes:
+        timeout (float): Seconds a single check may take.
+        max_age (float): Seconds a result is reused before checking again.
+    """
+
+    def __init__(self, timeout: float, max_age: float):
+        self.timeout = timeout
+        self.max_age = max_age
+        self._result: Dict[str, Any] = {'status': 'pending'}
+        self._checked_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Runs the first check in the background so startup does not wait on Supabase."""
+        self._task = asyncio.get_running_loop().create_task(self.check())
+
+    async def stop(self) -> None:
+        """Cancels a check still running at shutdown."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def check(self) -> Dict[str, Any]:
+        """
+        Checks Supabase now and records the result.
+
+        Returns:
+            Dict[str, Any]: ``status`` ('ok' or 'error'), ``latency_ms`` and any ``error``.
+        """
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(queries.ping(), timeout=self.timeout)
+            result: Dict[str, Any] = {'status': 'ok'}
+        except asyncio.TimeoutError:
+            result = {'status': 'error', 'error': f"Timed out after {self.timeout}s"}
+        except Exception as e:
+            result = {'status': 'error', 'error': str(e)}
+        result['latency_ms'] = round((time.monotonic() - started) * 1000, 1)
+
+        if result['status'] != 'ok':
+            logger.warning("Supabase readiness check failed: %s", result['error'])
+        self._result = result
+        self._checked_at = time.monotonic()
+        return result
+
+    async def status(self) -> Dict[str, Any]:
+        """Returns the last result, re-checking if it is older than ``max_age``."""
+        if self._checked_at is None or time.monotonic() - self._checked_at > self.max_age:
+            return await self.check()
+        return self._result
+
+_settings = get_settings()
+supabase_readiness = SupabaseReadiness(
+    timeout=_settings.SUPABASE_READY_TIMEOUT_SECONDS,
+    max_age=_settings.SUPABASE_READY_CACHE_SECONDS
+)
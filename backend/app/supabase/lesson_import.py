@@ -0,0 +1,225 @@
+"""Bulk lesson import.
+
+Reads lessons from JSONL or CSV as a stream of lines, validates each record as
+it arrives and writes valid lessons in chunks of ``LESSON_IMPORT_CHUNK_SIZE``
+with one multi-row insert per chunk. Stripe products and prices for a chunk
+are created concurrently, bounded by ``LESSON_IMPORT_STRIPE_CONCURRENCY``.
+
+Imports are safe to re-run: lessons without an explicit ``id`` get one derived
+from their creator, title and price, existing IDs are skipped without calling
+Stripe, and Stripe requests carry per-lesson idempotency keys.
+
+Invalid records are reported by line number and skipped; they never fail the
+rest of the file. A database error aborts the import, leaving earlier chunks
+committed.
+"""
+import asyncio
+import codecs
+import csv
+import json
+from datetime import datetime
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple
+from uuid import NAMESPACE_URL, UUID, uuid5
+
+from pydantic import ValidationError
+
+from app.core.config import get_settings
+from app.stripe.products import create_lesson_product
+from app.supabase import queries
+from app.supabase.models import LessonImport
+
+LESSON_IMPORT_FORMATS = ('jsonl', 'csv')
+
+# Namespace for lesson IDs derived from imported records
+LESSON_ID_NAMESPACE = uuid5(NAMESPACE_URL, 'https://teach-niche.com/lesson-import')
+
+# (line number, parsed record or None, parse error or None)
+ImportRecord = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """
+    Splits a stream of UTF-8 byte chunks into lines without buffering the whole body.
+
+    Args:
+        chunks (AsyncIterable[bytes]): e.g. ``Request.stream()``.
+
+    Yields:
+        str: Each line, without its line terminator.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split('\n')
+        for line in lines:
+            yield line.rstrip('\r')
+    buffer += decoder.decode(b'', final=True)
+    if buffer:
+        yield buffer.rstrip('\r')
+
+async def iter_lesson_records(lines: AsyncIterable[str], fmt: str) -> AsyncIterator[ImportRecord]:
+    """
+    Parses JSONL or CSV lines into raw lesson records.
+
+    CSV input needs a header row; quoted fields may span lines. Empty CSV
+    cells are treated as missing.
+
+    Args:
+        lines (AsyncIterable[str]): Lines of the import file.
+        fmt (str): One of ``LESSON_IMPORT_FORMATS``.
+
+    Yields:
+        ImportRecord: The record's first line number, the record and any parse error.
+    """
+    if fmt not in LESSON_IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+    header: Optional[List[str]] = None
+    pending = ''
+    start = 0
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if fmt == 'jsonl':
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, None, f"Invalid JSON: {e.msg}"
+                continue
+            if not isinstance(record, dict):
+                yield line_number, None, "Expected a JSON object"
+                continue
+            yield line_number, record, None
+            continue
+
+        if not pending:
+            if not line.strip():
+                continue
+            start = line_number
+        pending = f"{pending}\n{line}" if pending else line
+        # An odd number of quotes means a quoted field continues on the next line
+        if pending.count('"') % 2:
+            continue
+        row = next(csv.reader([pending]))
+        pending = ''
+        if header is None:
+            header = [name.strip() for name in row]
+            continue
+        if len(row) != len(header):
+            yield start, None, f"Expected {len(header)} columns, got {len(row)}"
+            continue
+        yield start, {key: value for key, value in zip(header, row) if value != ''}, None
+
+    if pending:
+        yield start, None, "Unterminated quoted field"
+
+def _validation_message(error: ValidationError) -> str:
+    return '; '.join(
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+def _lesson_row(lesson: LessonImport) -> Dict[str, Any]:
+    """Builds a ``lessons`` row for an imported lesson."""
+    now = datetime.utcnow().isoformat()
+    lesson_id = lesson.id or str(uuid5(LESSON_ID_NAMESPACE, f"{lesson.creator_id}:{lesson.title}:{lesson.price}"))
+    row = lesson.dict(exclude={'id', 'created_at', 'updated_at'})
+    row.update({
+        'id': lesson_id,
+        'created_at': now,
+        'updated_at': now,
+        'stripe_product_id': None,
+        'stripe_price_id': None,
+    })
+    return row
+
+async def import_lessons(
+    records: AsyncIterable[ImportRecord],
+    default_creator_id: Optional[str] = None,
+    create_stripe_products: bool = True,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """
+    Validates and imports lesson records in chunks.
+
+    Args:
+        records (AsyncIterable[ImportRecord]): Output of ``iter_lesson_records``.
+        default_creator_id (str, optional): Creator for records without ``creator_id``.
+        create_stripe_products (bool): Create a Stripe Product and Price per new lesson.
+        dry_run (bool): Validate only; nothing is written to Stripe or the database.
+
+    Returns:
+        Dict[str, Any]: Counts of ``valid``, ``inserted`` and ``existing`` lessons
+            and a list of per-line ``errors``.
+
+    Raises:
+        postgrest.exceptions.APIError: If a chunk cannot be written.
+    """
+    settings = get_settings()
+    semaphore = asyncio.Semaphore(settings.LESSON_IMPORT_STRIPE_CONCURRENCY)
+    summary: Dict[str, Any] = {'valid': 0, 'inserted': 0, 'existing': 0, 'errors': []}
+    chunk: List[Tuple[int, Dict[str, Any]]] = []
+
+    async def attach_product(line: int, row: Dict[str, Any]) -> bool:
+        async with semaphore:
+            try:
+                row['stripe_product_id'], row['stripe_price_id'] = await create_lesson_product(row)
+            except Exception as e:
+                summary['errors'].append({'line': line, 'error': f"Stripe: {e}"})
+                return False
+        return True
+
+    async def flush() -> None:
+        if not chunk or dry_run:
+            return
+        # One query each tells us which lessons already exist and which creators are real
+        existing = await queries.fetch_lesson_creators([row['id'] for _, row in chunk])
+        creators = await queries.fetch_existing_profile_ids(sorted({row['creator_id'] for _, row in chunk}))
+
+        new: List[Tuple[int, Dict[str, Any]]] = []
+        for line, row in chunk:
+            if row['id'] in existing:
+                summary['existing'] += 1
+            elif row['creator_id'] not in creators:
+                summary['errors'].append({'line': line, 'error': f"creator_id: profile {row['creator_id']} not found"})
+            else:
+                new.append((line, row))
+
+        if create_stripe_products and new:
+            created = await asyncio.gather(*(attach_product(line, row) for line, row in new))
+            new = [item for item, ok in zip(new, created) if ok]
+
+        inserted = await queries.upsert_lessons([row for _, row in new])
+        summary['inserted'] += len(inserted)
+        summary['existing'] += len(new) - len(inserted)
+
+    async for line, record, error in records:
+        if error:
+            summary['errors'].append({'line': line, 'error': error})
+            continue
+        if default_creator_id and not record.get('creator_id'):
+            record['creator_id'] = default_creator_id
+        try:
+            lesson = LessonImport(**record)
+            for field in ('id', 'creator_id'):
+                value = getattr(lesson, field)
+                if value is not None:
+                    UUID(value)
+        except ValidationError as e:
+            summary['errors'].append({'line': line, 'error': _validation_message(e)})
+            continue
+        except ValueError:
+            summary['errors'].append({'line': line, 'error': f"{field}: must be a UUID"})
+            continue
+
+        summary['valid'] += 1
+        chunk.append((line, _lesson_row(lesson)))
+        if len(chunk) >= settings.LESSON_IMPORT_CHUNK_SIZE:
+            await flush()
+            chunk.clear()
+
+    await flush()
+    summary['errors'].sort(key=lambda error: error['line'])
+    return summary
@@ -1,13 +1,26 @@
-from typing import Dict, Any
+import hashlib
+from typing import Dict, Any, List, Optional
+
+from postgrest.exceptions import APIError
+
 from .client import get_supabase_client
 
 INITIAL_SCHEMA = """
+-- Every statement tolerates existing objects, so databases created before
+-- the runner can be brought under it by applying this version
+
 -- Enum Types
-CREATE TYPE purchase_status AS ENUM ('pending', 'completed', 'failed', 'refunded');
-CREATE TYPE lesson_status AS ENUM ('draft', 'published', 'archived');
+DO $$ BEGIN
+    CREATE TYPE purchase_status AS ENUM ('pending', 'completed', 'failed', 'refunded');
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
+DO $$ BEGIN
+    CREATE TYPE lesson_status AS ENUM ('draft', 'published', 'archived');
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
 
 -- Categories Table
-CREATE TABLE categories (
+CREATE TABLE IF NOT EXISTS categories (
     id uuid PRIMARY KEY,
     name text NOT NULL UNIQUE,
     created_at timestamp with time zone NOT NULL DEFAULT NOW(),
@@ -15,7 +28,7 @@ CREATE TABLE categories (
 );
 
 -- Profiles Table
-CREATE TABLE profiles (
+CREATE TABLE IF NOT EXISTS profiles (
     id uuid PRIMARY KEY,
     full_name text NOT NULL,
     email text NOT NULL UNIQUE,
@@ -31,7 +44,7 @@ CREATE TABLE profiles (
 );
 
 -- Lessons Table
-CREATE TABLE lessons (
+CREATE TABLE IF NOT EXISTS lessons (
     id uuid PRIMARY KEY,
     title text NOT NULL,
     description text,
@@ -53,7 +66,7 @@ CREATE TABLE lessons (
 );
 
 -- Purchases Table
-CREATE TABLE purchases (
+CREATE TABLE IF NOT EXISTS purchases (
     id uuid PRIMARY KEY,
     user_id uuid NOT NULL REFERENCES profiles(id),
     lesson_id uuid NOT NULL REFERENCES lessons(id),
@@ -73,7 +86,7 @@ CREATE TABLE purchases (
 );
 
 -- Reviews Table
-CREATE TABLE reviews (
+CREATE TABLE IF NOT EXISTS reviews (
     id uuid PRIMARY KEY,
     user_id uuid NOT NULL REFERENCES profiles(id),
     lesson_id uuid NOT NULL REFERENCES lessons(id),
@@ -84,28 +97,248 @@ CREATE TABLE reviews (
 );
 
 -- Lesson Categories Junction Table
-CREATE TABLE lesson_category (
+CREATE TABLE IF NOT EXISTS lesson_category (
     lesson_id uuid NOT NULL REFERENCES lessons(id),
     category_id uuid NOT NULL REFERENCES categories(id),
     PRIMARY KEY (lesson_id, category_id)
 );
 
 -- Indexes
-CREATE INDEX idx_profiles_email ON profiles(email);
-CREATE INDEX idx_purchases_user_id ON purchases(user_id);
-CREATE INDEX idx_purchases_creator_id ON purchases(creator_id);
-CREATE INDEX idx_lessons_creator_id ON lessons(creator_id);
-CREATE UNIQUE INDEX idx_lesson_category_unique ON lesson_category(lesson_id, category_id);
+CREATE INDEX IF NOT EXISTS idx_profiles_email ON profiles(email);
+CREATE INDEX IF NOT EXISTS idx_purchases_user_id ON purchases(user_id);
+CREATE INDEX IF NOT EXISTS idx_purchases_creator_id ON purchases(creator_id);
+CREATE INDEX IF NOT EXISTS idx_lessons_creator_id ON lessons(creator_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_lesson_category_unique ON lesson_category(lesson_id, category_id);
+"""
+
+LESSON_SEARCH_SCHEMA = """
+-- Trigram indexes keep the substring (ILIKE '%term%') search index-backed
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_lessons_title_trgm ON lessons USING GIN (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_lessons_description_trgm ON lessons USING GIN (description gin_trgm_ops);
+
+-- Weighted full-text document: title matches outrank description matches
+ALTER TABLE lessons ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED;
+CREATE INDEX IF NOT EXISTS idx_lessons_search_vector ON lessons USING GIN (search_vector);
+
+-- Ranked search exposed to PostgREST as rpc/search_lessons
+CREATE OR REPLACE FUNCTION search_lessons(
+    search_query text,
+    result_limit integer DEFAULT 10,
+    result_offset integer DEFAULT 0
+)
+RETURNS SETOF lessons
+LANGUAGE sql STABLE
+AS $$
+    SELECT l.*
+    FROM lessons l, websearch_to_tsquery('english', search_query) q
+    WHERE l.search_vector @@ q
+    ORDER BY ts_rank_cd(l.search_vector, q) DESC, l.id
+    LIMIT result_limit OFFSET result_offset
+$$;
+"""
+
+LESSON_CATEGORY_INDEX_SCHEMA = """
+-- The primary key only serves lesson -> categories lookups; category pages
+-- need the reverse direction
+CREATE INDEX IF NOT EXISTS idx_lesson_category_category_id ON lesson_category(category_id, lesson_id);
+"""
+
+STRIPE_EVENTS_SCHEMA = """
+-- Raw Stripe webhook events; the primary key on Stripe's event id makes
+-- redelivered and replayed events no-ops
+CREATE TABLE IF NOT EXISTS stripe_events (
+    id text PRIMARY KEY,
+    type text NOT NULL,
+    payload jsonb NOT NULL,
+    status text NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'processed', 'failed')),
+    attempts integer NOT NULL DEFAULT 0,
+    last_error text,
+    received_at timestamp with time zone NOT NULL DEFAULT NOW(),
+    processed_at timestamp with time zone
+);
+CREATE INDEX IF NOT EXISTS idx_stripe_events_pending ON stripe_events(received_at) WHERE status = 'pending';
+"""
+
+LESSON_VIDEO_METADATA_SCHEMA = """
+-- Vimeo metadata copied onto lessons by the background refresher so catalog
+-- pages never call Vimeo
+ALTER TABLE lessons ADD COLUMN IF NOT EXISTS video_duration integer;
+ALTER TABLE lessons ADD COLUMN IF NOT EXISTS video_status text;
+CREATE INDEX IF NOT EXISTS idx_lessons_vimeo_video_id ON lessons(id)
+    WHERE vimeo_video_id IS NOT NULL AND deleted_at IS NULL;
 """
 
+# Named migration sections that can be applied through apply_migration
+MIGRATIONS = {
+    'initial': INITIAL_SCHEMA,
+    'lesson_search': LESSON_SEARCH_SCHEMA,
+    'lesson_category_index': LESSON_CATEGORY_INDEX_SCHEMA,
+    'stripe_events': STRIPE_EVENTS_SCHEMA,
+    'lesson_video_metadata': LESSON_VIDEO_METADATA_SCHEMA,
+}
+
+# Version tracking and the transactional apply function. Applied once through
+# ``exec_sql`` when ``schema_migrations`` does not exist yet.
+MIGRATION_RUNNER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version text PRIMARY KEY,
+    checksum text NOT NULL,
+    applied_at timestamp with time zone NOT NULL DEFAULT NOW()
+);
+
+-- Runs one migration and records it in the same transaction, so a failing
+-- statement rolls back the whole migration and leaves it pending
+CREATE OR REPLACE FUNCTION apply_schema_migration(
+    migration_version text,
+    migration_checksum text,
+    migration_sql text
+)
+RETURNS boolean
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- Serialises concurrent deploys
+    PERFORM pg_advisory_xact_lock(hashtext('schema_migrations'));
+    IF EXISTS (SELECT 1 FROM schema_migrations WHERE version = migration_version) THEN
+        RETURN false;
+    END IF;
+    EXECUTE migration_sql;
+    INSERT INTO schema_migrations (version, checksum) VALUES (migration_version, migration_checksum);
+    RETURN true;
+END;
+$$;
+-- Runs arbitrary SQL, so only the service role may call it; Supabase grants
+-- new functions to anon and authenticated by default
+REVOKE ALL ON FUNCTION apply_schema_migration(text, text, text) FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION apply_schema_migration(text, text, text) FROM anon, authenticated;
+GRANT EXECUTE ON FUNCTION apply_schema_migration(text, text, text) TO service_role;
+"""
+
+SCHEMA_MIGRATIONS_TABLE = 'schema_migrations'
+
+def migration_checksum(sql: str) -> str:
+    """Returns a stable fingerprint of a migration's SQL."""
+    return hashlib.sha256(sql.strip().encode()).hexdigest()
+
+def fetch_applied_migrations(supabase, bootstrap: bool = True) -> Optional[Dict[str, str]]:
+    """
+    Returns applied migration versions and their checksums.
+
+    Args:
+        supabase: The Supabase client.
+        bootstrap (bool): Create ``schema_migrations`` and
+            ``apply_schema_migration`` if this database has never been
+            migrated by the runner. When False, a missing table returns None.
+    """
+    try:
+        response = supabase.table(SCHEMA_MIGRATIONS_TABLE).select('version,checksum').execute()
+    except APIError:
+        if not bootstrap:
+            return None
+        supabase.rpc('exec_sql', {'query': MIGRATION_RUNNER_SCHEMA}).execute()
+        return {}
+    return {row['version']: row['checksum'] for row in response.data or []}
+
+def plan_migrations(applied: Dict[str, str], target: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Lists every migration up to ``target`` with what the runner would do with it.
+
+    Args:
+        applied (Dict[str, str]): Output of ``fetch_applied_migrations``.
+        target (str, optional): Last version to include; defaults to the newest.
+
+    Returns:
+        List[Dict[str, Any]]: ``version``, ``checksum`` and ``status``, which is
+            'pending', 'applied', or 'changed' for an applied migration whose
+            SQL has since been edited.
+
+    Raises:
+        ValueError: If ``target`` is not a known version.
+    """
+    if target is not None and target not in MIGRATIONS:
+        raise ValueError(f"Unknown migration version '{target}'")
+
+    plan = []
+    for version, sql in MIGRATIONS.items():
+        checksum = migration_checksum(sql)
+        if version not in applied:
+            status = 'pending'
+        elif applied[version] != checksum:
+            status = 'changed'
+        else:
+            status = 'applied'
+        plan.append({'version': version, 'checksum': checksum, 'status': status})
+        if version == target:
+            break
+    return plan
+
+def _apply_version(supabase, version: str, sql: str) -> bool:
+    """Applies one migration in a single transactional RPC; False if it was already applied."""
+    response = supabase.rpc('apply_schema_migration', {
+        'migration_version': version,
+        'migration_checksum': migration_checksum(sql),
+        'migration_sql': sql,
+    }).execute()
+    return bool(response.data)
+
+def migrate(target: Optional[str] = None, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Applies pending migrations in order, one transactional call each.
+
+    Args:
+        target (str, optional): Stop after this version; defaults to the newest.
+        dry_run (bool): Only report the plan; nothing is executed, not even
+            the creation of ``schema_migrations``.
+
+    Returns:
+        Dict[str, Any]: The ``plan`` and the versions ``applied`` by this run.
+            Applied migrations whose SQL changed are reported, never re-run.
+            ``schema_migrations_missing`` is True when a dry run found no
+            tracking table; a real run would create it first.
+
+    Raises:
+        ValueError: If ``target`` is not a known version.
+        Exception: If a migration fails; it is rolled back and later ones are not attempted.
+    """
+    supabase = get_supabase_client()
+    recorded = fetch_applied_migrations(supabase, bootstrap=not dry_run)
+    plan = plan_migrations(recorded or {}, target)
+    applied = []
+    if not dry_run:
+        for step in plan:
+            if step['status'] != 'pending':
+                continue
+            try:
+                if _apply_version(supabase, step['version'], MIGRATIONS[step['version']]):
+                    applied.append(step['version'])
+            except Exception as e:
+                raise Exception(f"Migration {step['version']} failed and was rolled back: {str(e)}")
+    return {
+        'status': 'success',
+        'dry_run': dry_run,
+        'schema_migrations_missing': recorded is None,
+        'plan': plan,
+        'applied': applied,
+    }
+
 def apply_migration(section: str, migration_data: Dict[str, Any] = None) -> Dict[str, Any]:
     """
     Applies migrations to a specified section of the database.
 
+    Named sections are applied through the migration runner: in one
+    transaction, recorded in ``schema_migrations`` and skipped if already
+    applied. Ad-hoc ``migration_data`` SQL is sent as a single ``exec_sql``
+    batch and is not tracked.
+
     Args:
         section (str): The section of the database to migrate
         migration_data (Dict[str, Any], optional): Migration data including SQL commands. 
-            If None, applies initial schema.
+            If None, applies the ``MIGRATIONS`` entry for ``section``.
 
     Returns:
         Dict[str, Any]: Migration results
@@ -116,31 +349,20 @@ def apply_migration(section: str, migration_data: Dict[str, Any] = None) -> Dict
     supabase = get_supabase_client()
     
     try:
-        # If no migration data provided, use initial schema
-        sql = migration_data.get('sql') if migration_data else INITIAL_SCHEMA
-        
-        # Execute SQL using rpc call
-        queries = [q.strip() for q in sql.split(';') if q.strip()]
-        results = []
-        
-        for query in queries:
-            try:
-                # Using rpc to execute raw SQL
-                response = supabase.rpc(
-                    'exec_sql', 
-                    {'query': query}
-                ).execute()
-                
-                if hasattr(response, 'error') and response.error:
-                    raise Exception(f"Query error: {response.error}")
-                    
-                results.append(response.data if response.data else {})
-            except Exception as e:
-                raise Exception(f"Migration failed on query: {query}\nError: {str(e)}")
-                
+        if migration_data:
+            response = supabase.rpc('exec_sql', {'query': migration_data.get('sql')}).execute()
+            return {
+                'status': 'success',
+                'data': [response.data if response.data else {}]
+            }
+
+        if section not in MIGRATIONS:
+            raise ValueError(f"Unknown migration section '{section}'")
+        applied = fetch_applied_migrations(supabase)
+        ran = section not in applied and _apply_version(supabase, section, MIGRATIONS[section])
         return {
             'status': 'success',
-            'data': results
+            'data': [{'version': section, 'applied': ran}]
         }
     except Exception as e:
         return {
@@ -149,6 +371,16 @@ def apply_migration(section: str, migration_data: Dict[str, Any] = None) -> Dict
         }
 
 if __name__ == '__main__':
-    print("Applying initial schema migration...")
-    result = apply_migration('initial')
-    print(f"Migration result: {result}")
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Apply pending database migrations")
+    parser.add_argument('target', nargs='?', help="Stop after this migration version")
+    parser.add_argument('--dry-run', action='store_true', help="Show the plan without applying it")
+    args = parser.parse_args()
+
+    result = migrate(target=args.target, dry_run=args.dry_run)
+    if result['schema_migrations_missing']:
+        print(f"{SCHEMA_MIGRATIONS_TABLE} missing; it is created on the first real run")
+    for step in result['plan']:
+        marker = 'applied now' if step['version'] in result['applied'] else step['status']
+        print(f"{step['version']:<28} {marker}")
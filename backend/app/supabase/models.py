@@ -1,5 +1,5 @@
 from pydantic import BaseModel as PydanticBaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Literal
 from datetime import datetime
 
 class BaseModel(PydanticBaseModel):
@@ -43,6 +43,43 @@ class LessonUpdate(BaseModel):
     is_featured: Optional[bool] = None
     categories: Optional[List[Category]] = []
 
+class LessonSummary(BaseModel):
+    """
+    Compact lesson projection for catalog listings.
+
+    Omits ``content`` and the Stripe/Vimeo bookkeeping columns; the full row
+    is served by ``GET /lessons/{id}``.
+    """
+    id: str
+    title: str
+    description: Optional[str] = None
+    price: float
+    thumbnail_url: Optional[str] = None
+    video_duration: Optional[int] = None
+    creator_id: str
+    is_featured: bool = False
+    status: str = 'draft'
+
+class LessonImport(BaseModel):
+    """
+    One lesson record from a bulk import file.
+
+    ``id`` may be given to make re-imports idempotent; otherwise it is derived
+    from the creator, title and price.
+    """
+    id: Optional[str] = None
+    title: str = Field(..., min_length=1)
+    description: Optional[str] = None
+    price: float = Field(..., ge=0)
+    creator_id: str
+    content: Optional[str] = None
+    content_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    vimeo_video_id: Optional[str] = None
+    vimeo_url: Optional[str] = None
+    is_featured: bool = False
+    status: Literal['draft', 'published', 'archived'] = 'draft'
+
 class Lesson(LessonBase):
     id: str
     creator_id: str
@@ -50,6 +87,8 @@ class Lesson(LessonBase):
     stripe_price_id: Optional[str]
     deleted_at: Optional[datetime]
     version: int
+    video_duration: Optional[int] = None
+    video_status: Optional[str] = None
 
     class Config:
         orm_mode = True
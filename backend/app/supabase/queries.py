@@ -0,0 +1,498 @@
+"""Async data-access layer for lessons, profiles, purchases and Stripe events.
+
+Route handlers are ``async def``, so every query here awaits the pooled
+PostgREST client from ``get_async_postgrest_client`` instead of the blocking
+supabase-py ``Client``. Helpers return plain row dicts (or lists of them) and
+let ``postgrest.exceptions.APIError`` propagate so callers decide which HTTP
+status to surface.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from app.supabase.client import get_async_postgrest_client
+from app.supabase.filters import apply_filters, apply_order
+
+LESSONS_TABLE = 'lessons'
+PROFILES_TABLE = 'profiles'
+PURCHASES_TABLE = 'purchases'
+STRIPE_EVENTS_TABLE = 'stripe_events'
+
+# Columns backing ``LessonSummary``; ``created_at`` and ``price`` are kept so
+# keyset cursors can be built from summary rows
+LESSON_SUMMARY_COLUMNS = 'id,title,description,price,thumbnail_url,video_duration,creator_id,is_featured,status,created_at'
+
+# Lesson columns maintained from Vimeo by ``app.vimeo.metadata``
+LESSON_VIDEO_COLUMNS = 'id,vimeo_video_id,vimeo_url,thumbnail_url,video_duration,video_status'
+
+# Maps the public ``sort`` query values onto (column, descending)
+LESSON_SORTS = {
+    'newest': ('created_at', True),
+    'oldest': ('created_at', False),
+    'price-low': ('price', False),
+    'price-high': ('price', True),
+}
+
+def encode_lesson_cursor(row: Dict[str, Any], sort: str) -> str:
+    """
+    Builds an opaque keyset cursor pointing just past ``row``.
+
+    Args:
+        row (Dict[str, Any]): The last lesson row of the current page.
+        sort (str): The sort order the page was fetched with.
+
+    Returns:
+        str: URL-safe cursor token.
+    """
+    column, _ = LESSON_SORTS[sort]
+    payload = json.dumps({'sort': sort, 'value': row[column], 'id': row['id']}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_lesson_cursor(cursor: str, sort: str) -> Dict[str, Any]:
+    """
+    Decodes a cursor produced by ``encode_lesson_cursor``.
+
+    Args:
+        cursor (str): The cursor token supplied by the client.
+        sort (str): The sort order of the current request.
+
+    Returns:
+        Dict[str, Any]: The cursor payload with ``value`` and ``id`` keys.
+
+    Raises:
+        ValueError: If the cursor is malformed or was issued for another sort.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, dict) or not isinstance(payload.get('value'), (str, int, float)):
+            raise ValueError
+        # Only UUIDs may be interpolated into the keyset filter
+        payload['id'] = str(UUID(str(payload.get('id'))))
+    except (ValueError, binascii.Error):
+        raise ValueError("Invalid cursor")
+    if payload.get('sort') != sort:
+        raise ValueError("Cursor does not match the requested sort order")
+    return payload
+
+def encode_page_cursor(table: str, offset: int) -> str:
+    """
+    Builds an opaque cursor for the page of ``table`` starting at ``offset``.
+
+    Args:
+        table (str): The table being paged.
+        offset (int): Index of the first row of the next page.
+
+    Returns:
+        str: URL-safe cursor token.
+    """
+    payload = json.dumps({'table': table, 'offset': offset}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_page_cursor(cursor: str, table: str) -> int:
+    """
+    Decodes a cursor produced by ``encode_page_cursor``.
+
+    Args:
+        cursor (str): The cursor token supplied by the client.
+        table (str): The table of the current request.
+
+    Returns:
+        int: The offset of the requested page.
+
+    Raises:
+        ValueError: If the cursor is malformed or was issued for another table.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        offset = payload.get('offset') if isinstance(payload, dict) else None
+        if not isinstance(offset, int) or isinstance(offset, bool) or offset < 0:
+            raise ValueError
+    except (ValueError, binascii.Error):
+        raise ValueError("Invalid cursor")
+    if payload.get('table') != table:
+        raise ValueError("Cursor does not match the requested table")
+    return offset
+
+async def fetch_table_page(
+    table: str,
+    offset: int = 0,
+    limit: int = 100,
+    columns: str = '*',
+    filters: Optional[List[Tuple[str, str, Any]]] = None,
+    order: Optional[List[Tuple[str, bool]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Fetches one page of ``table`` with ``range()``.
+
+    Args:
+        table (str): Table to read.
+        offset (int): Index of the first row to return.
+        limit (int): Maximum number of rows to return.
+        columns (str): PostgREST select expression.
+        filters (List[Tuple[str, str, Any]], optional): Filters from ``filters.parse_filter``.
+        order (List[Tuple[str, bool]], optional): Sort from ``filters.parse_order``;
+            the table's key columns always follow it.
+
+    Returns:
+        List[Dict[str, Any]]: The page's rows.
+    """
+    db = get_async_postgrest_client()
+    query = apply_filters(db.table(table).select(columns), filters or [])
+    query = apply_order(query, table, order or [])
+    response = await query.range(offset, offset + limit - 1).execute()
+    return response.data
+
+async def iter_table_rows(
+    table: str,
+    page_size: int,
+    columns: str = '*',
+    filters: Optional[List[Tuple[str, str, Any]]] = None,
+    order: Optional[List[Tuple[str, bool]]] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yields every matching row of ``table`` while holding at most one page in memory.
+
+    Args:
+        table (str): Table to read.
+        page_size (int): Rows fetched per PostgREST request.
+        columns (str): PostgREST select expression.
+        filters (List[Tuple[str, str, Any]], optional): Filters from ``filters.parse_filter``.
+        order (List[Tuple[str, bool]], optional): Sort from ``filters.parse_order``.
+
+    Yields:
+        Dict[str, Any]: Rows in the requested order.
+    """
+    offset = 0
+    while True:
+        rows = await fetch_table_page(
+            table, offset=offset, limit=page_size, columns=columns, filters=filters, order=order
+        )
+        for row in rows:
+            yield row
+        if len(rows) < page_size:
+            return
+        offset += page_size
+
+async def ping() -> None:
+    """Makes the cheapest possible PostgREST round trip to prove the database is reachable."""
+    db = get_async_postgrest_client()
+    await db.table(PROFILES_TABLE).select('id').limit(1).execute()
+
+async def fetch_lessons(
+    search: Optional[str] = None,
+    sort: str = 'newest',
+    category: Optional[str] = None,
+    limit: int = 10,
+    offset: int = 0,
+    cursor: Optional[Dict[str, Any]] = None,
+    columns: str = '*'
+) -> List[Dict[str, Any]]:
+    """
+    Fetches a page of lessons with optional search, sorting and category filter.
+
+    Pages are addressed either by ``offset`` or, for the sorts in
+    ``LESSON_SORTS``, by a decoded keyset ``cursor``. Keyset pages seek
+    directly to ``(sort column, id)`` so deep pages cost the same as the first.
+
+    Args:
+        search (str, optional): Case-insensitive match on title or description.
+        sort (str): One of the keys of ``LESSON_SORTS``.
+        category (str, optional): Category name to filter by.
+        limit (int): Maximum number of rows to return.
+        offset (int): Number of rows to skip; ignored when ``cursor`` is set.
+        cursor (Dict[str, Any], optional): Payload from ``decode_lesson_cursor``.
+        columns (str): PostgREST select expression.
+
+    Returns:
+        List[Dict[str, Any]]: The matching lesson rows.
+    """
+    db = get_async_postgrest_client()
+    if category:
+        # Inner-joined embeds drop lessons without a matching category, so the
+        # filter runs server-side in the same round trip
+        query = db.table(LESSONS_TABLE) \
+            .select(f'{columns},lesson_category!inner(categories!inner(name))') \
+            .eq('lesson_category.categories.name', category)
+    else:
+        query = db.table(LESSONS_TABLE).select(columns)
+
+    if search:
+        query = query.or_(f'title.ilike.*{search}*,description.ilike.*{search}*')
+
+    if sort in LESSON_SORTS:
+        column, desc = LESSON_SORTS[sort]
+        # ``id`` breaks ties so keyset pages never skip or repeat rows
+        query = query.order(column, desc=desc).order('id', desc=desc)
+
+        if cursor is not None:
+            op = 'lt' if desc else 'gt'
+            value = json.dumps(str(cursor['value']))
+            # Sent as its own ``and`` tree so it composes with the search ``or``
+            query.params = query.params.add(
+                'and',
+                f"(or({column}.{op}.{value},and({column}.eq.{value},id.{op}.{cursor['id']})))"
+            )
+
+    query = query.limit(limit)
+    if cursor is None:
+        query = query.offset(offset)
+    response = await query.execute()
+    return response.data
+
+async def search_lessons_ranked(
+    search: str,
+    limit: int = 10,
+    offset: int = 0,
+    columns: str = '*'
+) -> List[Dict[str, Any]]:
+    """
+    Runs a full-text search over lessons ordered by relevance.
+
+    Backed by the ``search_lessons`` function and GIN-indexed ``search_vector``
+    column from the ``lesson_search`` migration. ``search`` accepts web-search
+    syntax (quoted phrases, ``or``, ``-term``).
+
+    Args:
+        search (str): The user's search terms.
+        limit (int): Maximum number of rows to return.
+        offset (int): Number of rows to skip.
+        columns (str): PostgREST select expression applied to the result set.
+
+    Returns:
+        List[Dict[str, Any]]: Matching lesson rows, best match first.
+    """
+    db = get_async_postgrest_client()
+    response = await db.rpc('search_lessons', {
+        'search_query': search,
+        'result_limit': limit,
+        'result_offset': offset,
+    }).select(columns).execute()
+    return response.data
+
+async def fetch_featured_lessons(columns: str = '*') -> List[Dict[str, Any]]:
+    """Fetches all lessons flagged as featured."""
+    db = get_async_postgrest_client()
+    response = await db.table(LESSONS_TABLE).select(columns).eq('is_featured', True).execute()
+    return response.data
+
+async def fetch_lessons_by_creator(creator_id: str, columns: str = '*') -> List[Dict[str, Any]]:
+    """Fetches all lessons created by the given user."""
+    db = get_async_postgrest_client()
+    response = await db.table(LESSONS_TABLE).select(columns).eq('creator_id', creator_id).execute()
+    return response.data
+
+async def fetch_lesson(lesson_id: str, columns: str = '*') -> Optional[Dict[str, Any]]:
+    """
+    Fetches a single lesson by ID.
+
+    Args:
+        lesson_id (str): The lesson's UUID.
+        columns (str): PostgREST select expression.
+
+    Returns:
+        Optional[Dict[str, Any]]: The lesson row, or None if it does not exist.
+    """
+    db = get_async_postgrest_client()
+    response = await db.table(LESSONS_TABLE).select(columns).eq('id', lesson_id).limit(1).execute()
+    return response.data[0] if response.data else None
+
+async def fetch_lesson_creator_account(lesson_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Fetches a lesson's creator and their Stripe account in one round trip.
+
+    The creator's profile is embedded through the ``lessons.creator_id``
+    foreign key, so no second query against ``profiles`` is needed.
+
+    Args:
+        lesson_id (str): The lesson's UUID.
+
+    Returns:
+        Optional[Dict[str, Any]]: ``{'creator_id': ..., 'creator': {'stripe_account_id': ...}}``
+            where ``creator`` is None if the profile is missing, or None if the
+            lesson does not exist.
+    """
+    db = get_async_postgrest_client()
+    response = await db.table(LESSONS_TABLE) \
+        .select('creator_id,creator:profiles!creator_id(stripe_account_id)') \
+        .eq('id', lesson_id) \
+        .limit(1) \
+        .execute()
+    return response.data[0] if response.data else None
+
+async def fetch_lesson_creators(lesson_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Maps each of the given lessons to its creator and current price in one query.
+
+    Args:
+        lesson_ids (List[str]): Lesson UUIDs to look up.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: ``{'creator_id': ..., 'price': ...}`` keyed by lesson ID;
+            missing lessons are omitted.
+    """
+    if not lesson_ids:
+        return {}
+    db = get_async_postgrest_client()
+    response = await db.table(LESSONS_TABLE).select('id,creator_id,price').in_('id', lesson_ids).execute()
+    return {row['id']: {'creator_id': row['creator_id'], 'price': row['price']} for row in response.data}
+
+async def insert_lesson(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Inserts a lesson row and returns the inserted rows."""
+    db = get_async_postgrest_client()
+    response = await db.table(LESSONS_TABLE).insert(data).execute()
+    return response.data
+
+async def upsert_lessons(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Inserts many lesson rows in one request, skipping IDs that already exist.
+
+    Args:
+        rows (List[Dict[str, Any]]): Lesson rows sharing the same set of keys.
+
+    Returns:
+        List[Dict[str, Any]]: The newly inserted rows; existing IDs are not returned.
+    """
+    if not rows:
+        return []
+    db = get_async_postgrest_client()
+    response = await db.table(LESSONS_TABLE).upsert(rows, on_conflict='id', ignore_duplicates=True).execute()
+    return response.data
+
+async def update_lesson(lesson_id: str, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Updates a lesson row and returns the updated rows."""
+    db = get_async_postgrest_client()
+    response = await db.table(LESSONS_TABLE).update(data).eq('id', lesson_id).execute()
+    return response.data
+
+async def fetch_lessons_with_videos(after_id: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+    """
+    Fetches a page of live lessons that have a Vimeo video, in ``id`` order.
+
+    Args:
+        after_id (str, optional): Last ``id`` of the previous page.
+        limit (int): Maximum number of rows to return.
+
+    Returns:
+        List[Dict[str, Any]]: Rows with the ``LESSON_VIDEO_COLUMNS`` columns.
+    """
+    db = get_async_postgrest_client()
+    query = db.table(LESSONS_TABLE) \
+        .select(LESSON_VIDEO_COLUMNS) \
+        .not_.is_('vimeo_video_id', 'null') \
+        .is_('deleted_at', 'null')
+    if after_id is not None:
+        query = query.gt('id', after_id)
+    response = await query.order('id').limit(limit).execute()
+    return response.data
+
+async def soft_delete_lesson(lesson_id: str) -> List[Dict[str, Any]]:
+    """Marks a lesson as deleted and returns the affected rows."""
+    return await update_lesson(lesson_id, {'deleted_at': datetime.utcnow().isoformat()})
+
+async def fetch_profile(user_id: str, columns: str = '*') -> Optional[Dict[str, Any]]:
+    """
+    Fetches a single profile by user ID.
+
+    Args:
+        user_id (str): The profile's UUID.
+        columns (str): PostgREST select expression.
+
+    Returns:
+        Optional[Dict[str, Any]]: The profile row, or None if it does not exist.
+    """
+    db = get_async_postgrest_client()
+    response = await db.table(PROFILES_TABLE).select(columns).eq('id', user_id).limit(1).execute()
+    return response.data[0] if response.data else None
+
+async def fetch_existing_profile_ids(user_ids: List[str]) -> Set[str]:
+    """Returns which of the given user IDs have a profile, in one query."""
+    if not user_ids:
+        return set()
+    db = get_async_postgrest_client()
+    response = await db.table(PROFILES_TABLE).select('id').in_('id', user_ids).execute()
+    return {row['id'] for row in response.data}
+
+async def update_profile(user_id: str, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Updates a profile row and returns the updated rows."""
+    db = get_async_postgrest_client()
+    response = await db.table(PROFILES_TABLE).update(data).eq('id', user_id).execute()
+    return response.data
+
+async def upsert_purchases(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Writes purchase rows in a single request, keyed on ``stripe_session_id``.
+
+    Args:
+        rows (List[Dict[str, Any]]): Purchase rows with distinct session IDs.
+
+    Returns:
+        List[Dict[str, Any]]: The inserted or updated rows.
+    """
+    if not rows:
+        return []
+    db = get_async_postgrest_client()
+    response = await db.table(PURCHASES_TABLE).upsert(rows, on_conflict='stripe_session_id').execute()
+    return response.data
+
+async def fetch_purchased_lesson_ids(user_id: str) -> List[str]:
+    """
+    Fetches the IDs of every lesson the user has a completed purchase for.
+
+    Served by ``idx_purchases_user_id``.
+
+    Args:
+        user_id (str): The buyer's UUID.
+
+    Returns:
+        List[str]: Purchased lesson IDs.
+    """
+    db = get_async_postgrest_client()
+    response = await db.table(PURCHASES_TABLE) \
+        .select('lesson_id') \
+        .eq('user_id', user_id) \
+        .eq('status', 'completed') \
+        .execute()
+    return [row['lesson_id'] for row in response.data]
+
+async def insert_stripe_event(event_id: str, event_type: str, payload: Dict[str, Any]) -> bool:
+    """
+    Records a Stripe webhook event unless it was already received.
+
+    Args:
+        event_id (str): Stripe's ``evt_...`` identifier.
+        event_type (str): The event type, e.g. ``payment_intent.succeeded``.
+        payload (Dict[str, Any]): The full verified event.
+
+    Returns:
+        bool: True if the event is new, False if ``event_id`` already exists.
+    """
+    db = get_async_postgrest_client()
+    response = await db.table(STRIPE_EVENTS_TABLE).upsert(
+        {'id': event_id, 'type': event_type, 'payload': payload},
+        on_conflict='id',
+        ignore_duplicates=True
+    ).execute()
+    # Ignored duplicates are not returned in the representation
+    return bool(response.data)
+
+async def update_stripe_event(event_id: str, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Updates the processing state of a stored Stripe event."""
+    db = get_async_postgrest_client()
+    response = await db.table(STRIPE_EVENTS_TABLE).update(data).eq('id', event_id).execute()
+    return response.data
+
+async def fetch_pending_stripe_events(limit: int = 100) -> List[Dict[str, Any]]:
+    """Fetches stored Stripe events that have not finished processing, oldest first."""
+    db = get_async_postgrest_client()
+    response = await db.table(STRIPE_EVENTS_TABLE) \
+        .select('id,type,payload,attempts') \
+        .eq('status', 'pending') \
+        .order('received_at') \
+        .limit(limit) \
+        .execute()
+    return response.data
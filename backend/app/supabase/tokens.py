@@ -0,0 +1,112 @@
+"""Local verification of Supabase access tokens.
+
+Supabase Auth issues JWTs, so protected routes can validate them in-process
+instead of calling GoTrue's ``/user`` endpoint on every request. Tokens are
+checked for signature, expiry and audience, and the decoded claims are cached
+until the token expires. Projects on the legacy shared secret set
+``SUPABASE_JWT_SECRET``; otherwise signing keys are fetched from the project's
+JWKS endpoint and reused for ``SUPABASE_JWKS_CACHE_SECONDS``.
+
+Because local verification cannot see sign-outs or deleted users, a remote
+check can be re-enabled with ``SUPABASE_AUTH_REVOCATION_CHECK_SECONDS``: a
+cached token is re-validated against Supabase Auth at most once per interval.
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import jwt
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.supabase.client import get_supabase_client
+
+_settings = get_settings()
+
+# Verified claims keyed by raw token; each entry lives until the token's exp
+_claims_cache = TTLCache(maxsize=_settings.JWT_CLAIMS_CACHE_MAXSIZE, ttl=3600)
+_jwks_client: Optional[jwt.PyJWKClient] = None
+
+ASYMMETRIC_ALGORITHMS = ['RS256', 'ES256']
+
+def _get_jwks_client() -> jwt.PyJWKClient:
+    """Returns the shared JWKS client, which caches fetched signing keys."""
+    global _jwks_client
+
+    if _jwks_client is None:
+        settings = get_settings()
+        _jwks_client = jwt.PyJWKClient(
+            f"{settings.SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json",
+            cache_keys=True,
+            lifespan=settings.SUPABASE_JWKS_CACHE_SECONDS
+        )
+    return _jwks_client
+
+async def _resolve_signing_key(token: str) -> Tuple[Any, List[str]]:
+    """
+    Finds the key and algorithms used to verify ``token``.
+
+    Args:
+        token (str): The encoded JWT.
+
+    Returns:
+        Tuple[Any, List[str]]: The verification key and the allowed algorithms.
+    """
+    settings = get_settings()
+    if settings.SUPABASE_JWT_SECRET:
+        return settings.SUPABASE_JWT_SECRET, ['HS256']
+
+    # PyJWKClient fetches over blocking urllib on a cache miss
+    signing_key = await asyncio.to_thread(_get_jwks_client().get_signing_key_from_jwt, token)
+    return signing_key.key, ASYMMETRIC_ALGORITHMS
+
+async def _check_not_revoked(token: str) -> None:
+    """Raises if Supabase Auth no longer accepts ``token``."""
+    client = get_supabase_client()
+    response = await asyncio.to_thread(client.auth.get_user, token)
+    if not response or not getattr(response, 'user', None):
+        raise jwt.InvalidTokenError("Token has been revoked")
+
+async def verify_access_token(token: str) -> Dict[str, Any]:
+    """
+    Verifies a Supabase access token and returns its claims.
+
+    Args:
+        token (str): The bearer token from the Authorization header.
+
+    Returns:
+        Dict[str, Any]: The decoded JWT claims (``sub``, ``email``, ``role``, ...).
+
+    Raises:
+        jwt.InvalidTokenError: If the token is malformed, expired, has the
+            wrong audience or signature, or was revoked remotely.
+    """
+    settings = get_settings()
+    now = time.time()
+
+    entry = _claims_cache.get(token)
+    if entry is None:
+        key, algorithms = await _resolve_signing_key(token)
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=algorithms,
+            audience=settings.SUPABASE_JWT_AUDIENCE,
+            options={'require': ['exp', 'sub']}
+        )
+        entry = {'claims': claims, 'checked_at': now}
+        _claims_cache.set(token, entry, ttl=max(claims['exp'] - now, 0))
+    elif entry['claims']['exp'] <= now:
+        _claims_cache.pop(token)
+        raise jwt.ExpiredSignatureError("Signature has expired")
+
+    interval = settings.SUPABASE_AUTH_REVOCATION_CHECK_SECONDS
+    if interval > 0 and now - entry['checked_at'] >= interval:
+        try:
+            await _check_not_revoked(token)
+        except Exception:
+            _claims_cache.pop(token)
+            raise
+        entry['checked_at'] = now
+
+    return entry['claims']
@@ -2,26 +2,30 @@
 Vimeo API client configuration and management.
 
 This module provides a centralized way to interact with the Vimeo API,
-handling authentication and providing a reusable client instance.
+handling authentication and providing a reusable client instance. Callers
+wrap it with ``ratelimit.rate_limited`` so every request shares one
+rate-limit budget.
 """
 
 from functools import lru_cache
-import pyvimeo
+import vimeo
 from ..core.config import get_settings
 
 @lru_cache()
-def get_vimeo_client() -> pyvimeo.VimeoClient:
+def get_vimeo_client() -> vimeo.VimeoClient:
     """
     Get a cached instance of the Vimeo API client.
     
     Returns:
-        pyvimeo.VimeoClient: Authenticated Vimeo API client instance
+        vimeo.VimeoClient: Authenticated Vimeo API client instance
     """
     settings = get_settings()
     
-    return pyvimeo.VimeoClient(
+    client = vimeo.VimeoClient(
         token=settings.VIMEO_ACCESS_TOKEN,
         key=settings.VIMEO_CLIENT_ID,
         secret=settings.VIMEO_CLIENT_SECRET,
         api_version='3.4'  # Use latest stable API version
     )
+    client.API_ROOT = settings.VIMEO_API_ROOT
+    return client
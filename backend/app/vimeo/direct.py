@@ -0,0 +1,95 @@
+"""
+Direct browser-to-Vimeo uploads.
+
+Instead of sending video bytes through the API, the client asks for an upload
+ticket, sends the file straight to Vimeo's tus ``upload_link`` and then
+reports completion so the video can be linked to its lesson. API nodes only
+make two small Vimeo calls per upload and never touch the file.
+"""
+
+import asyncio
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+
+from .client import get_vimeo_client
+from .pipeline import create_upload_ticket
+from .ratelimit import VimeoRateLimitError, rate_limited
+from .upload import DEFAULT_PRIVACY
+
+VIDEO_FIELDS = 'uri,link,name,upload.status,transcode.status'
+
+async def create_direct_upload(
+    size: int,
+    title: str,
+    description: Optional[str] = None,
+    privacy: Dict = None
+) -> Dict:
+    """
+    Create a Vimeo video and a tus upload link the client can upload to.
+    
+    Args:
+        size: Exact size of the client's file in bytes
+        title: Video title
+        description: Optional video description
+        privacy: Optional privacy settings dict
+        
+    Returns:
+        Dict containing the Vimeo video ID and URI and the tus upload link
+    """
+    client = rate_limited(get_vimeo_client())
+    data = {
+        'name': title,
+        'description': description or '',
+        'privacy': privacy if privacy is not None else DEFAULT_PRIVACY
+    }
+    try:
+        ticket = await asyncio.to_thread(create_upload_ticket, client, size, data)
+    except VimeoRateLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Vimeo API error: {str(e)}")
+    
+    return {
+        "vimeo_id": ticket['uri'].split("/")[-1],
+        "uri": ticket['uri'],
+        "url": ticket.get('link'),
+        "approach": "tus",
+        "upload_link": ticket['upload']['upload_link']
+    }
+
+async def get_uploaded_video(vimeo_id: str) -> Dict:
+    """
+    Fetch a video owned by our Vimeo account and check its upload has finished.
+    
+    Looking the video up under ``/me/videos`` ensures clients can only link
+    videos created through our account.
+    
+    Args:
+        vimeo_id: Vimeo video ID returned with the upload ticket
+        
+    Returns:
+        Dict containing the video's ``uri``, ``link``, ``name`` and statuses
+    """
+    client = rate_limited(get_vimeo_client())
+    try:
+        response = await asyncio.to_thread(
+            client.get,
+            f'/me/videos/{vimeo_id}',
+            params={'fields': VIDEO_FIELDS}
+        )
+    except VimeoRateLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Vimeo API error: {str(e)}")
+    
+    if response.status_code == 404:
+        raise HTTPException(status_code=404, detail="Vimeo video not found")
+    if response.status_code != 200:
+        raise HTTPException(status_code=502, detail=f"Vimeo API error: {response.text}")
+    
+    video = response.json()
+    upload_status = (video.get('upload') or {}).get('status')
+    if upload_status != 'complete':
+        raise HTTPException(status_code=409, detail=f"Upload is not complete (status: {upload_status})")
+    return video
@@ -0,0 +1,205 @@
+"""
+Background upload jobs for Vimeo.
+
+Uploading a large lesson video takes far longer than a proxy will hold a
+request open, so the upload endpoint only queues a job and returns its ID.
+A fixed pool of workers (``VIMEO_UPLOAD_CONCURRENCY``) runs ``upload_video``
+for each job, recording byte-level progress as chunks are confirmed, and
+writes the resulting video back to the lesson when one is given.
+
+Jobs live in memory on the node that accepted the upload, since that node
+holds the file. Queued and running jobs are always kept; only finished jobs
+move into a bounded history (``VIMEO_UPLOAD_JOB_HISTORY``) and remain
+pollable for ``VIMEO_UPLOAD_JOB_TTL_SECONDS``.
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from ..core.cache import TTLCache
+from ..core.config import get_settings
+from ..routes.lessons import invalidate_lesson_listings
+from ..supabase import queries
+from .upload import upload_video
+
+logger = logging.getLogger(__name__)
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+class UploadJobQueue:
+    """
+    Queue and worker pool for Vimeo upload jobs.
+
+    Attributes:
+        workers (int): Number of concurrent worker tasks.
+        maxsize (int): Jobs allowed to wait for a worker.
+    """
+
+    def __init__(self, workers: int, maxsize: int, history: int, ttl: float):
+        self.workers = workers
+        self.maxsize = maxsize
+        self.active: Dict[str, Dict[str, Any]] = {}
+        self.jobs = TTLCache(maxsize=history, ttl=ttl)
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def _ensure_started(self) -> None:
+        """Starts the workers on the running event loop if they are not already running there."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [
+            loop.create_task(self._worker(), name=f"vimeo-upload-{index}")
+            for index in range(self.workers)
+        ]
+
+    async def start(self) -> None:
+        """Starts the upload workers."""
+        self._ensure_started()
+
+    async def stop(self) -> None:
+        """Cancels the workers; queued and running jobs are abandoned."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(
+        self,
+        file_path: str,
+        title: str,
+        description: Optional[str] = None,
+        privacy: Optional[Dict] = None,
+        lesson_id: Optional[str] = None,
+        user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Queues an upload and returns its job record without waiting for it.
+
+        Args:
+            file_path: Path to video file
+            title: Video title
+            description: Optional video description
+            privacy: Optional privacy settings
+            lesson_id: Lesson whose ``vimeo_video_id`` is set once the upload completes
+            user_id: Submitter, the only user allowed to poll the job
+
+        Returns:
+            Dict[str, Any]: The new job record
+
+        Raises:
+            HTTPException: 503 if too many uploads are already waiting
+        """
+        self._ensure_started()
+        job = {
+            'id': str(uuid.uuid4()),
+            'status': 'queued',
+            'title': title,
+            'lesson_id': lesson_id,
+            'user_id': user_id,
+            'bytes_uploaded': 0,
+            'bytes_total': None,
+            'progress': 0.0,
+            'vimeo_id': None,
+            'uri': None,
+            'url': None,
+            'error': None,
+            'created_at': _now(),
+            'updated_at': _now(),
+        }
+        params = {
+            'file_path': file_path,
+            'title': title,
+            'description': description,
+            'privacy': privacy,
+        }
+        try:
+            self._queue.put_nowait((job, params))
+        except asyncio.QueueFull:
+            raise HTTPException(status_code=503, detail="Too many uploads in progress, try again later")
+        self.active[job['id']] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the job record for ``job_id``, or None if it is unknown or expired."""
+        job = self.active.get(job_id)
+        return job if job is not None else self.jobs.get(job_id)
+
+    def depth(self) -> int:
+        """Returns the number of jobs waiting for a worker."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _worker(self) -> None:
+        while True:
+            job, params = await self._queue.get()
+            try:
+                await self._run(job, params)
+            except Exception as e:
+                logger.exception("Upload job %s failed unexpectedly", job['id'])
+                self._fail(job, str(e))
+            finally:
+                self._finish(job)
+                self._queue.task_done()
+
+    async def _run(self, job: Dict[str, Any], params: Dict[str, Any]) -> None:
+        def on_progress(uploaded: int, total: int) -> None:
+            # Called from the upload thread; plain assignments keep the record consistent enough to poll
+            job['bytes_uploaded'] = uploaded
+            job['bytes_total'] = total
+            job['progress'] = round(100.0 * uploaded / total, 1) if total else 100.0
+            job['updated_at'] = _now()
+
+        job['status'] = 'uploading'
+        job['updated_at'] = _now()
+        try:
+            result = await upload_video(on_progress=on_progress, **params)
+        except HTTPException as e:
+            self._fail(job, e.detail)
+            return
+        except Exception as e:
+            self._fail(job, str(e))
+            return
+
+        job.update(vimeo_id=result['vimeo_id'], uri=result['uri'], url=result['url'])
+        if job['lesson_id']:
+            try:
+                await queries.update_lesson(job['lesson_id'], {
+                    'vimeo_video_id': result['vimeo_id'],
+                    'vimeo_url': result['url'],
+                    'updated_at': datetime.utcnow().isoformat()
+                })
+            except Exception as e:
+                self._fail(job, f"Uploaded to Vimeo but could not update lesson: {e}")
+                return
+            invalidate_lesson_listings()
+        job['status'] = 'complete'
+        job['updated_at'] = _now()
+
+    def _finish(self, job: Dict[str, Any]) -> None:
+        """Moves a finished job from the active set into the bounded history."""
+        self.jobs.set(job['id'], job)
+        self.active.pop(job['id'], None)
+
+    @staticmethod
+    def _fail(job: Dict[str, Any], error: str) -> None:
+        logger.warning("Upload job %s failed: %s", job['id'], error)
+        job['status'] = 'failed'
+        job['error'] = error
+        job['updated_at'] = _now()
+
+_settings = get_settings()
+upload_jobs = UploadJobQueue(
+    workers=_settings.VIMEO_UPLOAD_CONCURRENCY,
+    maxsize=_settings.VIMEO_UPLOAD_QUEUE_SIZE,
+    history=_settings.VIMEO_UPLOAD_JOB_HISTORY,
+    ttl=_settings.VIMEO_UPLOAD_JOB_TTL_SECONDS
+)
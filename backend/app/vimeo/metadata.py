@@ -0,0 +1,202 @@
+"""
+Vimeo video metadata for lessons.
+
+Durations, thumbnails and transcode status are resolved in batches of up to
+``VIMEO_METADATA_BATCH_SIZE`` videos per ``/videos?uris=`` call and cached
+for ``VIMEO_METADATA_CACHE_TTL_SECONDS``. A background refresher walks every
+lesson with a video and copies changed metadata onto the lesson row, so
+catalog pages read thumbnails and durations from the database and never
+call Vimeo per view.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..core.cache import TTLCache
+from ..core.config import get_settings
+from ..routes.lessons import invalidate_lesson_listings
+from ..supabase import queries
+from .client import get_vimeo_client
+from .ratelimit import Priority, rate_limited
+
+logger = logging.getLogger(__name__)
+
+VIDEO_FIELDS = 'uri,link,duration,status,pictures.sizes'
+
+class VimeoMetadataError(Exception):
+    """Raised when Vimeo does not return video metadata."""
+
+_settings = get_settings()
+video_metadata_cache = TTLCache(
+    maxsize=_settings.VIMEO_METADATA_CACHE_MAXSIZE,
+    ttl=_settings.VIMEO_METADATA_CACHE_TTL_SECONDS
+)
+
+def _pick_thumbnail(sizes: List[Dict[str, Any]], width: int) -> Optional[str]:
+    """Returns the smallest thumbnail at least ``width`` wide, or the largest available."""
+    if not sizes:
+        return None
+    ordered = sorted(sizes, key=lambda size: size.get('width') or 0)
+    for size in ordered:
+        if (size.get('width') or 0) >= width:
+            return size.get('link')
+    return ordered[-1].get('link')
+
+def _video_metadata(video: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduces a Vimeo video object to the fields lessons store."""
+    return {
+        'vimeo_id': video['uri'].split('/')[-1],
+        'url': video.get('link'),
+        'duration': video.get('duration'),
+        'status': video.get('status'),
+        'thumbnail_url': _pick_thumbnail(
+            (video.get('pictures') or {}).get('sizes') or [],
+            get_settings().VIMEO_THUMBNAIL_WIDTH
+        ),
+    }
+
+def _fetch_batch(vimeo_ids: List[str], priority: Priority) -> List[Dict[str, Any]]:
+    """Fetches up to one batch of videos in a single Vimeo call. Blocking."""
+    response = rate_limited(get_vimeo_client(), priority).get('/videos', params={
+        'uris': ','.join(f'/videos/{vimeo_id}' for vimeo_id in vimeo_ids),
+        'fields': VIDEO_FIELDS,
+        'per_page': len(vimeo_ids),
+    })
+    if response.status_code != 200:
+        raise VimeoMetadataError(f"Unable to fetch videos ({response.status_code}): {response.text}")
+    return response.json().get('data') or []
+
+async def get_videos_metadata(
+    vimeo_ids: Iterable[str],
+    refresh: bool = False,
+    priority: Priority = Priority.INTERACTIVE
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Resolves metadata for many videos, calling Vimeo only for cache misses.
+
+    Args:
+        vimeo_ids (Iterable[str]): Vimeo video IDs.
+        refresh (bool): Ignore cached entries and fetch everything from Vimeo.
+        priority (Priority): Rate-limit priority of the Vimeo calls.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Metadata keyed by video ID. Videos Vimeo
+            does not return (deleted, or not ours) are left out.
+
+    Raises:
+        VimeoMetadataError: If a Vimeo batch request fails.
+        VimeoRateLimitError: If an interactive lookup cannot get rate-limit budget in time.
+    """
+    found: Dict[str, Dict[str, Any]] = {}
+    missing: List[str] = []
+    for vimeo_id in dict.fromkeys(vimeo_ids):
+        cached = None if refresh else video_metadata_cache.get(vimeo_id)
+        if cached is None:
+            missing.append(vimeo_id)
+        else:
+            found[vimeo_id] = cached
+
+    batch_size = get_settings().VIMEO_METADATA_BATCH_SIZE
+    for start in range(0, len(missing), batch_size):
+        videos = await asyncio.to_thread(_fetch_batch, missing[start:start + batch_size], priority)
+        for video in videos:
+            metadata = _video_metadata(video)
+            video_metadata_cache.set(metadata['vimeo_id'], metadata)
+            found[metadata['vimeo_id']] = metadata
+    return found
+
+async def get_video_metadata(vimeo_id: str) -> Optional[Dict[str, Any]]:
+    """Resolves metadata for one video, or None if Vimeo does not return it."""
+    return (await get_videos_metadata([vimeo_id])).get(vimeo_id)
+
+def _lesson_changes(lesson: Dict[str, Any], metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns the lesson columns that differ from the video's current metadata."""
+    current = {
+        'vimeo_url': metadata['url'],
+        'thumbnail_url': metadata['thumbnail_url'],
+        'video_duration': metadata['duration'],
+        'video_status': metadata['status'],
+    }
+    return {
+        column: value
+        for column, value in current.items()
+        if value is not None and lesson.get(column) != value
+    }
+
+class MetadataRefresher:
+    """
+    Periodically copies Vimeo metadata onto lesson rows.
+
+    Attributes:
+        interval (float): Seconds between refresh passes.
+        page_size (int): Lessons read, and videos requested, per step.
+    """
+
+    def __init__(self, interval: float, page_size: int):
+        self.interval = interval
+        self.page_size = page_size
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Starts refreshing in the background; the first pass runs after one interval."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="vimeo-metadata-refresh")
+
+    async def stop(self) -> None:
+        """Cancels the background refresh."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                updated = await self.refresh_once()
+                logger.info("Refreshed Vimeo metadata for %d lessons", updated)
+            except Exception:
+                logger.exception("Vimeo metadata refresh failed")
+
+    async def refresh_once(self) -> int:
+        """
+        Refreshes every lesson with a video, one page at a time.
+
+        Returns:
+            int: Number of lesson rows updated.
+        """
+        updated = 0
+        after_id = None
+        while True:
+            lessons = await queries.fetch_lessons_with_videos(after_id=after_id, limit=self.page_size)
+            if not lessons:
+                return updated
+            after_id = lessons[-1]['id']
+
+            metadata = await get_videos_metadata(
+                (lesson['vimeo_video_id'] for lesson in lessons),
+                refresh=True,
+                priority=Priority.BATCH
+            )
+            writes = []
+            for lesson in lessons:
+                video = metadata.get(lesson['vimeo_video_id'])
+                changes = _lesson_changes(lesson, video) if video else None
+                if changes:
+                    changes['updated_at'] = datetime.utcnow().isoformat()
+                    writes.append(queries.update_lesson(lesson['id'], changes))
+            # Only changed rows are written, so a steady catalog costs no writes
+            await asyncio.gather(*writes)
+            if writes:
+                invalidate_lesson_listings()
+            updated += len(writes)
+
+            if len(lessons) < self.page_size:
+                return updated
+
+metadata_refresher = MetadataRefresher(
+    interval=_settings.VIMEO_METADATA_REFRESH_SECONDS,
+    page_size=_settings.VIMEO_METADATA_BATCH_SIZE
+)
@@ -0,0 +1,225 @@
+"""
+Resumable, chunked video transfer to Vimeo over tus.
+
+Large lesson videos are sent in ``VIMEO_UPLOAD_CHUNK_SIZE`` pieces read
+straight from disk, so only one chunk is ever held in memory. The upload link
+and last confirmed offset are persisted in ``VIMEO_UPLOAD_STATE_DIR``; if the
+process or connection dies, the next attempt for the same file asks Vimeo for
+the current offset and continues from there instead of starting over.
+
+Transfers are blocking (requests/tuspy) and run on a dedicated thread pool of
+``VIMEO_UPLOAD_CONCURRENCY`` workers, which also caps how many uploads run at
+once. tus sends one upload's chunks sequentially, so concurrency applies
+across uploads rather than within one.
+"""
+
+import asyncio
+import functools
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import requests
+from tusclient.exceptions import TusCommunicationError
+from tusclient.uploader import Uploader
+
+from ..core.config import get_settings
+from ..core.metrics import track_dependency
+
+UPLOAD_ENDPOINT = '/me/videos'
+
+# Statuses tus servers answer for upload links that no longer exist
+GONE_STATUSES = (404, 410)
+
+ProgressCallback = Callable[[int, int], None]
+
+class VimeoUploadError(Exception):
+    """Raised when Vimeo rejects an upload ticket or a transfer fails."""
+
+class UploadStateStore:
+    """
+    Persists in-progress upload links and offsets as small JSON files.
+
+    Entries are keyed by a fingerprint of the file's path, size and
+    modification time, so an edited file never resumes a stale upload.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    @staticmethod
+    def fingerprint(file_path: str) -> str:
+        stat = os.stat(file_path)
+        key = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key)) as handle:
+                return json.load(handle)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def set(self, key: str, state: Dict[str, Any]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._path(key) + '.tmp'
+        with open(tmp_path, 'w') as handle:
+            json.dump(state, handle)
+        os.replace(tmp_path, self._path(key))
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+def create_upload_ticket(client, size: int, data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Creates a Vimeo video and reserves a tus upload link for it.
+
+    Args:
+        client: Authenticated ``vimeo.VimeoClient``.
+        size (int): Exact size of the file in bytes.
+        data (Dict[str, Any]): Video fields such as ``name``, ``description`` and ``privacy``.
+
+    Returns:
+        Dict[str, Any]: Vimeo's response with ``uri``, ``link``, ``name`` and ``upload.upload_link``.
+
+    Raises:
+        VimeoUploadError: If Vimeo does not create the upload.
+    """
+    body = dict(data, upload={'approach': 'tus', 'size': str(size)})
+    response = client.post(UPLOAD_ENDPOINT, data=body, params={'fields': 'uri,link,name,upload'})
+    if response.status_code not in (200, 201):
+        raise VimeoUploadError(f"Unable to create upload ({response.status_code}): {response.text}")
+    return response.json()
+
+def _transfer(
+    file_path: str,
+    upload_link: str,
+    on_chunk: Callable[[int, int], None],
+    settings
+) -> None:
+    """Sends the remaining bytes of ``file_path`` to ``upload_link`` chunk by chunk."""
+    with open(file_path, 'rb') as stream:
+        # Constructing the uploader asks Vimeo for the confirmed offset (HEAD)
+        uploader = Uploader(
+            file_stream=stream,
+            url=upload_link,
+            chunk_size=settings.VIMEO_UPLOAD_CHUNK_SIZE,
+            retries=settings.VIMEO_UPLOAD_RETRIES,
+            retry_delay=settings.VIMEO_UPLOAD_RETRY_DELAY_SECONDS
+        )
+        total = uploader.get_file_size()
+        on_chunk(uploader.offset, total)
+        while uploader.offset < total:
+            with track_dependency('vimeo', 'PATCH tus upload chunk'):
+                uploader.upload_chunk()
+            on_chunk(uploader.offset, total)
+
+def _upload_link_gone(upload_link: str) -> bool:
+    """Asks the tus server whether ``upload_link`` still exists; network errors count as 'still there'."""
+    try:
+        with track_dependency('vimeo', 'HEAD tus upload'):
+            response = requests.head(upload_link, headers={'Tus-Resumable': '1.0.0'}, timeout=30)
+    except requests.RequestException:
+        return False
+    return response.status_code in GONE_STATUSES
+
+def upload_file(
+    client,
+    file_path: str,
+    data: Dict[str, Any],
+    on_progress: Optional[ProgressCallback] = None,
+    store: Optional[UploadStateStore] = None
+) -> Dict[str, Any]:
+    """
+    Uploads a local file to Vimeo, resuming a previous attempt if one exists.
+
+    Blocking; use ``run_upload`` from async code.
+
+    Args:
+        client: Authenticated ``vimeo.VimeoClient``.
+        file_path (str): Path of the video on local disk.
+        data (Dict[str, Any]): Video fields sent when the upload is created.
+        on_progress (Callable[[int, int], None], optional): Called with
+            (bytes uploaded, total bytes) after every chunk.
+        store (UploadStateStore, optional): Where offsets are persisted.
+
+    Returns:
+        Dict[str, Any]: The video's ``uri``, ``link`` and ``name``.
+
+    Raises:
+        VimeoUploadError: If the upload cannot be created or completed. Unless
+            Vimeo has discarded the upload link, its offset is kept so the next
+            attempt resumes instead of creating another video.
+    """
+    settings = get_settings()
+    store = store or UploadStateStore(settings.VIMEO_UPLOAD_STATE_DIR)
+    key = store.fingerprint(file_path)
+    state = store.get(key)
+
+    def record(offset: int, total: int) -> None:
+        state['offset'] = offset
+        store.set(key, state)
+        if on_progress:
+            on_progress(offset, total)
+
+    if state is not None:
+        try:
+            _transfer(file_path, state['upload_link'], record, settings)
+        except TusCommunicationError as e:
+            if not _upload_link_gone(state['upload_link']):
+                # Transient failure: keep the state so the next attempt resumes
+                raise VimeoUploadError(f"Upload transfer failed: {e}") from e
+            # The upload link expired or was discarded; start a fresh upload
+            store.delete(key)
+            state = None
+
+    if state is None:
+        ticket = create_upload_ticket(client, os.path.getsize(file_path), data)
+        state = {
+            'uri': ticket['uri'],
+            'link': ticket.get('link'),
+            'name': ticket.get('name', data.get('name')),
+            'upload_link': ticket['upload']['upload_link'],
+            'offset': 0,
+        }
+        store.set(key, state)
+        try:
+            _transfer(file_path, state['upload_link'], record, settings)
+        except TusCommunicationError as e:
+            raise VimeoUploadError(f"Upload transfer failed: {e}") from e
+
+    store.delete(key)
+    return {'uri': state['uri'], 'link': state['link'], 'name': state['name']}
+
+_upload_executor: Optional[ThreadPoolExecutor] = None
+
+def _get_upload_executor() -> ThreadPoolExecutor:
+    global _upload_executor
+
+    if _upload_executor is None:
+        _upload_executor = ThreadPoolExecutor(
+            max_workers=get_settings().VIMEO_UPLOAD_CONCURRENCY,
+            thread_name_prefix="vimeo-upload"
+        )
+    return _upload_executor
+
+async def run_upload(
+    client,
+    file_path: str,
+    data: Dict[str, Any],
+    on_progress: Optional[ProgressCallback] = None
+) -> Dict[str, Any]:
+    """Runs ``upload_file`` on the upload thread pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_upload_executor(),
+        functools.partial(upload_file, client, file_path, data, on_progress)
+    )
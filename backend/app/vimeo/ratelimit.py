@@ -0,0 +1,273 @@
+"""
+Rate-limit-aware scheduling for Vimeo API calls.
+
+Vimeo enforces a per-app request quota and reports it on every response in
+``X-RateLimit-Limit``, ``X-RateLimit-Remaining`` and ``X-RateLimit-Reset``.
+All API calls go through one shared ``VimeoRateLimiter``, which combines a
+local token bucket (smooths bursts) with the quota Vimeo reports:
+
+- When the remaining quota reaches zero, every call waits for the reset.
+- Batch calls (metadata refreshes, background uploads) also wait once the
+  remaining quota drops to ``VIMEO_RATE_LIMIT_BATCH_RESERVE``, leaving that
+  headroom to interactive calls.
+- Waiting calls are served in priority order, interactive first.
+- Interactive calls give up after ``VIMEO_RATE_LIMIT_MAX_WAIT_SECONDS``
+  rather than hold a request open; batch calls wait as long as needed.
+
+The client runs in worker threads, so the limiter is thread-safe and blocks
+the calling thread, never the event loop.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime, timezone
+from enum import IntEnum
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from vimeo.exceptions import APIRateLimitExceededFailure
+
+from ..core.config import get_settings
+from ..core.metrics import dependency_operation, track_dependency
+
+class Priority(IntEnum):
+    """Scheduling priority of a Vimeo call; lower values are served first."""
+    INTERACTIVE = 0
+    BATCH = 1
+
+class VimeoRateLimitError(Exception):
+    """Raised when a call cannot get rate-limit budget within its wait limit."""
+
+def _int_header(headers: Mapping[str, Any], name: str) -> Optional[int]:
+    value = headers.get(name)
+    if not isinstance(value, str):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+def _reset_header(headers: Mapping[str, Any]) -> Optional[datetime]:
+    value = headers.get('X-RateLimit-Reset')
+    if not isinstance(value, str):
+        return None
+    try:
+        reset = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return reset if reset.tzinfo else reset.replace(tzinfo=timezone.utc)
+
+class VimeoRateLimiter:
+    """
+    Token bucket plus Vimeo's reported quota, shared by all Vimeo calls.
+
+    Attributes:
+        rate (float): Tokens added per second.
+        burst (int): Bucket capacity.
+        batch_reserve (int): Remaining quota below which batch calls wait for the reset.
+        max_wait (Dict[Priority, Optional[float]]): Longest wait per priority; None waits indefinitely.
+        backoff (float): Pause after a 429 when Vimeo has not told us when the window resets.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        batch_reserve: int,
+        max_wait: Dict[Priority, Optional[float]],
+        backoff: float,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.batch_reserve = batch_reserve
+        self.max_wait = max_wait
+        self.backoff = backoff
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._tokens = float(burst)
+        self._refilled_at = clock()
+        self._waiting: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._limit: Optional[int] = None
+        self._remaining: Optional[int] = None
+        self._reset: Optional[datetime] = None
+        self._reset_at: Optional[float] = None
+        self._paused_until = 0.0
+        self._calls = 0
+        self._throttled = 0
+        self._rejected = 0
+        self._rate_limited = 0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _wait_time(self, priority: Priority, now: float) -> float:
+        """Seconds until a call of ``priority`` may proceed, or 0 if it may go now."""
+        if now < self._paused_until:
+            return self._paused_until - now
+        window_open = self._reset_at is not None and now < self._reset_at
+        if window_open and self._remaining is not None:
+            if self._remaining <= 0:
+                return self._reset_at - now
+            if priority == Priority.BATCH and self._remaining <= self.batch_reserve:
+                return self._reset_at - now
+        if self._tokens < 1:
+            return (1 - self._tokens) / self.rate
+        return 0.0
+
+    def acquire(self, priority: Priority = Priority.INTERACTIVE) -> None:
+        """
+        Blocks until a call of ``priority`` may be made.
+
+        Raises:
+            VimeoRateLimitError: If budget does not free up within the priority's wait limit.
+        """
+        with self._cond:
+            entry = (int(priority), next(self._sequence))
+            heapq.heappush(self._waiting, entry)
+            max_wait = self.max_wait.get(priority)
+            deadline = None if max_wait is None else self._clock() + max_wait
+            throttled = False
+            try:
+                while True:
+                    now = self._clock()
+                    self._refill(now)
+                    # Only the highest-priority waiter may take budget
+                    wait = self._wait_time(priority, now) if self._waiting[0] == entry else None
+                    if wait == 0:
+                        self._tokens -= 1
+                        if self._remaining is not None:
+                            self._remaining -= 1
+                        self._calls += 1
+                        self._throttled += throttled
+                        return
+                    if deadline is not None and now + (wait or 0) > deadline:
+                        self._rejected += 1
+                        raise VimeoRateLimitError("Vimeo rate limit budget exhausted, try again later")
+                    throttled = True
+                    if deadline is not None:
+                        wait = min(wait, deadline - now) if wait is not None else deadline - now
+                    self._cond.wait(wait)
+            finally:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+
+    def update(self, headers: Mapping[str, Any]) -> None:
+        """Records the quota Vimeo reported on a response."""
+        limit = _int_header(headers, 'X-RateLimit-Limit')
+        remaining = _int_header(headers, 'X-RateLimit-Remaining')
+        reset = _reset_header(headers)
+        with self._cond:
+            now = self._clock()
+            if limit is not None:
+                self._limit = limit
+            if remaining is not None:
+                self._remaining = remaining
+            if reset is not None:
+                self._reset = reset
+                self._reset_at = now + max(0.0, (reset - datetime.now(timezone.utc)).total_seconds())
+            self._cond.notify_all()
+
+    def pause(self) -> None:
+        """Stops all calls until the quota resets after Vimeo answered 429."""
+        with self._cond:
+            now = self._clock()
+            self._rate_limited += 1
+            if self._reset_at is not None and self._reset_at > now:
+                self._paused_until = self._reset_at
+            else:
+                self._paused_until = now + self.backoff
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns remaining budget and throttling counters for monitoring."""
+        with self._cond:
+            self._refill(self._clock())
+            waiting = {priority.name.lower(): 0 for priority in Priority}
+            for priority, _ in self._waiting:
+                waiting[Priority(priority).name.lower()] += 1
+            return {
+                'limit': self._limit,
+                'remaining': self._remaining,
+                'reset': self._reset.isoformat() if self._reset else None,
+                'tokens': round(self._tokens, 2),
+                'burst': self.burst,
+                'rate_per_second': self.rate,
+                'waiting': waiting,
+                'calls': self._calls,
+                'throttled': self._throttled,
+                'rejected': self._rejected,
+                'rate_limited': self._rate_limited,
+            }
+
+class RateLimitedClient:
+    """
+    Wraps a ``vimeo.VimeoClient`` so its HTTP calls go through a rate limiter
+    and are timed as ``vimeo`` dependency calls.
+
+    Quota headers are read in a ``requests`` response hook, which the client
+    forwards. The hook also sees 429 responses, which PyVimeo turns into an
+    ``APIRateLimitExceededFailure`` that does not keep the response.
+
+    Non-HTTP attributes are passed through to the wrapped client.
+    """
+
+    HTTP_METHODS = {'head', 'get', 'post', 'put', 'patch', 'options', 'delete'}
+
+    def __init__(self, client, limiter: VimeoRateLimiter, priority: Priority = Priority.INTERACTIVE):
+        self._client = client
+        self._limiter = limiter
+        self._priority = priority
+
+    def __getattr__(self, name: str) -> Any:
+        if name not in self.HTTP_METHODS:
+            return getattr(self._client, name)
+        method = getattr(self._client, name)
+
+        def caller(url, *args, **kwargs):
+            self._limiter.acquire(self._priority)
+            kwargs['hooks'] = self._with_quota_hook(kwargs.get('hooks'))
+            # Timed after acquire so rate-limit waits are not blamed on Vimeo
+            with track_dependency('vimeo', dependency_operation(name, url)) as call:
+                try:
+                    response = method(url, *args, **kwargs)
+                except APIRateLimitExceededFailure:
+                    # The hook has already recorded the 429's reset time
+                    self._limiter.pause()
+                    raise
+                status = getattr(response, 'status_code', None)
+                call['error'] = isinstance(status, int) and status >= 500
+            return response
+        return caller
+
+    def _record_quota(self, response, *args, **kwargs):
+        self._limiter.update(getattr(response, 'headers', None) or {})
+        return response
+
+    def _with_quota_hook(self, hooks: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
+        """Returns ``hooks`` with the quota recorder appended to the response hooks."""
+        hooks = dict(hooks or {})
+        existing = hooks.get('response') or []
+        if callable(existing):
+            existing = [existing]
+        hooks['response'] = [*existing, self._record_quota]
+        return hooks
+
+_settings = get_settings()
+vimeo_rate_limiter = VimeoRateLimiter(
+    rate=_settings.VIMEO_RATE_LIMIT_PER_SECOND,
+    burst=_settings.VIMEO_RATE_LIMIT_BURST,
+    batch_reserve=_settings.VIMEO_RATE_LIMIT_BATCH_RESERVE,
+    max_wait={
+        Priority.INTERACTIVE: _settings.VIMEO_RATE_LIMIT_MAX_WAIT_SECONDS,
+        Priority.BATCH: None,
+    },
+    backoff=_settings.VIMEO_RATE_LIMIT_BACKOFF_SECONDS
+)
+
+def rate_limited(client, priority: Priority = Priority.INTERACTIVE) -> RateLimitedClient:
+    """Returns ``client`` scheduled through the shared Vimeo rate limiter."""
+    return RateLimitedClient(client, vimeo_rate_limiter, priority)
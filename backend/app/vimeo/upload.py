@@ -2,19 +2,29 @@
 Handles video upload operations for Vimeo integration.
 
 This module manages secure video uploads to Vimeo with proper privacy settings
-and metadata management.
+and metadata management. The transfer itself is chunked, resumable and runs
+off the event loop; see ``pipeline``.
 """
 
 import os
 from typing import Dict, Optional
 from fastapi import HTTPException
 from .client import get_vimeo_client
+from .pipeline import ProgressCallback, run_upload
+from .ratelimit import Priority, rate_limited
+
+# Lesson videos are private unless the caller says otherwise
+DEFAULT_PRIVACY = {
+    'view': 'disable',  # Private video
+    'embed': 'private'  # Private embedding
+}
 
 async def upload_video(
     file_path: str,
     title: str,
     description: Optional[str] = None,
-    privacy: Dict = None
+    privacy: Dict = None,
+    on_progress: Optional[ProgressCallback] = None
 ) -> Dict:
     """
     Upload a video file to Vimeo with specified settings.
@@ -24,18 +34,18 @@ async def upload_video(
         title: Video title
         description: Optional video description
         privacy: Optional privacy settings dict
+        on_progress: Optional callback receiving (bytes uploaded, total bytes)
+            after each chunk; called from the upload thread
         
     Returns:
         Dict containing video metadata including Vimeo video ID
     """
-    client = get_vimeo_client()
+    # Uploads run as background jobs, so ticket creation yields to interactive calls
+    client = rate_limited(get_vimeo_client(), Priority.BATCH)
     
     # Default to private videos
     if privacy is None:
-        privacy = {
-            'view': 'disable',  # Private video
-            'embed': 'private'  # Private embedding
-        }
+        privacy = DEFAULT_PRIVACY
     
     try:
         # Initialize upload
@@ -56,13 +66,15 @@ async def upload_video(
         
         # Attempt upload
         try:
-            video_data = await client.upload(
+            video_data = await run_upload(
+                client,
                 file_path,
                 data={
                     'name': title,
                     'description': description or '',
                     'privacy': privacy
-                }
+                },
+                on_progress=on_progress
             )
         except Exception as upload_error:
             print(f"Upload error details: {str(upload_error)}")
@@ -72,14 +84,11 @@ async def upload_video(
         print("Upload completed successfully!")
         print(f"Video data received: {video_data}")
         
-        # Extract video ID from the URI string
-        video_id = video_data.split('/')[-1] if isinstance(video_data, str) else ''
-        
         return {
-            "vimeo_id": video_data.uri.split("/")[-1],
-            "uri": video_data.uri,
-            "url": video_data.link,
-            "title": video_data.name
+            "vimeo_id": video_data['uri'].split("/")[-1],
+            "uri": video_data['uri'],
+            "url": video_data['link'],
+            "title": video_data['name']
         }
         
     except FileNotFoundError as e:
@@ -6,6 +6,7 @@ It handles the following key responsibilities:
 1. Application Initialization:
    - Creates and configures the FastAPI application instance
    - Sets up CORS middleware for cross-origin requests
+   - Records Prometheus request metrics and serves them at /metrics
    - Registers all API routers with appropriate prefixes
 
 2. Configuration Management:
@@ -30,16 +31,23 @@ Environment Variables:
 from fastapi import FastAPI, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import get_settings
+from app.core.metrics import MetricsMiddleware, metrics_endpoint
 from app.routes.base import router as base_router
 from app.routes.supabase import router as supabase_router
 from app.stripe.onboarding import router as stripe_onboarding_router
 from app.stripe.payments import router as stripe_payments_router 
 from app.stripe.dashboard import router as stripe_dashboard_router
 from app.stripe.payouts import router as stripe_payouts_router
-from app.stripe.webhooks import router as stripe_webhooks_router
+from app.stripe.webhooks import router as stripe_webhooks_router, webhook_queue
 from app.stripe.compliance import router as stripe_compliance_router
+from app.stripe.executor import router as stripe_executor_router
 from app.routes.lessons import router as lessons_router
 from app.routes.vimeo import router as vimeo_router
+from app.vimeo.jobs import upload_jobs
+from app.vimeo.metadata import metadata_refresher
+from app.routes.entitlements import router as entitlements_router
+from app.supabase.client import close_async_postgrest_client
+from app.supabase.health import supabase_readiness
 
 # Initialize application settings
 APP_SETTINGS = get_settings()
@@ -77,8 +85,13 @@ def create_fastapi_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
     )
 
+    # Per-route request counts, latency and in-flight gauges; scraped from /metrics
+    app.add_middleware(MetricsMiddleware, router=app.router)
+    app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+
     # Define API version prefix
     api_v1_prefix = "/api/v1"
     
@@ -90,13 +103,34 @@ def create_fastapi_app() -> FastAPI:
     
     # Register lessons router first to avoid route conflicts
     app.include_router(lessons_router, prefix=f"{api_v1_prefix}", tags=["lessons"])
-    app.include_router(vimeo_router, prefix=f"{api_v1_prefix}/vimeo", tags=["vimeo"])
+    app.include_router(vimeo_router, prefix=f"{api_v1_prefix}", tags=["vimeo"])
+    app.include_router(entitlements_router, prefix=f"{api_v1_prefix}", tags=["entitlements"])
     app.include_router(stripe_onboarding_router, prefix=f"{api_v1_prefix}/stripe", tags=["stripe"])
     app.include_router(stripe_payments_router, prefix=f"{api_v1_prefix}/stripe", tags=["stripe"])
     app.include_router(stripe_dashboard_router, prefix=f"{api_v1_prefix}/stripe", tags=["stripe"])
     app.include_router(stripe_payouts_router, prefix=f"{api_v1_prefix}/stripe", tags=["stripe"])
     app.include_router(stripe_webhooks_router, prefix=f"{api_v1_prefix}/stripe", tags=["stripe"])
     app.include_router(stripe_compliance_router, prefix=f"{api_v1_prefix}/stripe", tags=["stripe"])
+    app.include_router(stripe_executor_router, prefix=f"{api_v1_prefix}/stripe", tags=["stripe"])
+
+    # Process stored Stripe events in the background for the worker's lifetime
+    app.add_event_handler("startup", webhook_queue.start)
+    app.add_event_handler("shutdown", webhook_queue.stop)
+
+    # Run queued Vimeo uploads in the background
+    app.add_event_handler("startup", upload_jobs.start)
+    app.add_event_handler("shutdown", upload_jobs.stop)
+
+    # Keep lesson thumbnails, durations and video status in sync with Vimeo
+    app.add_event_handler("startup", metadata_refresher.start)
+    app.add_event_handler("shutdown", metadata_refresher.stop)
+
+    # Check Supabase connectivity in the background; /api/ready reports the result
+    app.add_event_handler("startup", supabase_readiness.start)
+    app.add_event_handler("shutdown", supabase_readiness.stop)
+
+    # Release pooled Supabase connections when the worker stops
+    app.add_event_handler("shutdown", close_async_postgrest_client)
 
     return app
 
@@ -55,3 +55,131 @@ class TestBaseEndpoints:
             assert get_settings is not None
         except ImportError as e:
             pytest.fail(f"Failed to import backend module: {e}")
+
+
+class TestLocalTokenVerification:
+    """Test class for local Supabase JWT verification on protected routes."""
+
+    SECRET = "test-jwt-secret-with-enough-length"
+
+    def _settings(self, **overrides):
+        from app.core.config import Settings
+        return Settings(SUPABASE_SERVICE_KEY="x" * 32, SUPABASE_JWT_SECRET=self.SECRET, **overrides)
+
+    def _token(self, expires_in=3600, audience="authenticated", sub="user-123"):
+        import time
+        import jwt
+        claims = {"sub": sub, "aud": audience, "exp": int(time.time()) + expires_in, "role": "authenticated"}
+        return jwt.encode(claims, self.SECRET, algorithm="HS256")
+
+    def test_valid_token_is_verified_without_supabase_call(self, test_client):
+        """A correctly signed token is accepted without contacting Supabase Auth."""
+        from unittest import mock
+        token = self._token(sub="user-valid")
+        with mock.patch("app.supabase.tokens.get_settings", return_value=self._settings()), \
+             mock.patch("app.supabase.tokens.get_supabase_client") as mock_client:
+            response = test_client.get("/api/protected", headers={"Authorization": f"Bearer {token}"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["user"]["sub"] == "user-valid"
+        mock_client.assert_not_called()
+
+    def test_claims_are_cached_per_token(self):
+        """Repeated verification of the same token decodes it only once."""
+        import asyncio
+        from unittest import mock
+        from app.supabase import tokens
+        token = self._token(sub="user-cached")
+        with mock.patch("app.supabase.tokens.get_settings", return_value=self._settings()), \
+             mock.patch("app.supabase.tokens.jwt.decode", wraps=tokens.jwt.decode) as decode:
+            asyncio.run(tokens.verify_access_token(token))
+            asyncio.run(tokens.verify_access_token(token))
+
+        assert decode.call_count == 1
+
+    def test_expired_and_wrong_audience_tokens_are_rejected(self, test_client):
+        """Expired tokens and tokens for another audience return 401."""
+        from unittest import mock
+        with mock.patch("app.supabase.tokens.get_settings", return_value=self._settings()):
+            for token in (self._token(expires_in=-10), self._token(audience="other")):
+                response = test_client.get("/api/protected", headers={"Authorization": f"Bearer {token}"})
+                assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_revocation_check_runs_after_interval(self):
+        """With a revocation interval, a stale cached token is re-checked remotely."""
+        import asyncio
+        import jwt
+        from unittest import mock
+        from app.supabase import tokens
+        token = self._token(sub="user-revoked")
+        settings = self._settings(SUPABASE_AUTH_REVOCATION_CHECK_SECONDS=30)
+        with mock.patch("app.supabase.tokens.get_settings", return_value=settings), \
+             mock.patch("app.supabase.tokens.get_supabase_client") as mock_client, \
+             mock.patch("app.supabase.tokens.time.time") as mock_time:
+            mock_client.return_value.auth.get_user.return_value = None
+            mock_time.return_value = 1_000.0
+            with mock.patch("app.supabase.tokens.jwt.decode", return_value={"sub": "user-revoked", "exp": 10_000}):
+                asyncio.run(tokens.verify_access_token(token))
+            mock_client.return_value.auth.get_user.assert_not_called()
+
+            mock_time.return_value = 1_031.0
+            with pytest.raises(jwt.InvalidTokenError):
+                asyncio.run(tokens.verify_access_token(token))
+
+
+class TestLazyStartup:
+    """Test class for lazy Supabase initialization and the readiness endpoint."""
+
+    def test_import_does_not_create_supabase_client(self):
+        """Importing the app must not construct a Supabase client or touch the network."""
+        import os
+        import subprocess
+        import sys
+        from pathlib import Path
+        script = (
+            "import supabase\n"
+            "def fail(*args, **kwargs): raise AssertionError('client created at import')\n"
+            "supabase.create_client = fail\n"
+            "import main\n"
+            "from app.supabase import client\n"
+            "assert client._supabase_client is None\n"
+        )
+        env = dict(os.environ, SUPABASE_SERVICE_KEY=os.environ.get("SUPABASE_SERVICE_KEY") or "x" * 32)
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=str(Path(__file__).parent.parent),
+            env=env,
+            capture_output=True,
+            text=True
+        )
+        assert result.returncode == 0, result.stderr
+
+    def test_ready_when_supabase_reachable(self, test_client):
+        """Readiness reports ok once the Supabase check succeeds."""
+        import asyncio
+        from unittest import mock
+        from app.supabase.health import supabase_readiness
+        with mock.patch("app.supabase.health.queries.ping", new=mock.AsyncMock()):
+            result = asyncio.run(supabase_readiness.check())
+            response = test_client.get("/api/ready")
+        assert result["status"] == "ok"
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["status"] == "ready"
+
+    def test_not_ready_when_supabase_times_out(self):
+        """A hung Supabase marks the instance not ready within the check timeout."""
+        import asyncio
+        import time
+        from unittest import mock
+        from app.supabase.health import SupabaseReadiness
+
+        async def hang():
+            await asyncio.sleep(10)
+
+        readiness = SupabaseReadiness(timeout=0.05, max_age=60)
+        started = time.monotonic()
+        with mock.patch("app.supabase.health.queries.ping", new=hang):
+            result = asyncio.run(readiness.status())
+        assert time.monotonic() - started < 1
+        assert result["status"] == "error"
+        assert "Timed out" in result["error"]
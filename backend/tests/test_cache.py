@@ -0,0 +1,71 @@
+"""Test suite for the in-process TTL/LRU cache."""
+
+from app.core.cache import TTLCache
+
+class FakeClock:
+    """Manually advanced clock for deterministic expiry tests."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestTTLCache:
+    """Test class for TTLCache behaviour."""
+
+    def test_hit_and_miss_counters(self):
+        """Lookups are counted as hits or misses."""
+        cache = TTLCache(maxsize=2, ttl=10)
+        assert cache.get("a") is None
+        cache.set("a", [1])
+        assert cache.get("a") == [1]
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["size"] == 1
+
+    def test_entries_expire_after_ttl(self):
+        """Entries older than the TTL are treated as misses."""
+        clock = FakeClock()
+        cache = TTLCache(maxsize=2, ttl=5, timer=clock)
+        cache.set("a", "value")
+        clock.now = 4.9
+        assert cache.get("a") == "value"
+        clock.now = 5.0
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """The cache never grows past maxsize and evicts the coldest entry."""
+        cache = TTLCache(maxsize=2, ttl=10)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_invalidate_with_predicate(self):
+        """Only matching keys are removed when a predicate is given."""
+        cache = TTLCache(maxsize=4, ttl=10)
+        cache.set(("x", 1), 1)
+        cache.set(("y", 1), 2)
+        assert cache.invalidate(lambda key: key[0] == "x") == 1
+        assert cache.get(("y", 1)) == 2
+        assert cache.invalidate() == 1
+        assert len(cache) == 0
+
+    def test_set_skips_values_fetched_before_invalidate(self):
+        """A value read before an invalidation is not cached after it."""
+        cache = TTLCache(maxsize=4, ttl=10)
+        generation = cache.generation
+        cache.invalidate()
+        assert cache.set("page", "stale", generation=generation) is False
+        assert cache.get("page") is None
+        assert cache.set("page", "fresh", generation=cache.generation) is True
+        assert cache.get("page") == "fresh"
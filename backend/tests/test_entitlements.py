@@ -0,0 +1,92 @@
+"""Test suite for lesson entitlement lookups."""
+
+import pytest
+from unittest import mock
+
+USER_ID = "123e4567-e89b-12d3-a456-426614174002"
+LESSON_ID = "123e4567-e89b-12d3-a456-426614174000"
+OTHER_LESSON_ID = "123e4567-e89b-12d3-a456-426614174003"
+
+class TestEntitlementService:
+    """Test class for the cached user -> purchased lessons index."""
+
+    def setup_method(self):
+        from app.supabase.entitlements import entitlement_cache
+        entitlement_cache.invalidate()
+
+    @pytest.mark.asyncio
+    async def test_repeated_checks_query_once(self):
+        """A user's purchases are loaded once and then answered from memory."""
+        from app.supabase import entitlements
+
+        fetch = mock.AsyncMock(return_value=[LESSON_ID])
+        with mock.patch("app.supabase.entitlements.queries.fetch_purchased_lesson_ids", new=fetch):
+            assert await entitlements.has_purchased(USER_ID, LESSON_ID)
+            assert await entitlements.has_purchased(USER_ID, LESSON_ID)
+            assert not await entitlements.has_purchased(USER_ID, OTHER_LESSON_ID)
+
+        fetch.assert_awaited_once_with(USER_ID)
+
+    @pytest.mark.asyncio
+    async def test_fulfilled_purchase_updates_cached_set(self):
+        """Recording a purchase grants access without re-reading the database."""
+        from app.supabase import entitlements
+
+        fetch = mock.AsyncMock(return_value=[])
+        with mock.patch("app.supabase.entitlements.queries.fetch_purchased_lesson_ids", new=fetch):
+            assert not await entitlements.has_purchased(USER_ID, LESSON_ID)
+            entitlements.record_purchase(USER_ID, LESSON_ID)
+            assert await entitlements.has_purchased(USER_ID, LESSON_ID)
+
+        assert fetch.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_stale_denial_rechecks_database(self):
+        """Denied lookups re-read purchases once the cached set is old enough."""
+        from app.supabase import entitlements
+
+        fetch = mock.AsyncMock(side_effect=[[], [LESSON_ID]])
+        with mock.patch("app.supabase.entitlements.queries.fetch_purchased_lesson_ids", new=fetch), \
+             mock.patch.object(entitlements._settings, "ENTITLEMENT_RECHECK_SECONDS", 0):
+            assert not await entitlements.has_purchased(USER_ID, LESSON_ID)
+            assert await entitlements.has_purchased(USER_ID, LESSON_ID)
+
+        assert fetch.await_count == 2
+
+class TestEntitlementRoutes:
+    """Test class for entitlement endpoints."""
+
+    def setup_method(self):
+        from app.supabase.entitlements import entitlement_cache
+        entitlement_cache.invalidate()
+
+    def _authenticate(self, test_client):
+        from app.routes.base import get_current_user
+        test_client.app.dependency_overrides[get_current_user] = lambda: {"sub": USER_ID}
+
+    def test_check_lesson_access(self, test_client):
+        """The access endpoint reports whether the current user bought the lesson."""
+        self._authenticate(test_client)
+        fetch = mock.AsyncMock(return_value=[LESSON_ID])
+        with mock.patch("app.supabase.entitlements.queries.fetch_purchased_lesson_ids", new=fetch):
+            owned = test_client.get(f"/api/v1/entitlements/lessons/{LESSON_ID}")
+            missing = test_client.get(f"/api/v1/entitlements/lessons/{OTHER_LESSON_ID}")
+
+        assert owned.json() == {"lesson_id": LESSON_ID, "has_access": True}
+        assert missing.json()["has_access"] is False
+        assert fetch.await_count == 1
+
+    def test_list_entitlements(self, test_client):
+        """The list endpoint returns the current user's purchased lessons."""
+        self._authenticate(test_client)
+        fetch = mock.AsyncMock(return_value=[OTHER_LESSON_ID, LESSON_ID])
+        with mock.patch("app.supabase.entitlements.queries.fetch_purchased_lesson_ids", new=fetch):
+            response = test_client.get("/api/v1/entitlements")
+
+        assert response.status_code == 200
+        assert response.json()["lesson_ids"] == sorted([LESSON_ID, OTHER_LESSON_ID])
+
+    def test_requires_authentication(self, test_client):
+        """Entitlement checks need a bearer token."""
+        response = test_client.get(f"/api/v1/entitlements/lessons/{LESSON_ID}")
+        assert response.status_code == 403
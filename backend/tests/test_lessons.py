@@ -0,0 +1,379 @@
+"""Test suite for the lessons router and its async data-access layer."""
+
+import pytest
+from unittest import mock
+
+LESSON_ROW = {
+    "id": "123e4567-e89b-12d3-a456-426614174000",
+    "title": "Test Lesson",
+    "description": "Test Description",
+    "price": 10.00,
+    "content": "Lesson content",
+    "content_url": None,
+    "thumbnail_url": None,
+    "vimeo_video_id": None,
+    "vimeo_url": None,
+    "creator_id": "123e4567-e89b-12d3-a456-426614174001",
+    "stripe_product_id": None,
+    "stripe_price_id": None,
+    "deleted_at": None,
+    "version": 1,
+    "created_at": "2024-01-01T00:00:00+00:00",
+}
+
+def make_async_postgrest(rows):
+    """Build a mock async PostgREST client whose queries resolve to ``rows``."""
+    builder = mock.MagicMock()
+    for method in ("select", "eq", "or_", "order", "limit", "offset", "insert", "update"):
+        getattr(builder, method).return_value = builder
+    builder.execute = mock.AsyncMock(return_value=mock.MagicMock(data=rows))
+    client = mock.MagicMock()
+    client.table.return_value = builder
+    return client, builder
+
+class TestLessonQueries:
+    """Test class for the async lesson data-access layer."""
+
+    @pytest.mark.asyncio
+    async def test_fetch_lessons_awaits_pooled_client(self):
+        """Listing lessons awaits the async client and applies sort and paging."""
+        from app.supabase import queries
+
+        client, builder = make_async_postgrest([LESSON_ROW])
+        with mock.patch("app.supabase.queries.get_async_postgrest_client", return_value=client):
+            rows = await queries.fetch_lessons(sort="price-low", limit=5, offset=10)
+
+        assert rows == [LESSON_ROW]
+        client.table.assert_called_once_with("lessons")
+        builder.order.assert_any_call("price", desc=False)
+        builder.order.assert_called_with("id", desc=False)
+        builder.limit.assert_called_once_with(5)
+        builder.offset.assert_called_once_with(10)
+        builder.execute.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_fetch_lesson_returns_none_when_missing(self):
+        """A lookup for a missing lesson returns None instead of raising."""
+        from app.supabase import queries
+
+        client, _ = make_async_postgrest([])
+        with mock.patch("app.supabase.queries.get_async_postgrest_client", return_value=client):
+            assert await queries.fetch_lesson("missing") is None
+
+class TestLessonRoutes:
+    """Test class for lesson endpoints."""
+
+    def test_get_lesson(self, test_client):
+        """Fetching a lesson returns the row from the data-access layer."""
+        with mock.patch("app.routes.lessons.queries.fetch_lesson", new=mock.AsyncMock(return_value=LESSON_ROW)):
+            response = test_client.get(f"/api/v1/lessons/{LESSON_ROW['id']}")
+
+        assert response.status_code == 200
+        assert response.json()["title"] == LESSON_ROW["title"]
+
+    def test_get_lesson_not_found(self, test_client):
+        """Fetching a missing lesson returns a 404."""
+        with mock.patch("app.routes.lessons.queries.fetch_lesson", new=mock.AsyncMock(return_value=None)):
+            response = test_client.get("/api/v1/lessons/missing")
+
+        assert response.status_code == 404
+
+class TestLessonListingCache:
+    """Test class for the lesson listing read-through cache."""
+
+    def setup_method(self):
+        from app.routes.lessons import lesson_list_cache
+        lesson_list_cache.invalidate()
+
+    def test_repeated_listing_is_served_from_cache(self, test_client):
+        """Identical listing requests hit the database once."""
+        fetch = mock.AsyncMock(return_value=[LESSON_ROW])
+        with mock.patch("app.routes.lessons.queries.fetch_lessons", new=fetch):
+            first = test_client.get("/api/v1/lessons?sort=oldest")
+            second = test_client.get("/api/v1/lessons?sort=oldest")
+            stats = test_client.get("/api/v1/lessons/cache/stats").json()
+
+        assert first.json() == second.json()
+        assert fetch.await_count == 1
+        assert stats["hits"] >= 1
+
+    def test_listing_returns_summary_projection(self, test_client):
+        """Listings select summary columns and omit the lesson content."""
+        from app.supabase.queries import LESSON_SUMMARY_COLUMNS
+
+        fetch = mock.AsyncMock(return_value=[LESSON_ROW])
+        with mock.patch("app.routes.lessons.queries.fetch_lessons", new=fetch):
+            response = test_client.get("/api/v1/lessons")
+
+        assert fetch.await_args.kwargs["columns"] == LESSON_SUMMARY_COLUMNS
+        assert "content" not in LESSON_SUMMARY_COLUMNS.split(",")
+        assert "content" not in response.json()[0]
+        assert response.json()[0]["title"] == LESSON_ROW["title"]
+
+    def test_write_invalidates_cached_listings(self, test_client):
+        """Deleting a lesson forces the next listing to re-query."""
+        fetch = mock.AsyncMock(return_value=[LESSON_ROW])
+        delete = mock.AsyncMock(return_value=[LESSON_ROW])
+        with mock.patch("app.routes.lessons.queries.fetch_lessons", new=fetch), \
+             mock.patch("app.routes.lessons.queries.soft_delete_lesson", new=delete):
+            test_client.get("/api/v1/lessons")
+            test_client.delete(f"/api/v1/lessons/{LESSON_ROW['id']}")
+            test_client.get("/api/v1/lessons")
+
+        assert fetch.await_count == 2
+
+    def test_write_during_read_does_not_cache_stale_page(self, test_client):
+        """A listing whose fetch overlaps a write is returned but not cached."""
+        from app.routes.lessons import invalidate_lesson_listings
+
+        async def fetch_racing_write(**kwargs):
+            # The write commits and invalidates while this read is still in flight
+            invalidate_lesson_listings()
+            return [LESSON_ROW]
+
+        fetch = mock.AsyncMock(side_effect=fetch_racing_write)
+        with mock.patch("app.routes.lessons.queries.fetch_lessons", new=fetch):
+            test_client.get("/api/v1/lessons")
+            fetch.side_effect = None
+            fetch.return_value = [dict(LESSON_ROW, title="Updated Lesson")]
+            response = test_client.get("/api/v1/lessons")
+
+        assert fetch.await_count == 2
+        assert response.json()[0]["title"] == "Updated Lesson"
+
+class TestLessonCursorPagination:
+    """Test class for keyset (cursor) pagination of lesson listings."""
+
+    def setup_method(self):
+        from app.routes.lessons import lesson_list_cache
+        lesson_list_cache.invalidate()
+
+    def test_cursor_round_trip(self):
+        """A cursor decodes back to the sort value and id of the last row."""
+        from app.supabase import queries
+
+        token = queries.encode_lesson_cursor(LESSON_ROW, "price-high")
+        payload = queries.decode_lesson_cursor(token, "price-high")
+        assert payload["value"] == LESSON_ROW["price"]
+        assert payload["id"] == LESSON_ROW["id"]
+
+        with pytest.raises(ValueError):
+            queries.decode_lesson_cursor(token, "newest")
+        with pytest.raises(ValueError):
+            queries.decode_lesson_cursor("not-a-cursor", "price-high")
+
+    @pytest.mark.asyncio
+    async def test_fetch_lessons_seeks_past_cursor(self):
+        """Cursor pages filter on (column, id) instead of using an offset."""
+        from app.supabase import queries
+
+        client, builder = make_async_postgrest([])
+        params = builder.params = mock.MagicMock()
+        cursor = {"value": "2024-01-01T00:00:00+00:00", "id": LESSON_ROW["id"]}
+        with mock.patch("app.supabase.queries.get_async_postgrest_client", return_value=client):
+            await queries.fetch_lessons(sort="newest", limit=5, cursor=cursor)
+
+        builder.offset.assert_not_called()
+        key, tree = params.add.call_args.args
+        assert key == "and"
+        assert tree == (
+            '(or(created_at.lt."2024-01-01T00:00:00+00:00",'
+            f'and(created_at.eq."2024-01-01T00:00:00+00:00",id.lt.{LESSON_ROW["id"]})))'
+        )
+
+    def test_full_page_returns_next_cursor(self, test_client):
+        """A full page exposes a cursor that is accepted for the next request."""
+        fetch = mock.AsyncMock(return_value=[LESSON_ROW])
+        with mock.patch("app.routes.lessons.queries.fetch_lessons", new=fetch):
+            first = test_client.get("/api/v1/lessons?limit=1")
+            next_cursor = first.headers["X-Next-Cursor"]
+            second = test_client.get(f"/api/v1/lessons?limit=1&cursor={next_cursor}")
+
+        assert second.status_code == 200
+        assert fetch.await_args.kwargs["cursor"]["id"] == LESSON_ROW["id"]
+
+    def test_invalid_cursor_is_rejected(self, test_client):
+        """A malformed cursor returns a 400 instead of querying the database."""
+        response = test_client.get("/api/v1/lessons?cursor=garbage")
+        assert response.status_code == 400
+
+class TestLessonRankedSearch:
+    """Test class for full-text ranked lesson search."""
+
+    def setup_method(self):
+        from app.routes.lessons import lesson_list_cache
+        lesson_list_cache.invalidate()
+
+    def test_ranked_search_uses_search_function(self, test_client):
+        """Ranked mode calls the search_lessons RPC instead of ILIKE filters."""
+        ranked = mock.AsyncMock(return_value=[LESSON_ROW])
+        substring = mock.AsyncMock(return_value=[])
+        with mock.patch("app.routes.lessons.queries.search_lessons_ranked", new=ranked), \
+             mock.patch("app.routes.lessons.queries.fetch_lessons", new=substring):
+            response = test_client.get("/api/v1/lessons?search=yo-yo&search_mode=ranked&limit=5")
+
+        assert response.status_code == 200
+        assert response.json()[0]["id"] == LESSON_ROW["id"]
+        ranked.assert_awaited_once()
+        assert ranked.await_args.kwargs["offset"] == 0
+        substring.assert_not_awaited()
+
+    def test_ranked_search_rejects_cursor(self, test_client):
+        """Ranked results are relevance ordered, so keyset cursors do not apply."""
+        response = test_client.get("/api/v1/lessons?search=yo-yo&search_mode=ranked&cursor=abc")
+        assert response.status_code == 400
+
+    def test_lesson_search_migration_is_registered(self):
+        """The search index migration can be applied by section name."""
+        from app.supabase.migrations import MIGRATIONS
+
+        sql = MIGRATIONS["lesson_search"]
+        assert "USING GIN (search_vector)" in sql
+        assert "FUNCTION search_lessons" in sql
+
+class TestLessonCategoryFilter:
+    """Test class for server-side category filtering."""
+
+    @pytest.mark.asyncio
+    async def test_category_filter_uses_inner_embed(self):
+        """Category filters embed lesson_category/categories with !inner joins."""
+        from app.supabase import queries
+
+        client, builder = make_async_postgrest([LESSON_ROW])
+        with mock.patch("app.supabase.queries.get_async_postgrest_client", return_value=client):
+            rows = await queries.fetch_lessons(category="Tricks", columns="id,title")
+
+        assert rows == [LESSON_ROW]
+        builder.select.assert_called_once_with(
+            "id,title,lesson_category!inner(categories!inner(name))"
+        )
+        builder.eq.assert_called_once_with("lesson_category.categories.name", "Tricks")
+        builder.execute.assert_awaited_once()
+
+    def test_category_index_migration_is_registered(self):
+        """The reverse lesson_category index can be applied by section name."""
+        from app.supabase.migrations import MIGRATIONS
+
+        assert "ON lesson_category(category_id" in MIGRATIONS["lesson_category_index"]
+
+class TestLessonBulkImport:
+    """Test class for streaming bulk lesson imports."""
+
+    CREATOR_ID = LESSON_ROW["creator_id"]
+
+    async def _lines(self, text):
+        for line in text.split("\n"):
+            yield line
+
+    async def _collect(self, text, fmt):
+        from app.supabase.lesson_import import iter_lesson_records
+        return [record async for record in iter_lesson_records(self._lines(text), fmt)]
+
+    @pytest.mark.asyncio
+    async def test_csv_records_support_quoted_newlines(self):
+        """CSV rows may span lines inside quotes and empty cells are dropped."""
+        text = 'title,description,price\n"Yo-yo","Loops\nand tricks",10\nBasics,,5\n'
+        records = await self._collect(text, "csv")
+
+        assert records[0] == (2, {"title": "Yo-yo", "description": "Loops\nand tricks", "price": "10"}, None)
+        assert records[1] == (4, {"title": "Basics", "price": "5"}, None)
+
+    @pytest.mark.asyncio
+    async def test_import_chunks_inserts_and_reports_bad_lines(self):
+        """Valid lessons are written in chunked inserts; bad lines are reported, not fatal."""
+        from app.supabase import lesson_import
+
+        lines = [
+            '{"title": "One", "price": 10}',
+            'not json',
+            '{"title": "Two", "price": -1}',
+            '{"title": "Three", "price": 5}',
+            '{"title": "Four", "price": 7}',
+        ]
+        upsert = mock.AsyncMock(side_effect=lambda rows: rows)
+        product = mock.AsyncMock(side_effect=lambda row: (f"prod_{row['title']}", f"price_{row['title']}"))
+        with mock.patch("app.supabase.lesson_import.get_settings", return_value=mock.MagicMock(
+                 LESSON_IMPORT_CHUNK_SIZE=2, LESSON_IMPORT_STRIPE_CONCURRENCY=4)), \
+             mock.patch("app.supabase.lesson_import.queries.fetch_lesson_creators", new=mock.AsyncMock(return_value={})), \
+             mock.patch("app.supabase.lesson_import.queries.fetch_existing_profile_ids",
+                        new=mock.AsyncMock(return_value={self.CREATOR_ID})), \
+             mock.patch("app.supabase.lesson_import.queries.upsert_lessons", new=upsert), \
+             mock.patch("app.supabase.lesson_import.create_lesson_product", new=product):
+            summary = await lesson_import.import_lessons(
+                lesson_import.iter_lesson_records(self._lines("\n".join(lines)), "jsonl"),
+                default_creator_id=self.CREATOR_ID
+            )
+
+        assert summary["valid"] == 3
+        assert summary["inserted"] == 3
+        assert [error["line"] for error in summary["errors"]] == [2, 3]
+        assert [len(call.args[0]) for call in upsert.await_args_list] == [2, 1]
+        assert upsert.await_args_list[0].args[0][0]["stripe_price_id"] == "price_One"
+        assert product.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_reimport_skips_existing_lessons(self):
+        """Lessons whose derived id already exists are not sent to Stripe again."""
+        from app.supabase import lesson_import
+
+        text = '{"title": "One", "price": 10}'
+        row = lesson_import._lesson_row(lesson_import.LessonImport(title="One", price=10, creator_id=self.CREATOR_ID))
+        product = mock.AsyncMock()
+        with mock.patch("app.supabase.lesson_import.queries.fetch_lesson_creators",
+                        new=mock.AsyncMock(return_value={row["id"]: self.CREATOR_ID})), \
+             mock.patch("app.supabase.lesson_import.queries.fetch_existing_profile_ids",
+                        new=mock.AsyncMock(return_value={self.CREATOR_ID})), \
+             mock.patch("app.supabase.lesson_import.queries.upsert_lessons", new=mock.AsyncMock(return_value=[])), \
+             mock.patch("app.supabase.lesson_import.create_lesson_product", new=product):
+            summary = await lesson_import.import_lessons(
+                lesson_import.iter_lesson_records(self._lines(text), "jsonl"),
+                default_creator_id=self.CREATOR_ID
+            )
+
+        assert summary["existing"] == 1
+        product.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_stripe_requests_use_idempotency_keys(self):
+        """Products and prices are created with keys scoped to the lesson id."""
+        from types import SimpleNamespace
+        from app.stripe.products import create_lesson_product
+
+        with mock.patch("app.stripe.products.stripe.Product.create", return_value=SimpleNamespace(id="prod_1")) as product, \
+             mock.patch("app.stripe.products.stripe.Price.create", return_value=SimpleNamespace(id="price_1")) as price:
+            ids = await create_lesson_product({"id": LESSON_ROW["id"], "title": "One", "price": 12.5})
+
+        assert ids == ("prod_1", "price_1")
+        assert product.call_args.kwargs["idempotency_key"] == f"lesson-product-{LESSON_ROW['id']}"
+        assert price.call_args.kwargs["unit_amount"] == 1250
+        assert price.call_args.kwargs["idempotency_key"] == f"lesson-price-{LESSON_ROW['id']}"
+
+    def test_import_endpoint_requires_admin(self, test_client):
+        """Signed-in users without the admin role cannot import lessons."""
+        from app.routes.base import get_current_user
+        test_client.app.dependency_overrides[get_current_user] = lambda: {
+            "sub": self.CREATOR_ID, "user_metadata": {"role": "admin"}
+        }
+        with mock.patch("app.supabase.lesson_import.queries.upsert_lessons") as upsert:
+            response = test_client.post("/api/v1/lessons/import?format=csv", content="title,price\nOne,10\n")
+        test_client.app.dependency_overrides.clear()
+        anonymous = test_client.post("/api/v1/lessons/import?format=csv", content="title,price\nOne,10\n")
+
+        assert response.status_code == 403
+        assert anonymous.status_code == 403
+        upsert.assert_not_called()
+
+    def test_import_endpoint_dry_run(self, test_client):
+        """A dry run validates the streamed body without writing anything."""
+        from app.routes.base import get_current_user
+        test_client.app.dependency_overrides[get_current_user] = lambda: {
+            "sub": "admin-1", "app_metadata": {"role": "admin"}
+        }
+        body = 'title,price,creator_id\nOne,10,{creator}\nTwo,abc,{creator}\n'.format(creator=self.CREATOR_ID)
+        with mock.patch("app.supabase.lesson_import.queries.upsert_lessons") as upsert:
+            response = test_client.post("/api/v1/lessons/import?format=csv&dry_run=true", content=body)
+
+        assert response.status_code == 200
+        assert response.json()["valid"] == 1
+        assert response.json()["errors"][0]["line"] == 3
+        upsert.assert_not_called()
@@ -0,0 +1,101 @@
+"""Test suite for request metrics, dependency timers and the /metrics endpoint."""
+
+import pytest
+from fastapi import status
+
+from app.routes.base import get_current_user
+
+
+class TestMetrics:
+    """Test class for request metrics, dependency timers and the /metrics endpoint."""
+
+    @staticmethod
+    def _sample(name, **labels):
+        from prometheus_client import REGISTRY
+        return REGISTRY.get_sample_value(name, labels) or 0.0
+
+    def test_requests_are_labelled_by_route_template(self, test_client):
+        """Counts and latency use the matched route template and status, not the raw path."""
+        labels = {"method": "GET", "route": "/api/v1/vimeo/jobs/{job_id}"}
+        before = self._sample("http_requests_total", status="404", **labels)
+        observed = self._sample("http_request_duration_seconds_count", **labels)
+        test_client.app.dependency_overrides[get_current_user] = lambda: {"sub": "user-1"}
+
+        test_client.get("/api/v1/vimeo/jobs/first-missing-job")
+        test_client.get("/api/v1/vimeo/jobs/second-missing-job")
+        response = test_client.get("/metrics")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'route="/api/v1/vimeo/jobs/{job_id}"' in response.text
+        assert "first-missing-job" not in response.text
+        assert self._sample("http_requests_total", status="404", **labels) == before + 2
+        assert self._sample("http_request_duration_seconds_count", **labels) == observed + 2
+
+    def test_in_flight_gauge_tracks_open_requests(self):
+        """The in-progress gauge is raised while a request runs and lowered after, even on errors."""
+        import asyncio
+        from starlette.routing import Route, Router
+        from app.core.metrics import MetricsMiddleware
+        labels = {"method": "GET", "route": "/items/{item_id}"}
+        seen = []
+
+        async def handler(scope, receive, send):
+            seen.append(self._sample("http_requests_in_progress", **labels))
+            raise RuntimeError("boom")
+
+        router = Router(routes=[Route("/items/{item_id}", handler)])
+        middleware = MetricsMiddleware(handler, router=router)
+        scope = {"type": "http", "method": "GET", "path": "/items/7", "root_path": "", "query_string": b"", "headers": []}
+        errors = self._sample("http_requests_total", status="500", **labels)
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(middleware(scope, None, None))
+
+        assert seen == [1.0]
+        assert self._sample("http_requests_in_progress", **labels) == 0.0
+        assert self._sample("http_requests_total", status="500", **labels) == errors + 1
+
+    def test_non_standard_methods_share_one_label(self, test_client):
+        """Arbitrary request methods are counted as "other" instead of adding label values."""
+        from prometheus_client import REGISTRY
+        labels = {"method": "other", "route": "/api/v1/vimeo/jobs/{job_id}"}
+        before = self._sample("http_request_duration_seconds_count", **labels)
+
+        test_client.request("FROBNICATE", "/api/v1/vimeo/jobs/missing-job")
+        test_client.request("PROPFIND", "/api/v1/vimeo/jobs/missing-job")
+
+        assert self._sample("http_request_duration_seconds_count", **labels) == before + 2
+        methods = {
+            sample.labels["method"]
+            for metric in REGISTRY.collect() if metric.name == "http_requests"
+            for sample in metric.samples
+        }
+        assert not methods & {"FROBNICATE", "PROPFIND"}
+
+    def test_dependency_operations_have_bounded_labels(self):
+        """IDs in dependency URLs are collapsed so each endpoint is one label value."""
+        from app.core.metrics import dependency_operation
+        assert dependency_operation("get", "https://api.stripe.com/v1/accounts/acct_1Abc?expand=x") == "GET /v1/accounts/{id}"
+        assert dependency_operation("patch", "/videos/123456") == "PATCH /videos/{id}"
+        assert dependency_operation("GET", "http://db.example.com/rest/v1/lessons?id=eq.1") == "GET /rest/v1/lessons"
+
+    def test_supabase_calls_are_timed(self):
+        """The PostgREST transport times each call and counts 5xx responses as errors."""
+        import asyncio
+        import httpx
+        from app.supabase.client import InstrumentedAsyncTransport
+        labels = {"dependency": "supabase", "operation": "GET /rest/v1/profiles"}
+        calls = self._sample("dependency_request_duration_seconds_count", **labels)
+        errors = self._sample("dependency_request_errors_total", **labels)
+        responses = iter([200, 503])
+        transport = InstrumentedAsyncTransport(httpx.MockTransport(lambda request: httpx.Response(next(responses))))
+
+        async def fetch_twice():
+            async with httpx.AsyncClient(transport=transport) as client:
+                await client.get("http://db.example.com/rest/v1/profiles?select=id")
+                await client.get("http://db.example.com/rest/v1/profiles?select=id")
+        asyncio.run(fetch_twice())
+
+        assert self._sample("dependency_request_duration_seconds_count", **labels) == calls + 2
+        assert self._sample("dependency_request_errors_total", **labels) == errors + 1
@@ -1,11 +1,13 @@
 """Test suite for Stripe integration functionality."""
 
+import asyncio
 import json
 import pytest
 import stripe
 from fastapi import HTTPException
 from types import SimpleNamespace
 from unittest import mock
+from app.routes.base import get_current_user
 
 @pytest.mark.stripe
 class TestStripeIntegration:
@@ -17,6 +19,16 @@ class TestStripeIntegration:
     TEST_UNIT_AMOUNT = 1000
     TEST_CURRENCY = "usd"
     TEST_QUANTITY = 1
+    BUYER_ID = "buyer-1"
+
+    @pytest.fixture
+    def buyer(self, test_client):
+        """Signs the request in as BUYER_ID and serves a $20 lesson."""
+        test_client.app.dependency_overrides[get_current_user] = lambda: {"sub": self.BUYER_ID}
+        lesson = {'id': 'lesson-1', 'title': self.TEST_PRODUCT_NAME, 'price': 20.0, 'deleted_at': None}
+        with mock.patch('app.stripe.payments.queries.fetch_lesson', new=mock.AsyncMock(return_value=lesson)):
+            yield lesson
+        test_client.app.dependency_overrides.clear()
     TEST_WEEKLY_ANCHOR = "monday"
     TEST_DELAY_DAYS = 7
 
@@ -134,7 +146,7 @@ class TestStripeIntegration:
 
     @mock.patch('app.stripe.payments.stripe.checkout.Session.create')
     @mock.patch('app.stripe.payments.get_lesson_creator_stripe_account')
-    def test_checkout_session_creation(self, mock_get_account, mock_checkout, test_client):
+    def test_checkout_session_creation(self, mock_get_account, mock_checkout, test_client, buyer):
         """Test Stripe checkout session creation for payments.
 
         Verifies that the checkout session endpoint:
@@ -180,7 +192,7 @@ class TestStripeIntegration:
 
     @mock.patch('app.stripe.payments.stripe.checkout.Session.create')
     @mock.patch('app.stripe.payments.get_lesson_creator_stripe_account')
-    def test_payments(self, mock_get_account, mock_checkout, test_client):
+    def test_payments(self, mock_get_account, mock_checkout, test_client, buyer):
         """Test complete Stripe payment processing flow.
     
     Combines checkout session creation tests to verify the full
@@ -223,7 +235,7 @@ class TestStripeIntegration:
 
     @mock.patch('app.stripe.payments.get_lesson_creator_stripe_account')
     @mock.patch('app.stripe.payments.stripe.checkout.Session.create')
-    async def test_checkout_session_fee_calculation(self, mock_checkout, mock_get_account, test_client):
+    async def test_checkout_session_fee_calculation(self, mock_checkout, mock_get_account, test_client, buyer):
         """Test that checkout session correctly calculates 10% application fee.
         
         Verifies that:
@@ -276,6 +288,48 @@ class TestStripeIntegration:
         assert call_kwargs['payment_intent_data']['application_fee_amount'] == expected_fee
         assert call_kwargs['payment_intent_data']['transfer_data']['destination'] == test_connected_account
 
+    @mock.patch('app.stripe.payments.stripe.checkout.Session.create')
+    @mock.patch('app.stripe.payments.get_lesson_creator_stripe_account')
+    def test_checkout_session_is_priced_from_the_lesson(self, mock_get_account, mock_checkout, test_client, buyer):
+        """Client-sent prices and buyer ids are ignored in favour of the lesson row and the token."""
+        mock_get_account.return_value = "acct_test123"
+        mock_checkout.return_value = SimpleNamespace(id='test_session_123')
+
+        response = test_client.post(
+            '/api/v1/stripe/checkout_session',
+            json={
+                'line_items': [{
+                    'price_data': {
+                        'currency': 'jpy',
+                        'product_data': {'name': 'Anything'},
+                        'unit_amount': 1,
+                    },
+                    'quantity': 5,
+                }],
+                'metadata': {'lesson_id': buyer['id'], 'user_id': 'someone-else'},
+                'success_url': 'https://example.com/success',
+                'cancel_url': 'https://example.com/cancel'
+            }
+        )
+
+        assert response.status_code == 200
+        kwargs = mock_checkout.call_args.kwargs
+        assert kwargs['line_items'] == [{
+            'price_data': {
+                'currency': 'usd',
+                'product_data': {'name': self.TEST_PRODUCT_NAME},
+                'unit_amount': 2000,
+            },
+            'quantity': 1,
+        }]
+        assert kwargs['metadata'] == {
+            'lesson_id': buyer['id'],
+            'user_id': self.BUYER_ID,
+            'unit_amount': '2000',
+            'currency': 'usd',
+        }
+        assert kwargs['payment_intent_data']['application_fee_amount'] == 200
+
     @pytest.mark.asyncio
     async def test_payout_configuration(self, test_client):
         """Test Stripe payout schedule configuration.
@@ -327,8 +381,10 @@ class TestStripeIntegration:
         response = test_client.post('/api/v1/stripe/payouts', json=request_data)
         assert response.status_code == 200
 
+    @mock.patch('app.stripe.webhooks.webhook_queue.submit', new_callable=mock.AsyncMock)
+    @mock.patch('app.stripe.webhooks.queries.insert_stripe_event', new_callable=mock.AsyncMock, return_value=True)
     @mock.patch('app.stripe.webhooks._verify_stripe_event')
-    def test_webhook_validation(self, mock_verify, test_client):
+    def test_webhook_validation(self, mock_verify, mock_insert, mock_submit, test_client):
         """Test Stripe webhook signature validation.
 
         Verifies that the webhook endpoint:
@@ -342,14 +398,16 @@ class TestStripeIntegration:
         Raises:
             AssertionError: If response code isn't 400 for invalid signature
         """
-        mock_verify.return_value = {'type': 'payment_intent.succeeded', 'data': {'object': {}}}
+        mock_verify.return_value = {'id': 'evt_validation', 'type': 'payment_intent.succeeded', 'data': {'object': {}}}
         payload = json.dumps({'type': 'payment_intent.succeeded', 'data': {'object': {}}})
         headers = {'Stripe-Signature': 'test_signature'}
         response = test_client.post('/api/v1/stripe/webhooks', data=payload, headers=headers)
         assert response.status_code == 200
 
+    @mock.patch('app.stripe.webhooks.webhook_queue.submit', new_callable=mock.AsyncMock)
+    @mock.patch('app.stripe.webhooks.queries.insert_stripe_event', new_callable=mock.AsyncMock, return_value=True)
     @mock.patch('app.stripe.webhooks._verify_stripe_event')
-    def test_webhook(self, mock_verify, test_client):
+    def test_webhook(self, mock_verify, mock_insert, mock_submit, test_client):
         """Test complete Stripe webhook handling flow.
     
     Combines webhook validation tests to verify the full
@@ -363,7 +421,7 @@ class TestStripeIntegration:
     Raises:
         AssertionError: If any part of the webhook flow fails
     """
-        mock_verify.return_value = {'type': 'payment_intent.succeeded', 'data': {'object': {}}}
+        mock_verify.return_value = {'id': 'evt_webhook', 'type': 'payment_intent.succeeded', 'data': {'object': {}}}
         payload = json.dumps({'type': 'payment_intent.succeeded', 'data': {'object': {}}})
         headers = {'Stripe-Signature': 'test_signature'}
         response = test_client.post('/api/v1/stripe/webhooks', data=payload, headers=headers)
@@ -436,25 +494,26 @@ class TestStripeDashboard:
 class TestStripePayments:
     """Test class for Stripe payment processing."""
 
-    @mock.patch('app.stripe.payments.get_lesson_creator_stripe_account')
-    def test_checkout_session_missing_line_items(self, mock_get_account, test_client):
-        """Test checkout session creation without line items."""
-        response = test_client.post(
-            '/api/v1/stripe/checkout_session',
-            json={'metadata': {'lesson_id': 'test123'}}
-        )
-        assert response.status_code == 400
-        assert 'line_items' in response.json()['detail']
+    @pytest.fixture(autouse=True)
+    def _authenticate(self, test_client):
+        test_client.app.dependency_overrides[get_current_user] = lambda: {"sub": "buyer-1"}
+        yield
+        test_client.app.dependency_overrides.clear()
 
     @mock.patch('app.stripe.payments.get_lesson_creator_stripe_account')
     def test_checkout_session_missing_lesson_id(self, mock_get_account, test_client):
         """Test checkout session creation without lesson ID."""
         response = test_client.post(
             '/api/v1/stripe/checkout_session',
-            json={'line_items': [{'price_data': {'unit_amount': 1000}}]}
+            json={
+                'metadata': {},
+                'success_url': 'https://example.com/success',
+                'cancel_url': 'https://example.com/cancel'
+            }
         )
         assert response.status_code == 400
         assert 'lesson_id' in response.json()['detail']
+        mock_get_account.assert_not_called()
 
     @mock.patch('app.stripe.payments.get_lesson_creator_stripe_account')
     def test_creator_not_onboarded(self, mock_get_account, test_client):
@@ -467,8 +526,9 @@ class TestStripePayments:
         response = test_client.post(
             '/api/v1/stripe/checkout_session',
             json={
-                'line_items': [{'price_data': {'unit_amount': 1000}}],
-                'metadata': {'lesson_id': 'test123'}
+                'metadata': {'lesson_id': 'test123'},
+                'success_url': 'https://example.com/success',
+                'cancel_url': 'https://example.com/cancel'
             }
         )
         assert response.status_code == 400
@@ -487,23 +547,29 @@ class TestStripeWebhooks:
         )
         assert response.status_code == 400
 
+    @mock.patch('app.stripe.webhooks.queries.insert_stripe_event')
     @mock.patch('app.stripe.webhooks._verify_stripe_event')
-    def test_webhook_unhandled_event(self, mock_verify, test_client):
-        """Test webhook handling of unsupported event type."""
-        mock_verify.return_value = {'type': 'unhandled.event', 'data': {'object': {}}}
+    def test_webhook_unhandled_event(self, mock_verify, mock_insert, test_client):
+        """Unsupported event types are acknowledged so Stripe stops retrying them."""
+        mock_verify.return_value = {'id': 'evt_unhandled', 'type': 'unhandled.event', 'data': {'object': {}}}
         
         response = test_client.post(
             '/api/v1/stripe/webhooks',
             json={'type': 'unhandled.event'},
             headers={'Stripe-Signature': 'test_sig'}
         )
-        assert response.status_code == 400
-        assert 'Unhandled event type' in response.json()['detail']
+        assert response.status_code == 200
+        assert response.json()['status'] == 'ignored'
+        mock_insert.assert_not_called()
 
+    @mock.patch('app.stripe.webhooks.webhook_queue.submit', new_callable=mock.AsyncMock)
+    @mock.patch('app.stripe.webhooks.queries.insert_stripe_event', new_callable=mock.AsyncMock)
     @mock.patch('app.stripe.webhooks._verify_stripe_event')
-    def test_webhook_payment_intent_handler(self, mock_verify, test_client):
+    def test_webhook_payment_intent_handler(self, mock_verify, mock_insert, mock_submit, test_client):
         """Test successful payment intent webhook handling."""
+        mock_insert.return_value = True
         mock_verify.return_value = {
+            'id': 'evt_payment_intent',
             'type': 'payment_intent.succeeded',
             'data': {
                 'object': {
@@ -521,3 +587,443 @@ class TestStripeWebhooks:
         )
         assert response.status_code == 200
         assert response.json()['status'] == 'success'
+        mock_insert.assert_awaited_once()
+        assert mock_insert.await_args.args[:2] == ('evt_payment_intent', 'payment_intent.succeeded')
+        mock_submit.assert_awaited_once()
+
+    @mock.patch('app.stripe.webhooks.webhook_queue.submit', new_callable=mock.AsyncMock)
+    @mock.patch('app.stripe.webhooks.queries.insert_stripe_event', new_callable=mock.AsyncMock)
+    @mock.patch('app.stripe.webhooks._verify_stripe_event')
+    def test_webhook_duplicate_event_is_noop(self, mock_verify, mock_insert, mock_submit, test_client):
+        """Redelivered events are acknowledged without being processed again."""
+        mock_insert.return_value = False
+        mock_verify.return_value = {
+            'id': 'evt_duplicate',
+            'type': 'payment_intent.succeeded',
+            'data': {'object': {'id': 'pi_123'}}
+        }
+
+        for _ in range(2):
+            response = test_client.post(
+                '/api/v1/stripe/webhooks',
+                json={'type': 'payment_intent.succeeded'},
+                headers={'Stripe-Signature': 'test_sig'}
+            )
+            assert response.status_code == 200
+            assert response.json()['status'] == 'duplicate'
+
+        # The second delivery is answered from memory without touching the database
+        mock_insert.assert_awaited_once()
+        mock_submit.assert_not_awaited()
+
+
+@pytest.mark.stripe
+class TestWebhookQueue:
+    """Test class for background processing of stored Stripe events."""
+
+    @pytest.mark.asyncio
+    async def test_failed_event_is_retried_then_processed(self):
+        """A handler failure is retried with backoff and the event marked processed."""
+        from app.stripe.webhook_queue import WebhookQueue
+
+        process = mock.AsyncMock(side_effect=[RuntimeError("boom"), None])
+        queue = WebhookQueue(process, workers=1, maxsize=10, max_attempts=3, retry_base_seconds=0)
+        update = mock.AsyncMock()
+        with mock.patch('app.stripe.webhook_queue.queries.update_stripe_event', new=update):
+            await queue.submit({'id': 'evt_1', 'type': 'payment_intent.succeeded', 'data': {}})
+            for _ in range(50):
+                if update.await_count == 2:
+                    break
+                await asyncio.sleep(0.01)
+            await queue.stop()
+
+        assert process.await_count == 2
+        assert update.await_args_list[0].args[1]['attempts'] == 1
+        assert update.await_args.args[1]['status'] == 'processed'
+
+    @pytest.mark.asyncio
+    async def test_event_is_marked_failed_after_max_attempts(self):
+        """Events that keep failing stop retrying and are marked failed."""
+        from app.stripe.webhook_queue import WebhookQueue
+
+        process = mock.AsyncMock(side_effect=RuntimeError("boom"))
+        queue = WebhookQueue(process, workers=1, maxsize=10, max_attempts=1, retry_base_seconds=0)
+        update = mock.AsyncMock()
+        with mock.patch('app.stripe.webhook_queue.queries.update_stripe_event', new=update):
+            await queue.submit({'id': 'evt_2', 'type': 'payment_intent.succeeded', 'data': {}})
+            for _ in range(50):
+                if update.await_count:
+                    break
+                await asyncio.sleep(0.01)
+            await queue.stop()
+
+        assert update.await_args.args[1]['status'] == 'failed'
+
+
+@pytest.mark.stripe
+class TestStripeHttpClient:
+    """Test class for the pooled Stripe HTTP client."""
+
+    def test_stripe_uses_shared_pooled_client(self):
+        """All Stripe modules share one keep-alive session with configured timeouts."""
+        from app.core.config import get_settings
+        from app.stripe import payments, payouts, dashboard, onboarding
+        from app.stripe.client import get_stripe_client
+
+        settings = get_settings()
+        client = get_stripe_client().default_http_client
+
+        assert isinstance(client, stripe.RequestsClient)
+        assert client._timeout == (settings.STRIPE_CONNECT_TIMEOUT_SECONDS, settings.STRIPE_READ_TIMEOUT_SECONDS)
+        adapter = client._session.get_adapter("https://api.stripe.com")
+        assert adapter._pool_maxsize == settings.STRIPE_POOL_SIZE
+        assert stripe.max_network_retries == settings.STRIPE_MAX_NETWORK_RETRIES
+        for module in (payouts, dashboard, onboarding):
+            assert module.stripe.default_http_client is client
+        assert payments.get_stripe_client().default_http_client is client
+
+    def test_stripe_calls_are_timed(self):
+        """Each Stripe HTTP call is recorded as a stripe dependency call."""
+        from unittest import mock
+        from prometheus_client import REGISTRY
+        from app.stripe.client import get_stripe_client
+
+        labels = {"dependency": "stripe", "operation": "GET /v1/accounts/{id}"}
+        before = REGISTRY.get_sample_value("dependency_request_duration_seconds_count", labels) or 0.0
+        client = get_stripe_client().default_http_client
+
+        with mock.patch.object(stripe.RequestsClient, "request", return_value=(b"{}", 200, {})):
+            client.request("get", "https://api.stripe.com/v1/accounts/acct_123", {})
+
+        assert REGISTRY.get_sample_value("dependency_request_duration_seconds_count", labels) == before + 1
+
+
+@pytest.mark.stripe
+class TestStripeExecutor:
+    """Test class for the bounded Stripe call executor."""
+
+    @pytest.mark.asyncio
+    async def test_run_executes_off_event_loop(self):
+        """Blocking calls run on a Stripe worker thread and update counters."""
+        import threading
+        from app.stripe.executor import StripeExecutor
+
+        executor = StripeExecutor(max_workers=2, max_queue=4)
+        thread_name = await executor.run(lambda: threading.current_thread().name)
+
+        assert thread_name.startswith("stripe")
+        stats = executor.stats()
+        assert stats["completed"] == 1
+        assert stats["queue_depth"] == 0
+        assert stats["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_full_queue_is_rejected_with_503(self):
+        """Calls beyond the wait queue fail fast instead of piling up."""
+        from app.stripe.executor import StripeExecutor
+
+        executor = StripeExecutor(max_workers=1, max_queue=0)
+        with pytest.raises(HTTPException) as exc_info:
+            await executor.run(lambda: None)
+
+        assert exc_info.value.status_code == 503
+        assert executor.stats()["rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_queued_call_frees_its_slot(self):
+        """Cancelling a caller whose call is still queued releases the queue slot."""
+        import asyncio
+        import threading
+        from app.stripe.executor import StripeExecutor
+
+        executor = StripeExecutor(max_workers=1, max_queue=1)
+        release = threading.Event()
+        busy = asyncio.ensure_future(executor.run(release.wait))
+        try:
+            while executor.stats()["in_flight"] == 0:
+                await asyncio.sleep(0.01)
+
+            queued = asyncio.ensure_future(executor.run(lambda: "never runs"))
+            await asyncio.sleep(0.01)
+            assert executor.stats()["queue_depth"] == 1
+            queued.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await queued
+
+            assert executor.stats()["queue_depth"] == 0
+        finally:
+            release.set()
+        await busy
+        assert await executor.run(lambda: "ok") == "ok"
+
+    def test_executor_stats_endpoint(self, test_client):
+        """The stats endpoint exposes queue depth and in-flight counts."""
+        response = test_client.get('/api/v1/stripe/executor/stats')
+
+        assert response.status_code == 200
+        assert {"queue_depth", "in_flight", "max_workers"} <= response.json().keys()
+
+
+@pytest.mark.stripe
+class TestCreatorAccountLookup:
+    """Test class for the cached lesson to connected account lookup."""
+
+    LESSON_ID = "123e4567-e89b-12d3-a456-426614174000"
+
+    def setup_method(self):
+        from app.stripe.payments import invalidate_creator_accounts
+        invalidate_creator_accounts()
+
+    @pytest.mark.asyncio
+    async def test_lookup_is_single_query_and_cached(self):
+        """The account is resolved with one embedded query, then served from cache."""
+        from app.stripe import payments
+
+        lookup = mock.AsyncMock(return_value={
+            "creator_id": "creator-1",
+            "creator": {"stripe_account_id": "acct_123"}
+        })
+        with mock.patch("app.stripe.payments.queries.fetch_lesson_creator_account", new=lookup), \
+             mock.patch("app.stripe.payments.queries.fetch_profile") as fetch_profile:
+            first = await payments.get_lesson_creator_stripe_account(self.LESSON_ID)
+            second = await payments.get_lesson_creator_stripe_account(self.LESSON_ID)
+
+        assert first == second == "acct_123"
+        assert lookup.await_count == 1
+        fetch_profile.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_missing_account_is_not_cached(self):
+        """Creators without a connected account are re-checked on the next checkout."""
+        from app.stripe import payments
+
+        lookup = mock.AsyncMock(return_value={"creator_id": "creator-1", "creator": {"stripe_account_id": None}})
+        with mock.patch("app.stripe.payments.queries.fetch_lesson_creator_account", new=lookup):
+            for _ in range(2):
+                with pytest.raises(HTTPException) as exc_info:
+                    await payments.get_lesson_creator_stripe_account(self.LESSON_ID)
+                assert exc_info.value.status_code == 400
+
+        assert lookup.await_count == 2
+
+    def test_profile_account_change_invalidates_cache(self, test_client):
+        """Updating a profile's stripe_account_id drops cached mappings."""
+        from app.stripe.payments import creator_account_cache
+
+        creator_account_cache.set(self.LESSON_ID, "acct_old")
+        updated = mock.AsyncMock(return_value=[{"id": "creator-1", "stripe_account_id": "acct_new"}])
+        with mock.patch("app.routes.supabase.queries.update_profile", new=updated):
+            response = test_client.put(
+                "/api/v1/supabase/user/profile?user_id=creator-1",
+                json={"stripe_account_id": "acct_new"}
+            )
+
+        assert response.status_code == 200
+        assert creator_account_cache.get(self.LESSON_ID) is None
+
+
+    @pytest.mark.asyncio
+    async def test_lookup_racing_an_invalidation_is_not_cached(self):
+        """An account fetched across an invalidation is returned but not written back."""
+        from app.stripe import payments
+
+        async def fetch_then_change(lesson_id):
+            payments.invalidate_creator_accounts("profiles")
+            return {"creator_id": "creator-1", "creator": {"stripe_account_id": "acct_old"}}
+
+        with mock.patch("app.stripe.payments.queries.fetch_lesson_creator_account", new=fetch_then_change):
+            assert await payments.get_lesson_creator_stripe_account(self.LESSON_ID) == "acct_old"
+
+        assert payments.creator_account_cache.get(self.LESSON_ID) is None
+
+    def test_generic_writes_invalidate_cache(self, test_client):
+        """Record and batch writes to profiles or lessons drop cached mappings; other tables keep them."""
+        from app.routes.base import get_current_user
+        from app.stripe.payments import creator_account_cache
+        test_client.app.dependency_overrides[get_current_user] = lambda: {"sub": "admin-1", "app_metadata": {"role": "admin"}}
+        writes = [
+            ("PUT", "/api/v1/supabase/update_record", {"table": "profiles", "record_id": 1, "data": {"stripe_account_id": "acct_new"}}),
+            ("PUT", "/api/v1/supabase/batch/update_records", {"table": "lessons", "record_ids": ["a"], "data": {"creator_id": "creator-2"}}),
+        ]
+
+        with mock.patch("app.supabase.api.get_supabase_client") as client:
+            client.return_value.table.return_value.update.return_value.eq.return_value.execute.return_value = {"data": [{"id": 1}]}
+            for method, url, body in writes:
+                creator_account_cache.set(self.LESSON_ID, "acct_old")
+                response = test_client.request(method, url, json=body)
+                assert response.status_code == 200
+                assert creator_account_cache.get(self.LESSON_ID) is None
+
+            creator_account_cache.set(self.LESSON_ID, "acct_old")
+            test_client.request("PUT", "/api/v1/supabase/batch/update_records",
+                                json={"table": "reviews", "record_ids": ["a"], "data": {"rating": 5}})
+        assert creator_account_cache.get(self.LESSON_ID) == "acct_old"
+
+    def test_lesson_delete_invalidates_cache(self, test_client):
+        """Deleting a lesson drops cached mappings."""
+        from app.stripe.payments import creator_account_cache
+
+        creator_account_cache.set(self.LESSON_ID, "acct_old")
+        with mock.patch("app.routes.lessons.queries.soft_delete_lesson", new=mock.AsyncMock(return_value=[{"id": self.LESSON_ID}])):
+            response = test_client.delete(f"/api/v1/lessons/{self.LESSON_ID}")
+
+        assert response.status_code == 200
+        assert creator_account_cache.get(self.LESSON_ID) is None
+
+
+@pytest.mark.stripe
+class TestPurchaseFulfillment:
+    """Test class for turning paid Checkout sessions into purchases."""
+
+    LESSON_ID = "123e4567-e89b-12d3-a456-426614174000"
+    CREATOR_ID = "123e4567-e89b-12d3-a456-426614174001"
+    LESSON = {'creator_id': CREATOR_ID, 'price': 10.0}
+
+    def _session(self, session_id, lesson_id=LESSON_ID):
+        return {
+            'id': session_id,
+            'payment_status': 'paid',
+            'payment_intent': f'pi_{session_id}',
+            'amount_total': 1000,
+            'currency': 'usd',
+            'metadata': {'lesson_id': lesson_id, 'user_id': 'buyer-1', 'unit_amount': '1000', 'currency': 'usd'}
+        }
+
+    @pytest.mark.asyncio
+    async def test_burst_is_written_in_one_batch(self):
+        """Concurrent fulfillments share one creator lookup and one bulk upsert."""
+        from app.stripe.fulfillment import PurchaseBatcher, fulfill_checkout_session
+
+        creators = mock.AsyncMock(return_value={self.LESSON_ID: self.LESSON})
+        upsert = mock.AsyncMock(return_value=[])
+        with mock.patch('app.stripe.fulfillment.purchase_batcher', PurchaseBatcher(max_batch=100, max_delay=0.01)), \
+             mock.patch('app.stripe.fulfillment.queries.fetch_lesson_creators', new=creators), \
+             mock.patch('app.stripe.fulfillment.queries.upsert_purchases', new=upsert):
+            await asyncio.gather(*(fulfill_checkout_session(self._session(f'cs_{i}')) for i in range(5)))
+
+        creators.assert_awaited_once_with([self.LESSON_ID])
+        upsert.assert_awaited_once()
+        rows = upsert.await_args.args[0]
+        assert len(rows) == 5
+        assert rows[0]['amount'] == 10.0
+        assert rows[0]['platform_fee'] == 1.0
+        assert rows[0]['creator_earnings'] == 9.0
+        assert rows[0]['fee_percentage'] == 10
+        assert rows[0]['creator_id'] == self.CREATOR_ID
+
+    @pytest.mark.asyncio
+    async def test_session_and_payment_intent_map_to_one_row(self):
+        """Both events for one sale resolve to the same purchase id and session."""
+        from app.stripe.fulfillment import PurchaseBatcher, fulfill_checkout_session, fulfill_payment_intent
+
+        session = self._session('cs_same')
+        payment_intent = {
+            'id': 'pi_cs_same',
+            'amount': 1000,
+            'amount_received': 1000,
+            'application_fee_amount': 100,
+            'currency': 'usd',
+            'metadata': session['metadata']
+        }
+        upsert = mock.AsyncMock(return_value=[])
+        sessions = SimpleNamespace(data=[SimpleNamespace(id='cs_same')])
+        with mock.patch('app.stripe.fulfillment.purchase_batcher', PurchaseBatcher(max_batch=100, max_delay=0.01)), \
+             mock.patch('app.stripe.fulfillment.queries.fetch_lesson_creators',
+                        new=mock.AsyncMock(return_value={self.LESSON_ID: self.LESSON})), \
+             mock.patch('app.stripe.fulfillment.queries.upsert_purchases', new=upsert), \
+             mock.patch('app.stripe.fulfillment.stripe.checkout.Session.list', return_value=sessions):
+            await asyncio.gather(fulfill_checkout_session(session), fulfill_payment_intent(payment_intent))
+
+        rows = upsert.await_args.args[0]
+        assert len(rows) == 1
+        assert rows[0]['stripe_session_id'] == 'cs_same'
+        assert rows[0]['payment_intent_id'] == 'pi_cs_same'
+
+    @pytest.mark.asyncio
+    async def test_unknown_lesson_fails_only_its_purchase(self):
+        """A purchase for a missing lesson fails so its event is retried; others succeed."""
+        from app.stripe.fulfillment import PurchaseBatcher, fulfill_checkout_session
+
+        upsert = mock.AsyncMock(return_value=[])
+        with mock.patch('app.stripe.fulfillment.purchase_batcher', PurchaseBatcher(max_batch=100, max_delay=0.01)), \
+             mock.patch('app.stripe.fulfillment.queries.fetch_lesson_creators',
+                        new=mock.AsyncMock(return_value={self.LESSON_ID: self.LESSON})), \
+             mock.patch('app.stripe.fulfillment.queries.upsert_purchases', new=upsert):
+            results = await asyncio.gather(
+                fulfill_checkout_session(self._session('cs_ok')),
+                fulfill_checkout_session(self._session('cs_missing', lesson_id='missing-lesson')),
+                return_exceptions=True
+            )
+
+        assert results[0] is None
+        assert isinstance(results[1], LookupError)
+        assert [row['stripe_session_id'] for row in upsert.await_args.args[0]] == ['cs_ok']
+
+    @pytest.mark.asyncio
+    async def test_unpaid_session_is_ignored(self):
+        """Sessions that are not paid yet do not create purchases."""
+        from app.stripe.fulfillment import fulfill_checkout_session
+
+        session = dict(self._session('cs_unpaid'), payment_status='unpaid')
+        with mock.patch('app.stripe.fulfillment.purchase_batcher') as batcher:
+            await fulfill_checkout_session(session)
+
+        batcher.add.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_underpaid_session_is_recorded_as_rejected(self):
+        """Payments below the lesson price are kept as failed rows and grant no access."""
+        from app.stripe.fulfillment import PurchaseBatcher, fulfill_checkout_session
+
+        upsert = mock.AsyncMock(return_value=[])
+        with mock.patch('app.stripe.fulfillment.purchase_batcher', PurchaseBatcher(max_batch=100, max_delay=0.01)), \
+             mock.patch('app.stripe.fulfillment.queries.fetch_lesson_creators',
+                        new=mock.AsyncMock(return_value={self.LESSON_ID: self.LESSON})), \
+             mock.patch('app.stripe.fulfillment.queries.upsert_purchases', new=upsert), \
+             mock.patch('app.stripe.fulfillment.entitlements.record_purchase') as record:
+            await asyncio.gather(
+                fulfill_checkout_session(dict(self._session('cs_cheap'), amount_total=1)),
+                fulfill_checkout_session(dict(self._session('cs_yen'), currency='jpy')),
+                fulfill_checkout_session(self._session('cs_paid')),
+            )
+
+        rows = {row['stripe_session_id']: row for row in upsert.await_args.args[0]}
+        assert rows['cs_cheap']['status'] == 'failed'
+        assert 'below the checkout price' in rows['cs_cheap']['metadata']['rejected_reason']
+        assert rows['cs_yen']['status'] == 'failed'
+        assert rows['cs_yen']['amount'] == 1000
+        assert rows['cs_paid']['status'] == 'completed'
+        record.assert_called_once_with('buyer-1', self.LESSON_ID)
+
+    @pytest.mark.asyncio
+    async def test_price_change_after_checkout_does_not_reject_payment(self):
+        """Payments are checked against the checkout quote, not the lesson's current price."""
+        from app.stripe.fulfillment import PurchaseBatcher, fulfill_checkout_session
+
+        repriced = {self.LESSON_ID: dict(self.LESSON, price=50.0)}
+        legacy = dict(self._session('cs_legacy'), metadata={'lesson_id': self.LESSON_ID, 'user_id': 'buyer-2'})
+        upsert = mock.AsyncMock(return_value=[])
+        with mock.patch('app.stripe.fulfillment.purchase_batcher', PurchaseBatcher(max_batch=100, max_delay=0.01)), \
+             mock.patch('app.stripe.fulfillment.queries.fetch_lesson_creators', new=mock.AsyncMock(return_value=repriced)), \
+             mock.patch('app.stripe.fulfillment.queries.upsert_purchases', new=upsert), \
+             mock.patch('app.stripe.fulfillment.entitlements.record_purchase') as record:
+            await asyncio.gather(
+                fulfill_checkout_session(self._session('cs_quoted')),
+                fulfill_checkout_session(legacy),
+            )
+
+        rows = {row['stripe_session_id']: row for row in upsert.await_args.args[0]}
+        assert rows['cs_quoted']['status'] == 'completed'
+        # Sessions without a recorded quote fall back to the current price
+        assert rows['cs_legacy']['status'] == 'failed'
+        record.assert_called_once_with('buyer-1', self.LESSON_ID)
+
+    def test_amounts_use_the_currency_exponent(self):
+        """Minor-unit conversion follows Stripe's zero- and three-decimal currencies."""
+        from app.stripe.payments import from_minor_units, to_minor_units
+
+        assert to_minor_units(12.5, 'usd') == 1250
+        assert to_minor_units(1000, 'jpy') == 1000
+        assert to_minor_units('1.234', 'kwd') == 1234
+        assert from_minor_units(1250, 'usd') == 12.5
+        assert from_minor_units(1000, 'JPY') == 1000
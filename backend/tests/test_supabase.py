@@ -43,6 +43,19 @@ class TestSupabaseIntegration:
         except Exception as e:
             pytest.skip(f"Supabase connection failed: {str(e)}")
 
+    def test_model_endpoint_uses_lazy_client(self, test_client):
+        """The model endpoint inserts through the lazily created client."""
+        from unittest import mock
+        client = mock.MagicMock()
+        client.table.return_value.insert.return_value.execute.return_value.data = [{"id": 1, "name": "Model"}]
+
+        with mock.patch("app.routes.supabase.get_supabase_client", return_value=client):
+            response = test_client.post("/api/v1/supabase/model", json={"name": "Model"})
+
+        assert response.status_code == 200
+        assert response.json() == {"status": "success", "data": {"id": 1, "name": "Model"}}
+        client.table.assert_called_once_with("models")
+
     def test_database_migrations(self, test_client):
         """Test the application of database migrations through Supabase.
         
@@ -243,3 +256,453 @@ class TestSupabaseIntegration:
                 deleted_at=None,
                 version=1
             )
+
+
+class TestMigrationRunner:
+    """Test class for the versioned, transactional migration runner."""
+
+    def _client(self, applied):
+        from unittest import mock
+        client = mock.MagicMock()
+        client.table.return_value.select.return_value.execute.return_value.data = [
+            {"version": version, "checksum": checksum} for version, checksum in applied.items()
+        ]
+        client.rpc.return_value.execute.return_value.data = True
+        return client
+
+    def test_plan_reports_status_per_version(self):
+        """Applied, edited and new migrations are told apart by checksum."""
+        from app.supabase.migrations import MIGRATIONS, migration_checksum, plan_migrations
+        applied = {
+            "initial": migration_checksum(MIGRATIONS["initial"]),
+            "lesson_search": "stale-checksum",
+        }
+
+        plan = plan_migrations(applied)
+
+        statuses = {step["version"]: step["status"] for step in plan}
+        assert [step["version"] for step in plan] == list(MIGRATIONS)
+        assert statuses["initial"] == "applied"
+        assert statuses["lesson_search"] == "changed"
+        assert statuses["stripe_events"] == "pending"
+        assert [step["version"] for step in plan_migrations(applied, target="lesson_search")] == ["initial", "lesson_search"]
+        with pytest.raises(ValueError):
+            plan_migrations(applied, target="missing")
+
+    def test_migrations_tolerate_existing_objects(self):
+        """Every migration can run against a database that already has its objects."""
+        import re
+        from app.supabase.migrations import MIGRATIONS
+
+        for version, sql in MIGRATIONS.items():
+            sql = re.sub(r"DO \$\$ BEGIN\s+CREATE TYPE .*?EXCEPTION WHEN duplicate_object THEN NULL;\s+END \$\$;", "", sql, flags=re.S)
+            for statement in re.findall(r"^\s*CREATE\b[^(\n]*", sql, flags=re.M):
+                assert re.search(r"IF NOT EXISTS|OR REPLACE", statement), f"{version}: {statement.strip()}"
+
+    def test_migrate_applies_each_pending_version_in_one_call(self):
+        """Each pending migration is one RPC carrying its whole SQL; applied ones are skipped."""
+        from unittest import mock
+        from app.supabase.migrations import MIGRATIONS, migration_checksum, migrate
+        client = self._client({"initial": migration_checksum(MIGRATIONS["initial"])})
+
+        with mock.patch("app.supabase.migrations.get_supabase_client", return_value=client):
+            result = migrate()
+
+        pending = list(MIGRATIONS)[1:]
+        assert result["applied"] == pending
+        assert client.rpc.call_count == len(pending)
+        name, params = client.rpc.call_args_list[0].args
+        assert name == "apply_schema_migration"
+        assert params == {
+            "migration_version": "lesson_search",
+            "migration_checksum": migration_checksum(MIGRATIONS["lesson_search"]),
+            "migration_sql": MIGRATIONS["lesson_search"],
+        }
+
+    def test_dry_run_executes_nothing(self):
+        """A dry run only reports the plan."""
+        from unittest import mock
+        from app.supabase.migrations import migrate
+        client = self._client({})
+
+        with mock.patch("app.supabase.migrations.get_supabase_client", return_value=client):
+            result = migrate(dry_run=True)
+
+        client.rpc.assert_not_called()
+        assert result["applied"] == []
+        assert result["schema_migrations_missing"] is False
+        assert all(step["status"] == "pending" for step in result["plan"])
+
+    def test_runner_bootstraps_tracking_table(self):
+        """A database without schema_migrations gets the runner schema first."""
+        from unittest import mock
+        from postgrest.exceptions import APIError
+        from app.supabase.migrations import MIGRATION_RUNNER_SCHEMA, migrate
+        client = self._client({})
+        client.table.return_value.select.return_value.execute.side_effect = APIError({"message": "relation does not exist"})
+
+        with mock.patch("app.supabase.migrations.get_supabase_client", return_value=client):
+            migrate(target="initial")
+
+        assert client.rpc.call_args_list[0].args == ("exec_sql", {"query": MIGRATION_RUNNER_SCHEMA})
+        assert client.rpc.call_args_list[1].args[0] == "apply_schema_migration"
+
+    def test_dry_run_does_not_bootstrap_tracking_table(self):
+        """A dry run against an unmigrated database reports the missing table instead of creating it."""
+        from unittest import mock
+        from postgrest.exceptions import APIError
+        from app.supabase.migrations import MIGRATIONS, migrate
+        client = self._client({})
+        client.table.return_value.select.return_value.execute.side_effect = APIError({"message": "relation does not exist"})
+
+        with mock.patch("app.supabase.migrations.get_supabase_client", return_value=client):
+            result = migrate(dry_run=True)
+
+        client.rpc.assert_not_called()
+        assert result["schema_migrations_missing"] is True
+        assert [step["status"] for step in result["plan"]] == ["pending"] * len(MIGRATIONS)
+
+    def test_apply_function_is_limited_to_the_service_role(self):
+        """Only the service role can execute the SQL-running apply function."""
+        from app.supabase.migrations import MIGRATION_RUNNER_SCHEMA
+        signature = "apply_schema_migration(text, text, text)"
+
+        assert f"REVOKE EXECUTE ON FUNCTION {signature} FROM anon, authenticated;" in MIGRATION_RUNNER_SCHEMA
+        assert f"GRANT EXECUTE ON FUNCTION {signature} TO service_role;" in MIGRATION_RUNNER_SCHEMA
+
+    def test_failed_migration_stops_the_run(self):
+        """Later migrations are not attempted after one fails."""
+        from unittest import mock
+        from app.supabase.migrations import migrate
+        client = self._client({})
+        client.rpc.return_value.execute.side_effect = Exception("syntax error")
+
+        with mock.patch("app.supabase.migrations.get_supabase_client", return_value=client):
+            with pytest.raises(Exception, match="initial failed and was rolled back"):
+                migrate()
+
+        assert client.rpc.call_count == 1
+
+    def test_run_endpoint_dry_run(self, test_client):
+        """The run endpoint returns the plan without applying it."""
+        from unittest import mock
+        client = self._client({})
+
+        with mock.patch("app.supabase.migrations.get_supabase_client", return_value=client):
+            response = test_client.post("/api/v1/supabase/migrations/run", json={"dry_run": True, "target": "initial"})
+
+        assert response.status_code == 200
+        assert response.json()["plan"][0]["version"] == "initial"
+        client.rpc.assert_not_called()
+
+
+ADMIN_CLAIMS = {"sub": "admin-1", "app_metadata": {"role": "admin"}}
+
+
+class TestBulkCrud:
+    """Test class for chunked bulk CRUD helpers and batch endpoints."""
+
+    @staticmethod
+    def _sign_in(test_client, claims):
+        from app.routes.base import get_current_user
+        test_client.app.dependency_overrides[get_current_user] = lambda: claims
+
+    def test_bulk_create_chunks_and_isolates_failures(self):
+        """Records are written one chunk per request; a failed chunk only fails its own records."""
+        from unittest import mock
+        from app.supabase.api import bulk_create_records
+        client = mock.MagicMock()
+        insert = client.table.return_value.insert
+        insert.return_value.execute.side_effect = [
+            mock.MagicMock(data=[{"id": 1}, {"id": 2}]),
+            Exception("duplicate key"),
+            mock.MagicMock(data=[{"id": 5}]),
+        ]
+        records = [{"name": f"row-{index}"} for index in range(5)]
+
+        with mock.patch("app.supabase.api.get_supabase_client", return_value=client):
+            result = bulk_create_records("categories", records, chunk_size=2)
+
+        assert insert.call_count == 3
+        assert insert.call_args_list[0].args == (records[:2],)
+        assert insert.call_args_list[0].kwargs == {"default_to_null": False}
+        assert (result.status, result.succeeded, result.failed) == ("partial", 3, 2)
+        assert [item.status for item in result.results] == ["created", "created", "error", "error", "created"]
+        assert result.results[2].error == "duplicate key"
+        assert result.results[4].id == 5
+
+    def test_bulk_upsert_uses_conflict_target(self):
+        """Upserts pass the conflict column through."""
+        from unittest import mock
+        from app.supabase.api import bulk_create_records
+        client = mock.MagicMock()
+        client.table.return_value.upsert.return_value.execute.return_value.data = [{"id": "a"}]
+
+        with mock.patch("app.supabase.api.get_supabase_client", return_value=client):
+            result = bulk_create_records("categories", [{"id": "a", "name": "Tricks"}], upsert=True)
+
+        client.table.return_value.upsert.assert_called_once_with(
+            [{"id": "a", "name": "Tricks"}], on_conflict="id", default_to_null=False
+        )
+        assert result.results[0].status == "upserted"
+
+    def test_bulk_update_filters_by_id_list(self):
+        """Many IDs are updated with one in_ filter per chunk; unmatched IDs are reported."""
+        from unittest import mock
+        from app.supabase.api import bulk_update_records
+        client = mock.MagicMock()
+        in_ = client.table.return_value.update.return_value.in_
+        in_.return_value.execute.return_value.data = [{"id": 1}, {"id": 3}]
+
+        with mock.patch("app.supabase.api.get_supabase_client", return_value=client):
+            result = bulk_update_records("lessons", [1, 2, 3], {"status": "archived"})
+
+        client.table.return_value.update.assert_called_once_with({"status": "archived"})
+        in_.assert_called_once_with("id", [1, 2, 3])
+        assert [item.status for item in result.results] == ["updated", "not_found", "updated"]
+        assert result.status == "partial"
+
+    def test_batch_delete_endpoint(self, test_client):
+        """The batch delete endpoint reports a result per ID."""
+        from unittest import mock
+        self._sign_in(test_client, ADMIN_CLAIMS)
+        client = mock.MagicMock()
+        client.table.return_value.delete.return_value.in_.return_value.execute.return_value.data = [
+            {"id": "a"}, {"id": "b"}
+        ]
+
+        with mock.patch("app.supabase.api.get_supabase_client", return_value=client):
+            response = test_client.request(
+                "DELETE",
+                "/api/v1/supabase/batch/delete_records",
+                json={"table": "lessons", "record_ids": ["a", "b"]}
+            )
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["status"] == "success"
+        assert [item["status"] for item in body["results"]] == ["deleted", "deleted"]
+
+    def test_batch_endpoint_rejects_empty_batch(self, test_client):
+        """Empty batches are rejected before touching the database."""
+        self._sign_in(test_client, ADMIN_CLAIMS)
+        response = test_client.post(
+            "/api/v1/supabase/batch/create_records",
+            json={"table": "lessons", "records": []}
+        )
+        assert response.status_code == 400
+
+    def test_batch_endpoints_require_admin(self, test_client):
+        """Anonymous and non-admin callers cannot write in batches."""
+        from unittest import mock
+        requests = [
+            ("POST", "/api/v1/supabase/batch/create_records", {"table": "lessons", "records": [{"title": "x"}]}),
+            ("PUT", "/api/v1/supabase/batch/update_records", {"table": "lessons", "record_ids": ["a"], "data": {"title": "x"}}),
+            ("DELETE", "/api/v1/supabase/batch/delete_records", {"table": "lessons", "record_ids": ["a"]}),
+        ]
+
+        with mock.patch("app.supabase.api.get_supabase_client") as client:
+            anonymous = [test_client.request(method, url, json=body).status_code for method, url, body in requests]
+            self._sign_in(test_client, {"sub": "user-1", "user_metadata": {"role": "admin"}})
+            signed_in = [test_client.request(method, url, json=body).status_code for method, url, body in requests]
+
+        assert anonymous == [403, 403, 403]
+        assert signed_in == [403, 403, 403]
+        client.assert_not_called()
+
+    def test_batch_endpoints_reject_unlisted_tables(self, test_client):
+        """Ledger and bookkeeping tables cannot be written through the batch endpoints."""
+        from unittest import mock
+        self._sign_in(test_client, ADMIN_CLAIMS)
+
+        with mock.patch("app.supabase.api.get_supabase_client") as client:
+            for table in ("purchases", "stripe_events", "schema_migrations"):
+                response = test_client.request(
+                    "DELETE",
+                    "/api/v1/supabase/batch/delete_records",
+                    json={"table": table, "record_ids": ["a"]}
+                )
+                assert response.status_code == 400
+                assert "cannot be written" in response.json()["detail"]
+        client.assert_not_called()
+
+
+class TestPagedReads:
+    """Test class for paginated and streaming table reads."""
+
+    def _fake_pages(self, total):
+        """Returns an async stand-in for fetch_table_page over ``total`` rows, and its call log."""
+        calls = []
+
+        async def fetch_table_page(table, offset=0, limit=100, **options):
+            calls.append((table, offset, limit))
+            return [{"id": index} for index in range(offset, min(offset + limit, total))]
+        return fetch_table_page, calls
+
+    def test_pages_follow_the_cursor(self, test_client):
+        """A full page carries X-Next-Cursor; the last page does not."""
+        from unittest import mock
+        fetch_table_page, calls = self._fake_pages(5)
+
+        with mock.patch("app.supabase.queries.fetch_table_page", side_effect=fetch_table_page):
+            first = test_client.get("/api/v1/supabase/profiles", params={"limit": 3})
+            second = test_client.get(
+                "/api/v1/supabase/profiles",
+                params={"limit": 3, "cursor": first.headers["X-Next-Cursor"]}
+            )
+
+        assert [row["id"] for row in first.json()] == [0, 1, 2]
+        assert [row["id"] for row in second.json()] == [3, 4]
+        assert "X-Next-Cursor" not in second.headers
+        assert calls == [("profiles", 0, 3), ("profiles", 3, 3)]
+
+    def test_cursor_is_bound_to_its_table(self, test_client):
+        """Cursors from one table are rejected for another, as are oversized limits."""
+        from app.supabase.queries import encode_page_cursor
+        cursor = encode_page_cursor("lessons", 100)
+
+        response = test_client.get("/api/v1/supabase/read_records", params={"table": "profiles", "cursor": cursor})
+        assert response.status_code == 400
+        response = test_client.get("/api/v1/supabase/read_records", params={"table": "profiles", "limit": 100000})
+        assert response.status_code == 400
+
+    def test_ndjson_streams_every_row_page_by_page(self, test_client, monkeypatch):
+        """Streaming reads the table in fixed-size range() pages and emits one JSON object per line."""
+        from unittest import mock
+        from app.core.config import get_settings
+        monkeypatch.setattr(get_settings(), "SUPABASE_STREAM_PAGE_SIZE", 1000)
+        fetch_table_page, calls = self._fake_pages(2500)
+
+        with mock.patch("app.supabase.queries.fetch_table_page", side_effect=fetch_table_page):
+            response = test_client.get("/api/v1/supabase/read_records", params={"table": "lessons", "format": "ndjson"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["id"] for row in rows] == list(range(2500))
+        assert calls == [("lessons", 0, 1000), ("lessons", 1000, 1000), ("lessons", 2000, 1000)]
+
+    def test_purchases_cannot_be_streamed(self, test_client):
+        """The purchase ledger is not readable through the generic endpoint in any format."""
+        from unittest import mock
+
+        with mock.patch("app.supabase.queries.fetch_table_page") as fetch:
+            for fmt in ("json", "ndjson"):
+                response = test_client.get("/api/v1/supabase/read_records", params={"table": "purchases", "format": fmt})
+                assert response.status_code == 400
+                assert "cannot be read" in response.json()["detail"]
+        fetch.assert_not_called()
+
+    def test_stream_failure_before_first_row_is_an_error(self, test_client):
+        """A query that fails on the first page returns 500 instead of an empty stream."""
+        from unittest import mock
+
+        with mock.patch("app.supabase.queries.fetch_table_page", side_effect=Exception("permission denied")):
+            response = test_client.get("/api/v1/supabase/profiles", params={"format": "ndjson"})
+
+        assert response.status_code == 500
+        assert response.json()["detail"] == "permission denied"
+
+    def test_table_page_uses_range_in_key_order(self):
+        """Pages are requested with range() over a total order, composite keys included."""
+        import asyncio
+        from unittest import mock
+        from app.supabase import queries
+        db = mock.MagicMock()
+        query = db.table.return_value.select.return_value
+        query.order.return_value = query
+        query.range.return_value.execute = mock.AsyncMock(return_value=mock.MagicMock(data=[]))
+
+        with mock.patch("app.supabase.queries.get_async_postgrest_client", return_value=db):
+            asyncio.run(queries.fetch_table_page("lesson_category", offset=200, limit=100))
+
+        assert [call.args for call in query.order.call_args_list] == [("lesson_id",), ("category_id",)]
+        query.range.assert_called_once_with(200, 299)
+
+
+class TestRecordFilters:
+    """Test class for column projection, filters and ordering on generic reads."""
+
+    def test_expressions_are_parsed_against_the_allowlist(self):
+        """Range, in, like and is filters parse; unknown tables, columns and operators do not."""
+        from app.supabase.filters import parse_columns, parse_filter, parse_order
+
+        assert parse_columns("lessons", "id, title,id") == "id,title"
+        for secret in ("vimeo_access_token", "email", "stripe_account_id"):
+            assert secret not in parse_columns("profiles").split(",")
+        assert parse_filter("lessons", "price.gte.10.5") == ("price", "gte", "10.5")
+        assert parse_filter("lessons", "status.in.draft,published") == ("status", "in", ["draft", "published"])
+        assert parse_filter("lessons", "title.ilike.*kendama*") == ("title", "ilike", "*kendama*")
+        assert parse_order("lessons", "created_at.desc,title") == [("created_at", True), ("title", False)]
+        for table, expression in [
+            ("lessons", "content.eq.x"),
+            ("lessons", "price.between.1"),
+            ("lessons", "deleted_at.is.maybe"),
+            ("schema_migrations", "version.eq.initial"),
+            ("purchases", "user_id.eq.someone"),
+        ]:
+            with pytest.raises(ValueError):
+                parse_filter(table, expression)
+        for columns in ("id,vimeo_access_token", "id,email", "stripe_account_id"):
+            with pytest.raises(ValueError):
+                parse_columns("profiles", columns)
+        with pytest.raises(ValueError):
+            parse_filter("profiles", "email.ilike.*@example.com")
+        with pytest.raises(ValueError):
+            parse_order("lessons", "price.sideways")
+
+    def test_read_records_builds_one_query(self):
+        """read_records applies projection, filters, order and limit to a single request."""
+        from unittest import mock
+        from app.supabase.api import read_records
+        client = mock.MagicMock()
+        query = client.table.return_value.select.return_value
+        for method in ("eq", "gte", "in_", "order", "limit"):
+            getattr(query, method).return_value = query
+        query.execute.return_value.data = [{"id": "a", "title": "Basics"}]
+
+        with mock.patch("app.supabase.api.get_supabase_client", return_value=client):
+            rows = read_records(
+                "lessons",
+                {"is_featured": True},
+                columns="id,title",
+                filters=["price.gte.10", "status.in.draft,published"],
+                order="price.desc",
+                limit=20
+            )
+
+        assert rows == [{"id": "a", "title": "Basics"}]
+        client.table.return_value.select.assert_called_once_with("id,title")
+        query.gte.assert_called_once_with("price", "10")
+        query.in_.assert_called_once_with("status", ["draft", "published"])
+        query.eq.assert_called_once_with("is_featured", True)
+        assert [call.args for call in query.order.call_args_list] == [("price",), ("id",)]
+        assert query.order.call_args_list[0].kwargs == {"desc": True}
+        query.limit.assert_called_once_with(20)
+
+    def test_endpoint_passes_validated_options(self, test_client):
+        """The endpoint forwards parsed options and rejects columns outside the allowlist."""
+        from unittest import mock
+        fetch = mock.AsyncMock(return_value=[{"id": "a", "price": 12}])
+
+        with mock.patch("app.supabase.queries.fetch_table_page", new=fetch):
+            response = test_client.get("/api/v1/supabase/read_records", params=[
+                ("table", "lessons"),
+                ("columns", "id,price"),
+                ("filter", "price.lt.20"),
+                ("filter", "deleted_at.is.null"),
+                ("order", "price.desc"),
+                ("limit", "5"),
+            ])
+            rejected = test_client.get("/api/v1/supabase/read_records", params={"table": "lessons", "columns": "content"})
+
+        assert response.status_code == 200
+        assert fetch.call_args.kwargs == {
+            "offset": 0,
+            "limit": 5,
+            "columns": "id,price",
+            "filters": [("price", "lt", "20"), ("deleted_at", "is", "null")],
+            "order": [("price", True)],
+        }
+        assert rejected.status_code == 400
+        assert fetch.call_count == 1
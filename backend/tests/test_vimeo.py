@@ -1,9 +1,25 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import pytest
-from unittest.mock import AsyncMock, patch, MagicMock
+import vimeo
+from tusclient.exceptions import TusCommunicationError
+from vimeo.exceptions import APIRateLimitExceededFailure
+from unittest.mock import ANY, AsyncMock, patch, MagicMock
 from fastapi import HTTPException
+from app.routes.lessons import lesson_list_cache
 from app.vimeo.client import get_vimeo_client
+from app.vimeo.jobs import UploadJobQueue
+from app.vimeo.metadata import MetadataRefresher, get_videos_metadata, video_metadata_cache
+from app.vimeo.pipeline import UploadStateStore, VimeoUploadError, upload_file
+from app.vimeo.ratelimit import Priority, RateLimitedClient, VimeoRateLimiter, VimeoRateLimitError
 from app.vimeo.upload import upload_video
 from app.core.config import get_settings
+from app.routes.base import get_current_user
 
 @pytest.mark.asyncio
 @patch('app.vimeo.client.vimeo.VimeoClient')
@@ -22,42 +38,166 @@ async def test_vimeo_client_initialization(mock_vimeo):
     )
     assert client == mock_vimeo.return_value
 
+class FakeUploader:
+    """Stands in for tusclient's Uploader, tracking the server-side offset per upload link"""
+    server_offsets = {}
+
+    def __init__(self, file_stream, url, chunk_size, retries, retry_delay):
+        if url not in self.server_offsets:
+            raise TusCommunicationError("Upload link expired", 404)
+        self.stream = file_stream
+        self.url = url
+        self.chunk_size = chunk_size
+        self.offset = self.server_offsets[url]
+
+    def get_file_size(self):
+        return os.fstat(self.stream.fileno()).st_size
+
+    def upload_chunk(self):
+        self.stream.seek(self.offset)
+        self.offset += len(self.stream.read(self.chunk_size))
+        self.server_offsets[self.url] = self.offset
+
+def _ticket_response(video_id='12345', upload_link='https://files.tus.vimeo.com/upload-1'):
+    FakeUploader.server_offsets[upload_link] = 0
+    response = MagicMock(status_code=200)
+    response.json.return_value = {
+        'uri': f'/videos/{video_id}',
+        'link': f'https://vimeo.com/{video_id}',
+        'name': 'test_video',
+        'upload': {'approach': 'tus', 'upload_link': upload_link}
+    }
+    return response
+
+@pytest.fixture
+def video_file(tmp_path, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, 'VIMEO_UPLOAD_STATE_DIR', str(tmp_path / 'state'))
+    monkeypatch.setattr(settings, 'VIMEO_UPLOAD_DIR', str(tmp_path))
+    monkeypatch.setattr(settings, 'VIMEO_UPLOAD_CHUNK_SIZE', 4)
+    FakeUploader.server_offsets = {}
+    path = tmp_path / 'test_video.mp4'
+    path.write_bytes(b'0123456789')
+    return str(path)
+
 @pytest.mark.asyncio
+@patch('app.vimeo.pipeline.Uploader', FakeUploader)
 @patch('app.vimeo.upload.get_vimeo_client')
-@patch('os.path.exists')
-async def test_successful_video_upload(mock_exists, mock_client):
+async def test_successful_video_upload(mock_client, video_file):
     """Test successful video upload flow"""
-    mock_client.return_value.upload = AsyncMock(
-        return_value=MagicMock(
-            uri='/videos/12345',
-            link='https://vimeo.com/12345',
-            status_code=201
-        )
-    )
-    mock_client.return_value.upload.return_value.name = 'test_video'
-    mock_exists.return_value = True
+    mock_client.return_value.post.return_value = _ticket_response()
     
     result = await upload_video(
-        file_path="backend/tests/media/fixtures/test_video.mp4",
+        file_path=video_file,
         title="Test Video",
         description="Test Description",
         privacy={"view": "disable"}
     )
     
-    mock_client.return_value.upload.assert_called_once_with(
-        "backend/tests/media/fixtures/test_video.mp4",
+    mock_client.return_value.post.assert_called_once_with(
+        '/me/videos',
         data={
             'name': 'Test Video', 
             'description': 'Test Description',
-            'privacy': {'view': 'disable'}
-        }
+            'privacy': {'view': 'disable'},
+            'upload': {'approach': 'tus', 'size': '10'}
+        },
+        params={'fields': 'uri,link,name,upload'},
+        hooks=ANY
     )
+    assert FakeUploader.server_offsets['https://files.tus.vimeo.com/upload-1'] == 10
     assert result == {
         "vimeo_id": "12345",
         "uri": "/videos/12345",
         "url": "https://vimeo.com/12345",
         "title": "test_video"
     }
+    # Completed uploads leave nothing to resume
+    assert not os.listdir(get_settings().VIMEO_UPLOAD_STATE_DIR)
+
+@pytest.mark.asyncio
+@patch('app.vimeo.pipeline.Uploader', FakeUploader)
+@patch('app.vimeo.upload.get_vimeo_client')
+async def test_upload_reports_progress_per_chunk(mock_client, video_file):
+    """Test progress callback receives the confirmed offset after every chunk"""
+    mock_client.return_value.post.return_value = _ticket_response()
+    progress = []
+    
+    await upload_video(video_file, "Test", on_progress=lambda sent, total: progress.append((sent, total)))
+    
+    assert progress == [(0, 10), (4, 10), (8, 10), (10, 10)]
+
+@patch('app.vimeo.pipeline.Uploader', FakeUploader)
+def test_upload_resumes_from_persisted_offset(video_file):
+    """Test an interrupted upload continues from Vimeo's offset without a new ticket"""
+    client = MagicMock()
+    client.post.return_value = _ticket_response()
+    store = UploadStateStore(get_settings().VIMEO_UPLOAD_STATE_DIR)
+    
+    def interrupt(sent, total):
+        if sent == 4:
+            raise ConnectionError("connection reset")
+    
+    with pytest.raises(ConnectionError):
+        upload_file(client, video_file, {'name': 'Test'}, on_progress=interrupt)
+    assert store.get(store.fingerprint(video_file))['offset'] == 4
+    
+    progress = []
+    result = upload_file(client, video_file, {'name': 'Test'}, on_progress=lambda sent, total: progress.append(sent))
+    
+    client.post.assert_called_once()
+    assert progress == [4, 8, 10]
+    assert result['uri'] == '/videos/12345'
+    assert store.get(store.fingerprint(video_file)) is None
+
+@patch('app.vimeo.pipeline.requests.head', return_value=MagicMock(status_code=404))
+@patch('app.vimeo.pipeline.Uploader', FakeUploader)
+def test_upload_restarts_when_upload_link_expired(mock_head, video_file):
+    """Test a stale upload link is discarded and a fresh upload is created"""
+    client = MagicMock()
+    client.post.return_value = _ticket_response(video_id='67890', upload_link='https://files.tus.vimeo.com/upload-2')
+    store = UploadStateStore(get_settings().VIMEO_UPLOAD_STATE_DIR)
+    store.set(store.fingerprint(video_file), {
+        'uri': '/videos/12345',
+        'link': 'https://vimeo.com/12345',
+        'name': 'Test',
+        'upload_link': 'https://files.tus.vimeo.com/expired',
+        'offset': 4
+    })
+    
+    result = upload_file(client, video_file, {'name': 'Test'})
+    
+    client.post.assert_called_once()
+    assert result['uri'] == '/videos/67890'
+    assert FakeUploader.server_offsets['https://files.tus.vimeo.com/upload-2'] == 10
+    assert mock_head.call_args.args == ('https://files.tus.vimeo.com/expired',)
+
+@patch('app.vimeo.pipeline.requests.head', return_value=MagicMock(status_code=503))
+@patch('app.vimeo.pipeline.Uploader', FakeUploader)
+def test_upload_keeps_state_on_transient_tus_error(mock_head, video_file):
+    """Test a tus error on a link that still exists keeps the offset instead of starting over"""
+    client = MagicMock()
+    store = UploadStateStore(get_settings().VIMEO_UPLOAD_STATE_DIR)
+    state = {
+        'uri': '/videos/12345',
+        'link': 'https://vimeo.com/12345',
+        'name': 'Test',
+        'upload_link': 'https://files.tus.vimeo.com/flaky',
+        'offset': 4
+    }
+    store.set(store.fingerprint(video_file), state)
+    
+    with pytest.raises(VimeoUploadError):
+        upload_file(client, video_file, {'name': 'Test'})
+    
+    client.post.assert_not_called()
+    assert store.get(store.fingerprint(video_file)) == state
+    
+    FakeUploader.server_offsets['https://files.tus.vimeo.com/flaky'] = 4
+    result = upload_file(client, video_file, {'name': 'Test'})
+    
+    client.post.assert_not_called()
+    assert result['uri'] == '/videos/12345'
 
 @pytest.mark.asyncio
 @patch('app.vimeo.upload.get_vimeo_client')
@@ -73,18 +213,527 @@ async def test_upload_invalid_file(mock_client):
 
 @pytest.mark.asyncio
 @patch('app.vimeo.upload.get_vimeo_client')
-@patch('app.vimeo.upload.os.path.exists')
-@patch('app.vimeo.upload.os.path.getsize')
-async def test_upload_api_error(mock_getsize, mock_exists, mock_client):
+async def test_upload_api_error(mock_client, video_file):
     """Test handling of Vimeo API errors"""
-    mock_client.return_value.upload = AsyncMock(
-        side_effect=Exception("API Error")
-    )
-    mock_exists.return_value = True  # File exists check passes
-    mock_getsize.return_value = 1024  # Mock valid file size
+    mock_client.return_value.post.side_effect = Exception("API Error")
     
     with pytest.raises(HTTPException) as exc:
-        await upload_video("valid.mp4", "Test")
+        await upload_video(video_file, "Test")
         
     assert exc.value.status_code == 502
     assert "Vimeo API error: API Error" in exc.value.detail
+
+@pytest.mark.asyncio
+@patch('app.vimeo.upload.get_vimeo_client')
+async def test_upload_ticket_rejected(mock_client, video_file):
+    """Test a rejected upload ticket surfaces as a Vimeo API error"""
+    mock_client.return_value.post.return_value = MagicMock(status_code=403, text='Quota exceeded')
+    
+    with pytest.raises(HTTPException) as exc:
+        await upload_video(video_file, "Test")
+        
+    assert exc.value.status_code == 502
+    assert "Quota exceeded" in exc.value.detail
+
+def _wait_for_job(test_client, job_id, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = test_client.get(f"/api/v1/vimeo/jobs/{job_id}").json()
+        if job['status'] in ('complete', 'failed') or time.monotonic() > deadline:
+            return job
+        time.sleep(0.01)
+
+CREATOR_ID = "creator-1"
+LESSON = {"id": "lesson-1", "title": "Kendama Basics", "description": "Intro", "creator_id": CREATOR_ID}
+
+class TestUploadJobs:
+    @pytest.fixture(autouse=True)
+    def _authenticate(self, test_client):
+        test_client.app.dependency_overrides[get_current_user] = lambda: {"sub": CREATOR_ID}
+
+    @patch('app.routes.vimeo.queries.fetch_lesson', new_callable=AsyncMock, return_value=LESSON)
+    @patch('app.vimeo.jobs.queries.update_lesson', new_callable=AsyncMock)
+    @patch('app.vimeo.jobs.upload_video')
+    def test_upload_returns_job_and_links_lesson(self, mock_upload, mock_update_lesson, mock_fetch_lesson, test_client, video_file):
+        """Test the upload endpoint queues a job that reports progress and updates the lesson"""
+        async def fake_upload(file_path, title, description, privacy, on_progress):
+            on_progress(5, 10)
+            on_progress(10, 10)
+            return {"vimeo_id": "12345", "uri": "/videos/12345", "url": "https://vimeo.com/12345", "title": title}
+        mock_upload.side_effect = fake_upload
+        lesson_list_cache.set('listing', [])
+        
+        response = test_client.post("/api/v1/vimeo/upload", json={
+            "file_path": video_file,
+            "title": "Test Video",
+            "lesson_id": "lesson-1"
+        })
+        
+        assert response.status_code == 202
+        assert response.json()['status'] in ('queued', 'uploading', 'complete')
+        job = _wait_for_job(test_client, response.json()['id'])
+        assert job['status'] == 'complete'
+        assert job['vimeo_id'] == '12345'
+        assert job['uri'] == '/videos/12345'
+        assert (job['bytes_uploaded'], job['bytes_total'], job['progress']) == (10, 10, 100.0)
+        mock_update_lesson.assert_awaited_once()
+        lesson_id, data = mock_update_lesson.await_args.args
+        assert lesson_id == 'lesson-1'
+        assert data['vimeo_video_id'] == '12345'
+        assert data['vimeo_url'] == 'https://vimeo.com/12345'
+        assert lesson_list_cache.get('listing') is None
+
+    @patch('app.vimeo.jobs.upload_video')
+    def test_failed_upload_is_reported_on_job(self, mock_upload, test_client, video_file):
+        """Test Vimeo errors surface on the job instead of the upload request"""
+        mock_upload.side_effect = HTTPException(status_code=502, detail="Vimeo API error: Quota exceeded")
+        
+        response = test_client.post("/api/v1/vimeo/upload", json={"file_path": video_file, "title": "Test"})
+        
+        job = _wait_for_job(test_client, response.json()['id'])
+        assert job['status'] == 'failed'
+        assert job['error'] == "Vimeo API error: Quota exceeded"
+
+    def test_upload_missing_file_rejected(self, test_client, video_file):
+        """Test missing files are rejected before a job is created"""
+        response = test_client.post("/api/v1/vimeo/upload", json={"file_path": "missing.mp4", "title": "Test"})
+        
+        assert response.status_code == 400
+        assert "Video file not found" in response.json()['detail']
+
+    @patch('app.vimeo.jobs.upload_video')
+    def test_upload_outside_upload_dir_rejected(self, mock_upload, test_client, video_file, tmp_path_factory):
+        """Test paths escaping the upload directory are refused, however they are spelled"""
+        outside = tmp_path_factory.mktemp('outside') / 'secret.mp4'
+        outside.write_bytes(b'secret')
+        
+        for file_path in (str(outside), os.path.join('..', outside.parent.name, outside.name), '/etc/passwd'):
+            response = test_client.post("/api/v1/vimeo/upload", json={"file_path": file_path, "title": "Test"})
+            
+            assert response.status_code == 400
+            assert "upload directory" in response.json()['detail']
+        mock_upload.assert_not_called()
+
+    @patch('app.routes.vimeo.queries.fetch_lesson', new_callable=AsyncMock,
+           return_value={**LESSON, "creator_id": "someone-else"})
+    @patch('app.vimeo.jobs.upload_video')
+    def test_upload_to_another_creators_lesson_forbidden(self, mock_upload, mock_fetch_lesson, test_client, video_file):
+        """Test only the lesson's creator can queue an upload linked to it"""
+        response = test_client.post("/api/v1/vimeo/upload", json={
+            "file_path": video_file,
+            "title": "Test",
+            "lesson_id": "lesson-1"
+        })
+        
+        assert response.status_code == 403
+        mock_upload.assert_not_called()
+
+    def test_upload_requires_authentication(self, test_client, video_file):
+        """Test anonymous callers cannot queue server-side uploads"""
+        test_client.app.dependency_overrides.clear()
+        
+        response = test_client.post("/api/v1/vimeo/upload", json={"file_path": video_file, "title": "Test"})
+        
+        assert response.status_code == 403
+
+    def test_unknown_job(self, test_client):
+        """Test polling an unknown job returns 404"""
+        response = test_client.get("/api/v1/vimeo/jobs/does-not-exist")
+        
+        assert response.status_code == 404
+
+    @patch('app.vimeo.jobs.upload_video', new_callable=AsyncMock,
+           return_value={"vimeo_id": "1", "uri": "/videos/1", "url": "https://vimeo.com/1"})
+    def test_job_only_visible_to_submitter(self, mock_upload, test_client, video_file):
+        """Test other users and anonymous callers cannot poll someone else's job"""
+        job_id = test_client.post("/api/v1/vimeo/upload", json={"file_path": video_file, "title": "Test"}).json()['id']
+        assert _wait_for_job(test_client, job_id)['status'] == 'complete'
+        
+        test_client.app.dependency_overrides[get_current_user] = lambda: {"sub": "someone-else"}
+        assert test_client.get(f"/api/v1/vimeo/jobs/{job_id}").status_code == 404
+        
+        test_client.app.dependency_overrides.clear()
+        assert test_client.get(f"/api/v1/vimeo/jobs/{job_id}").status_code == 403
+
+    @pytest.mark.asyncio
+    @patch('app.vimeo.jobs.upload_video')
+    async def test_running_jobs_survive_full_history(self, mock_upload):
+        """Test finished jobs age out of the bounded history without evicting a running job"""
+        release = asyncio.Event()
+        
+        async def fake_upload(file_path, title, description, privacy, on_progress):
+            if title == 'slow':
+                await release.wait()
+            return {"vimeo_id": "1", "uri": "/videos/1", "url": "https://vimeo.com/1"}
+        mock_upload.side_effect = fake_upload
+        jobs = UploadJobQueue(workers=2, maxsize=10, history=1, ttl=60)
+        try:
+            slow = jobs.submit(file_path='slow.mp4', title='slow')
+            quick = [jobs.submit(file_path='quick.mp4', title='quick') for _ in range(3)]
+            while any(job['status'] != 'complete' for job in quick):
+                await asyncio.sleep(0.01)
+            
+            assert jobs.get(slow['id'])['status'] == 'uploading'
+            assert jobs.get(quick[0]['id']) is None
+            assert jobs.get(quick[-1]['id'])['status'] == 'complete'
+            
+            release.set()
+            while jobs.get(slow['id'])['status'] != 'complete':
+                await asyncio.sleep(0.01)
+            assert jobs.get(quick[-1]['id']) is None
+        finally:
+            release.set()
+            await jobs.stop()
+
+class TestDirectUploads:
+    @pytest.fixture(autouse=True)
+    def _authenticate(self, test_client):
+        test_client.app.dependency_overrides[get_current_user] = lambda: {"sub": CREATOR_ID}
+
+    @patch('app.routes.vimeo.queries.fetch_lesson', new_callable=AsyncMock, return_value=LESSON)
+    @patch('app.vimeo.direct.get_vimeo_client')
+    def test_create_upload_ticket(self, mock_client, mock_fetch_lesson, test_client):
+        """Test a ticket returns the tus upload link without the file touching the API"""
+        mock_client.return_value.post.return_value = _ticket_response()
+        
+        response = test_client.post("/api/v1/vimeo/uploads", json={"lesson_id": "lesson-1", "size": 1048576})
+        
+        assert response.status_code == 201
+        assert response.json() == {
+            "lesson_id": "lesson-1",
+            "vimeo_id": "12345",
+            "uri": "/videos/12345",
+            "url": "https://vimeo.com/12345",
+            "approach": "tus",
+            "upload_link": "https://files.tus.vimeo.com/upload-1"
+        }
+        mock_client.return_value.post.assert_called_once_with(
+            '/me/videos',
+            data={
+                'name': 'Kendama Basics',
+                'description': 'Intro',
+                'privacy': {'view': 'disable', 'embed': 'private'},
+                'upload': {'approach': 'tus', 'size': '1048576'}
+            },
+            params={'fields': 'uri,link,name,upload'},
+            hooks=ANY
+        )
+
+    @patch('app.routes.vimeo.queries.fetch_lesson', new_callable=AsyncMock, return_value=dict(LESSON, creator_id="someone-else"))
+    @patch('app.vimeo.direct.get_vimeo_client')
+    def test_ticket_requires_lesson_creator(self, mock_client, mock_fetch_lesson, test_client):
+        """Test only the lesson's creator can request an upload ticket"""
+        response = test_client.post("/api/v1/vimeo/uploads", json={"lesson_id": "lesson-1", "size": 1024})
+        
+        assert response.status_code == 403
+        mock_client.return_value.post.assert_not_called()
+
+    @patch('app.routes.vimeo.queries.update_lesson', new_callable=AsyncMock, return_value=[LESSON])
+    @patch('app.routes.vimeo.queries.fetch_lesson', new_callable=AsyncMock, return_value=LESSON)
+    @patch('app.vimeo.direct.get_vimeo_client')
+    def test_complete_upload_links_lesson(self, mock_client, mock_fetch_lesson, mock_update_lesson, test_client):
+        """Test the completion callback verifies the video and links it to the lesson"""
+        mock_client.return_value.get.return_value = MagicMock(status_code=200, json=MagicMock(return_value={
+            'uri': '/videos/12345',
+            'link': 'https://vimeo.com/12345',
+            'upload': {'status': 'complete'},
+            'transcode': {'status': 'in_progress'}
+        }))
+        
+        lesson_list_cache.set('listing', [])
+        
+        response = test_client.post("/api/v1/vimeo/uploads/12345/complete", json={"lesson_id": "lesson-1"})
+        
+        assert response.status_code == 200
+        assert response.json()['transcode_status'] == 'in_progress'
+        assert lesson_list_cache.get('listing') is None
+        mock_client.return_value.get.assert_called_once_with(
+            '/me/videos/12345',
+            params={'fields': 'uri,link,name,upload.status,transcode.status'},
+            hooks=ANY
+        )
+        lesson_id, data = mock_update_lesson.await_args.args
+        assert lesson_id == 'lesson-1'
+        assert data['vimeo_video_id'] == '12345'
+        assert data['vimeo_url'] == 'https://vimeo.com/12345'
+
+    @patch('app.routes.vimeo.queries.update_lesson', new_callable=AsyncMock)
+    @patch('app.vimeo.direct.get_vimeo_client')
+    def test_complete_upload_rejects_non_numeric_id(self, mock_client, mock_update_lesson, test_client):
+        """Test IDs that are not plain digits never reach Vimeo or the lesson"""
+        for vimeo_id in ("12345abc", "%2E%2E", "１２３"):
+            response = test_client.post(f"/api/v1/vimeo/uploads/{vimeo_id}/complete", json={"lesson_id": "lesson-1"})
+            
+            assert response.status_code == 400
+        mock_client.return_value.get.assert_not_called()
+        mock_update_lesson.assert_not_called()
+
+    @patch('app.routes.vimeo.queries.update_lesson', new_callable=AsyncMock)
+    @patch('app.routes.vimeo.queries.fetch_lesson', new_callable=AsyncMock, return_value=LESSON)
+    @patch('app.vimeo.direct.get_vimeo_client')
+    def test_complete_upload_still_in_progress(self, mock_client, mock_fetch_lesson, mock_update_lesson, test_client):
+        """Test a lesson is not linked until Vimeo has received the whole file"""
+        mock_client.return_value.get.return_value = MagicMock(status_code=200, json=MagicMock(return_value={
+            'uri': '/videos/12345',
+            'upload': {'status': 'in_progress'}
+        }))
+        
+        response = test_client.post("/api/v1/vimeo/uploads/12345/complete", json={"lesson_id": "lesson-1"})
+        
+        assert response.status_code == 409
+        mock_update_lesson.assert_not_awaited()
+
+def _vimeo_video(video_id, duration=120, status='available'):
+    return {
+        'uri': f'/videos/{video_id}',
+        'link': f'https://vimeo.com/{video_id}',
+        'duration': duration,
+        'status': status,
+        'pictures': {'sizes': [
+            {'width': 295, 'link': f'https://i.vimeocdn.com/{video_id}_295.jpg'},
+            {'width': 640, 'link': f'https://i.vimeocdn.com/{video_id}_640.jpg'},
+            {'width': 1280, 'link': f'https://i.vimeocdn.com/{video_id}_1280.jpg'},
+        ]}
+    }
+
+def _videos_response(*videos):
+    return MagicMock(status_code=200, json=MagicMock(return_value={'data': list(videos)}))
+
+class TestVideoMetadata:
+    @pytest.fixture(autouse=True)
+    def _clear_cache(self):
+        video_metadata_cache.invalidate()
+
+    @pytest.mark.asyncio
+    @patch('app.vimeo.metadata.get_vimeo_client')
+    async def test_metadata_batched_and_cached(self, mock_client):
+        """Test misses are fetched in one /videos?uris= call and served from cache afterwards"""
+        mock_client.return_value.get.return_value = _videos_response(_vimeo_video('1'), _vimeo_video('2', duration=300))
+        
+        first = await get_videos_metadata(['1', '2', '1'])
+        second = await get_videos_metadata(['2', '1'])
+        
+        mock_client.return_value.get.assert_called_once_with('/videos', params={
+            'uris': '/videos/1,/videos/2',
+            'fields': 'uri,link,duration,status,pictures.sizes',
+            'per_page': 2
+        }, hooks=ANY)
+        assert first == second
+        assert first['2'] == {
+            'vimeo_id': '2',
+            'url': 'https://vimeo.com/2',
+            'duration': 300,
+            'status': 'available',
+            'thumbnail_url': 'https://i.vimeocdn.com/2_640.jpg'
+        }
+
+    @pytest.mark.asyncio
+    @patch('app.vimeo.metadata.get_vimeo_client')
+    async def test_metadata_split_into_batches(self, mock_client, monkeypatch):
+        """Test large lookups are split into VIMEO_METADATA_BATCH_SIZE requests"""
+        monkeypatch.setattr(get_settings(), 'VIMEO_METADATA_BATCH_SIZE', 2)
+        mock_client.return_value.get.side_effect = [
+            _videos_response(_vimeo_video('1'), _vimeo_video('2')),
+            _videos_response(_vimeo_video('3'))
+        ]
+        
+        result = await get_videos_metadata(['1', '2', '3', '4'])
+        
+        assert mock_client.return_value.get.call_count == 2
+        assert mock_client.return_value.get.call_args.kwargs['params']['uris'] == '/videos/3,/videos/4'
+        # Video 4 was not returned by Vimeo
+        assert sorted(result) == ['1', '2', '3']
+
+    @pytest.mark.asyncio
+    @patch('app.vimeo.metadata.queries.update_lesson', new_callable=AsyncMock)
+    @patch('app.vimeo.metadata.queries.fetch_lessons_with_videos', new_callable=AsyncMock)
+    @patch('app.vimeo.metadata.get_vimeo_client')
+    async def test_refresher_updates_changed_lessons(self, mock_client, mock_fetch, mock_update):
+        """Test the refresher pages through lessons and only writes rows whose metadata changed"""
+        unchanged = {
+            'id': 'lesson-1',
+            'vimeo_video_id': '1',
+            'vimeo_url': 'https://vimeo.com/1',
+            'thumbnail_url': 'https://i.vimeocdn.com/1_640.jpg',
+            'video_duration': 120,
+            'video_status': 'available'
+        }
+        transcoding = {
+            'id': 'lesson-2',
+            'vimeo_video_id': '2',
+            'vimeo_url': 'https://vimeo.com/2',
+            'thumbnail_url': None,
+            'video_duration': 0,
+            'video_status': 'transcoding'
+        }
+        mock_fetch.side_effect = [[unchanged, transcoding], []]
+        mock_client.return_value.get.return_value = _videos_response(_vimeo_video('1'), _vimeo_video('2', duration=300))
+        lesson_list_cache.set('listing', [])
+        
+        updated = await MetadataRefresher(interval=60, page_size=2).refresh_once()
+        
+        assert updated == 1
+        assert lesson_list_cache.get('listing') is None
+        assert mock_fetch.await_args_list[1].kwargs == {'after_id': 'lesson-2', 'limit': 2}
+        lesson_id, changes = mock_update.await_args.args
+        assert lesson_id == 'lesson-2'
+        assert changes['thumbnail_url'] == 'https://i.vimeocdn.com/2_640.jpg'
+        assert changes['video_duration'] == 300
+        assert changes['video_status'] == 'available'
+        assert 'vimeo_url' not in changes
+
+    @patch('app.vimeo.metadata.get_vimeo_client')
+    def test_metadata_endpoint(self, mock_client, test_client):
+        """Test the metadata endpoint resolves comma-separated IDs"""
+        mock_client.return_value.get.return_value = _videos_response(_vimeo_video('1'))
+        
+        response = test_client.get("/api/v1/vimeo/videos/metadata?ids=1")
+        
+        assert response.status_code == 200
+        assert response.json()['1']['duration'] == 120
+
+    @patch('app.vimeo.metadata.get_vimeo_client')
+    def test_metadata_endpoint_caps_ids(self, mock_client, test_client):
+        """Test requests for more distinct IDs than the cap are rejected before calling Vimeo"""
+        ids = ','.join(str(video_id) for video_id in range(get_settings().VIMEO_METADATA_MAX_IDS + 1))
+        
+        response = test_client.get(f"/api/v1/vimeo/videos/metadata?ids={ids}")
+        
+        assert response.status_code == 422
+        mock_client.return_value.get.assert_not_called()
+
+class StubVimeoHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the Vimeo API that reports a configurable quota"""
+    status = 200
+    remaining = 100
+    reset_in = 60.0
+
+    def do_GET(self):
+        reset = datetime.now(timezone.utc) + timedelta(seconds=self.reset_in)
+        body = json.dumps({'name': 'stub'}).encode()
+        self.send_response(self.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-RateLimit-Limit', '100')
+        self.send_header('X-RateLimit-Remaining', str(self.remaining))
+        self.send_header('X-RateLimit-Reset', reset.isoformat())
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub_vimeo():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubVimeoHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    client = vimeo.VimeoClient(token='test-token')
+    client.API_ROOT = f"http://127.0.0.1:{server.server_address[1]}"
+    yield client
+    server.shutdown()
+    StubVimeoHandler.status, StubVimeoHandler.remaining, StubVimeoHandler.reset_in = 200, 100, 60.0
+
+def _limiter(rate=100.0, burst=10, interactive_wait=1.0):
+    return VimeoRateLimiter(
+        rate=rate,
+        burst=burst,
+        batch_reserve=5,
+        max_wait={Priority.INTERACTIVE: interactive_wait, Priority.BATCH: None},
+        backoff=60.0
+    )
+
+class TestVimeoRateLimiter:
+    def test_interactive_calls_served_before_batch(self):
+        """Test waiting interactive calls take budget ahead of earlier batch calls"""
+        limiter = _limiter(rate=5.0, burst=1)
+        limiter.acquire()
+        order = []
+        
+        def call(priority):
+            limiter.acquire(priority)
+            order.append(priority)
+        
+        batch = threading.Thread(target=call, args=(Priority.BATCH,))
+        batch.start()
+        time.sleep(0.05)
+        interactive = threading.Thread(target=call, args=(Priority.INTERACTIVE,))
+        interactive.start()
+        batch.join(2)
+        interactive.join(2)
+        
+        assert order == [Priority.INTERACTIVE, Priority.BATCH]
+        assert limiter.stats()['throttled'] == 2
+
+    def test_batch_waits_when_quota_is_reserved(self, stub_vimeo):
+        """Test batch calls hold back for the reset once Vimeo reports low remaining quota"""
+        StubVimeoHandler.remaining = 3
+        StubVimeoHandler.reset_in = 0.5
+        limiter = _limiter()
+        batch = RateLimitedClient(stub_vimeo, limiter, Priority.BATCH)
+        interactive = RateLimitedClient(stub_vimeo, limiter, Priority.INTERACTIVE)
+        
+        assert batch.get('/me').json() == {'name': 'stub'}
+        stats = limiter.stats()
+        assert (stats['limit'], stats['remaining']) == (100, 3)
+        
+        started = time.monotonic()
+        interactive.get('/me')
+        assert time.monotonic() - started < 0.3
+        
+        StubVimeoHandler.reset_in = 60.0
+        batch.get('/me')
+        assert time.monotonic() - started >= 0.3
+
+    def test_429_pauses_calls(self, stub_vimeo):
+        """Test a 429 from Vimeo stops further calls until the window resets"""
+        limiter = _limiter(interactive_wait=0.1)
+        client = RateLimitedClient(stub_vimeo, limiter)
+        client.get('/me')
+        
+        StubVimeoHandler.status = 429
+        StubVimeoHandler.remaining = 0
+        with pytest.raises(APIRateLimitExceededFailure):
+            client.get('/me')
+        with pytest.raises(VimeoRateLimitError):
+            client.get('/me')
+        
+        stats = limiter.stats()
+        assert stats['rate_limited'] == 1
+        assert stats['rejected'] == 1
+
+    def test_429_pause_follows_reported_reset(self, stub_vimeo):
+        """Test the pause after a 429 lasts until the X-RateLimit-Reset on that 429"""
+        StubVimeoHandler.status = 429
+        StubVimeoHandler.remaining = 0
+        StubVimeoHandler.reset_in = 5.0
+        limiter = _limiter()
+        client = RateLimitedClient(stub_vimeo, limiter)
+        
+        with pytest.raises(APIRateLimitExceededFailure):
+            client.get('/me')
+        
+        paused_for = limiter._paused_until - time.monotonic()
+        assert 4.0 < paused_for <= 5.0
+        assert limiter.stats()['remaining'] == 0
+
+    def test_quota_hook_keeps_caller_hooks(self):
+        """Test hooks passed by the caller still run alongside the quota recorder"""
+        limiter = _limiter()
+        wrapped = MagicMock()
+        caller_hook = MagicMock()
+        
+        RateLimitedClient(wrapped, limiter).get('/me', hooks={'response': caller_hook})
+        
+        hooks = wrapped.get.call_args.kwargs['hooks']['response']
+        assert hooks[0] is caller_hook
+        response = MagicMock(headers={'X-RateLimit-Remaining': '7'})
+        hooks[1](response)
+        assert limiter.stats()['remaining'] == 7
+
+    def test_rate_limit_endpoint(self, test_client):
+        """Test the remaining budget is exposed for monitoring"""
+        response = test_client.get("/api/v1/vimeo/rate-limit")
+        
+        assert response.status_code == 200
+        assert {'remaining', 'tokens', 'waiting', 'throttled'} <= set(response.json())
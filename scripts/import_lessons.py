@@ -0,0 +1,56 @@
+"""Bulk-import lessons from a JSONL or CSV file.
+
+Usage:
+    python scripts/import_lessons.py lessons.jsonl --creator-id <uuid>
+    python scripts/import_lessons.py lessons.csv --dry-run
+
+Records are validated as the file is read and written in chunked inserts;
+Stripe products and prices are created concurrently. Re-running the same file
+skips lessons that were already imported.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent.parent / 'backend'
+sys.path.append(str(backend_dir))
+
+from app.supabase.client import close_async_postgrest_client
+from app.supabase.lesson_import import LESSON_IMPORT_FORMATS, import_lessons, iter_lesson_records
+
+async def _read_lines(path: Path):
+    with path.open(encoding='utf-8', newline='') as handle:
+        for line in handle:
+            yield line.rstrip('\r\n')
+
+async def main(args: argparse.Namespace) -> int:
+    path = Path(args.file)
+    fmt = args.format or path.suffix.lstrip('.').lower().replace('ndjson', 'jsonl')
+    if fmt not in LESSON_IMPORT_FORMATS:
+        print(f"Cannot infer format from {path.name}; pass --format {'/'.join(LESSON_IMPORT_FORMATS)}")
+        return 2
+
+    try:
+        summary = await import_lessons(
+            iter_lesson_records(_read_lines(path), fmt),
+            default_creator_id=args.creator_id,
+            create_stripe_products=not args.skip_stripe,
+            dry_run=args.dry_run
+        )
+    finally:
+        await close_async_postgrest_client()
+
+    print(json.dumps(summary, indent=2))
+    return 1 if summary['errors'] else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-import lessons from JSONL or CSV")
+    parser.add_argument("file", help="Path to a .jsonl or .csv file")
+    parser.add_argument("--format", choices=LESSON_IMPORT_FORMATS, help="Override the format inferred from the file extension")
+    parser.add_argument("--creator-id", help="Creator for records without a creator_id")
+    parser.add_argument("--skip-stripe", action="store_true", help="Do not create Stripe products and prices")
+    parser.add_argument("--dry-run", action="store_true", help="Validate only; write nothing")
+    sys.exit(asyncio.run(main(parser.parse_args())))